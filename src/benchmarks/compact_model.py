@@ -0,0 +1,59 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+# Make the modules in src/ importable when run as `python src/benchmarks/compact_model.py`
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pdf2bibtex.core import BASE_DIR
+from pdf2bibtex.dataset_io import find_training_set, load_features
+
+"""
+Compact model benchmark: the joblib-pickled sklearn model vs its .npz export
+(see compact_forest.py) on file size, load time, per-document scoring and
+probability parity. Documents are simulated as consecutive slices of the
+training set.
+
+    python src/benchmarks/compact_model.py --lines-per-doc 40
+"""
+
+
+def timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Compare the joblib model with its compact .npz export.")
+    arg_parser.add_argument("--model", default=os.path.join(BASE_DIR, "models", "title_classifier_rf.joblib"))
+    arg_parser.add_argument("--data", default=None, help="Training set used as input (default: the fastest one on disk)")
+    arg_parser.add_argument("--docs", type=int, default=200, help="Number of simulated documents")
+    arg_parser.add_argument("--lines-per-doc", type=int, default=40)
+    args = arg_parser.parse_args()
+
+    compact_path = os.path.splitext(args.model)[0] + ".npz"
+    X, _ = load_features(args.data or find_training_set())
+
+    # Imported after loading the data so that the load times below are comparable
+    import joblib
+    import pandas as pd
+    from pdf2bibtex.compact_forest import CompactForest
+    from pdf2bibtex.line_batch import FEATURE_COLUMNS
+
+    sk_load, sk_model = timed(lambda: joblib.load(args.model))
+    cf_load, cf_model = timed(lambda: CompactForest.load(compact_path))
+
+    docs = [X[i:i + args.lines_per_doc] for i in range(0, min(len(X), args.docs * args.lines_per_doc), args.lines_per_doc)]
+    sk_docs, sk_probs = timed(lambda: [sk_model.predict_proba(pd.DataFrame(d, columns=FEATURE_COLUMNS))[:, 1] for d in docs])
+    cf_docs, cf_probs = timed(lambda: [cf_model.predict_proba(d)[:, 1] for d in docs])
+    max_diff = max(float(np.max(np.abs(a - b))) for a, b in zip(sk_probs, cf_probs))
+
+    print(f"\n--- Compact model ({len(docs)} documents x {args.lines_per_doc} lines) ---")
+    print(f"{'':<10}{'size MB':>10}{'load ms':>10}{'ms/doc':>10}")
+    print(f"{'joblib':<10}{os.path.getsize(args.model) / 1e6:>10.2f}{1000 * sk_load:>10.1f}{1000 * sk_docs / len(docs):>10.2f}")
+    print(f"{'compact':<10}{os.path.getsize(compact_path) / 1e6:>10.2f}{1000 * cf_load:>10.1f}{1000 * cf_docs / len(docs):>10.2f}")
+    print(f"Max probability difference: {max_diff:.3g}")
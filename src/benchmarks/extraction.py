@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+import argparse
+
+# Make the modules in src/ importable when run as `python src/benchmarks/extraction.py`
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pdf2bibtex.core import RAW_PDF_DIR
+from pdf_loader import PDFLoader
+
+"""
+First-page extraction benchmark: reference get_text("dict") path vs the lean
+path (fast=True) vs the lean path clipped to the top 40% of the page.
+
+The lean path must produce exactly the same lines as the reference path; the
+clipped path is checked on what it is used for, the title candidate.
+
+    python src/benchmarks/extraction.py --limit 1000
+"""
+
+
+def extract(path, **loader_kwargs):
+    loader = PDFLoader(path, **loader_kwargs)
+    try:
+        return loader.get_first_page_lines()
+    finally:
+        loader.close()
+
+
+def time_mode(paths, **loader_kwargs):
+    start = time.perf_counter()
+    results = [extract(p, **loader_kwargs) for p in paths]
+    return time.perf_counter() - start, results
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark the first-page extraction paths.")
+    arg_parser.add_argument("--pdf-dir", default=RAW_PDF_DIR)
+    arg_parser.add_argument("--limit", type=int, default=500, help="Number of PDFs to use")
+    args = arg_parser.parse_args()
+
+    pdfs = sorted(f for f in os.listdir(args.pdf_dir) if f.endswith('.pdf'))[:args.limit]
+    paths = [os.path.join(args.pdf_dir, f) for f in pdfs]
+
+    ref_time, ref = time_mode(paths, fast=False)
+    fast_time, fast = time_mode(paths, fast=True)
+    clip_time, clipped = time_mode(paths, fast=True, clip_top=0.4)
+
+    line_mismatches = sum(1 for a, b in zip(ref, fast) if a != b)
+    title_mismatches = sum(1 for a, b in zip(ref, clipped)
+                           if PDFLoader.get_title_candidate(a) != PDFLoader.get_title_candidate(b))
+
+    n = len(paths)
+    print(f"\n--- First-page extraction ({n} PDFs) ---")
+    print(f"reference (dict):        {ref_time:7.2f}s  {n / ref_time:8.1f} docs/s")
+    print(f"fast (text only):        {fast_time:7.2f}s  {n / fast_time:8.1f} docs/s")
+    print(f"fast + clip top 40%:     {clip_time:7.2f}s  {n / clip_time:8.1f} docs/s")
+    print(f"Documents whose lines differ (fast vs reference): {line_mismatches}")
+    print(f"Documents whose title candidate differs (clipped vs reference): {title_mismatches}")
+    sys.exit(1 if line_mismatches else 0)
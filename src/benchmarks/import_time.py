@@ -0,0 +1,62 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+"""
+Import-time regression benchmark for the lightweight modules.
+
+Each module is imported in a fresh interpreter. The script reports the
+median wall time of the import statement and fails (exit code 1)
+if the import exceeds its budget or pulls in a heavy library.
+
+    python src/benchmarks/import_time.py --runs 10
+"""
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# module -> import budget in milliseconds
+BUDGETS_MS = {
+    "pdf2bibtex.core": 50,
+}
+
+# Libraries that must never be imported as a side effect of the modules above
+HEAVY_MODULES = ["torch", "numpy", "pandas", "sklearn", "fitz"]
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str, runs: int) -> dict:
+    env = dict(os.environ, PYTHONPATH=SRC_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    timings, heavy = [], set()
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                             env=env, capture_output=True, text=True, check=True).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        timings.append(result["seconds"])
+        heavy.update(result["heavy"])
+    timings.sort()
+    return {"median_ms": 1000 * timings[len(timings) // 2], "heavy": sorted(heavy)}
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Check import time of the lightweight modules.")
+    arg_parser.add_argument("--runs", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    failed = False
+    for module, budget in BUDGETS_MS.items():
+        result = measure(module, args.runs)
+        ok = result["median_ms"] <= budget and not result["heavy"]
+        failed = failed or not ok
+        print(f"{module}: {result['median_ms']:.1f} ms (budget {budget} ms)"
+              f"{', imports ' + ', '.join(result['heavy']) if result['heavy'] else ''}"
+              f" -> {'OK' if ok else 'REGRESSION'}")
+    sys.exit(1 if failed else 0)
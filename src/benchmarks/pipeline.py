@@ -0,0 +1,298 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+
+# Make the modules in src/ importable when run as `python src/benchmarks/pipeline.py`
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pdf2bibtex.core import BASE_DIR
+
+"""
+End-to-end benchmark of the pdf2bibtex pipeline on a synthetic corpus.
+
+A corpus is generated locally (an arXiv-like snapshot JSONL, the matching
+metadata JSONL and one-page PDFs written with PyMuPDF), then each stage is
+timed in its own interpreter so that its peak RSS is its own:
+
+    sampling     parser.get_random_post_2007_subset_parallel on the snapshot
+    extraction   PDFLoader first-page extraction, per document
+    labeling     data_builder.extract_labeled_batch's TitleLabeler, per document
+    training     train_title_classifier on the labeled lines (+ compact export)
+    prediction   TitlePredictor.predict_title per document, and predict_titles
+
+Results (throughput, latency percentiles, peak RSS) are written to a JSON
+file and compared against a stored baseline; a stage that got slower or
+bigger than the tolerance allows is reported as a regression (exit code 1).
+
+    python src/benchmarks/pipeline.py --pdfs 300 --save-baseline
+    python src/benchmarks/pipeline.py --pdfs 300 --json results.json
+"""
+
+STAGES = ["sampling", "extraction", "labeling", "training", "prediction"]
+DEFAULT_BASELINE = os.path.join(BASE_DIR, "data", "benchmarks", "pipeline_baseline.json")
+
+WORDS = ("neural quantum graph learning spectral topology market protein dynamics stochastic "
+         "inference bayesian lattice entropy manifold optimal transport kernel").split()
+SECTIONS = ["cs.LG", "physics.optics", "math.PR", "q-bio.NC", "q-fin.ST", "hep-th"]
+
+
+# --------------- Synthetic corpus --------------- #
+
+def _title(rng) -> str:
+    return " ".join(rng.choice(WORDS).capitalize() for _ in range(rng.randint(5, 14)))
+
+
+def make_corpus(workdir: str, n_pdfs: int, n_snapshot: int, seed: int = 0):
+    """Writes snapshot.jsonl, metadata.jsonl and pdfs/<id>.pdf into workdir."""
+    import fitz
+
+    rng = random.Random(seed)
+    pdf_dir = os.path.join(workdir, "pdfs")
+    os.makedirs(pdf_dir, exist_ok=True)
+
+    with open(os.path.join(workdir, "snapshot.jsonl"), 'w') as f:
+        for i in range(n_snapshot):
+            year = rng.randint(2003, 2025)
+            paper_id = f"{year % 100:02d}{rng.randint(1, 12):02d}.{i:05d}" if year >= 2007 else f"hep-th/{i:07d}"
+            f.write(json.dumps({
+                'id': paper_id, 'authors': "Alice Smith, Bob Jones", 'title': _title(rng), 'abstract': "x",
+                'categories': " ".join(rng.sample(SECTIONS, rng.randint(1, 2))),
+                'journal-ref': "J. Test 1" if rng.random() < 0.6 else None,
+            }) + "\n")
+
+    with open(os.path.join(workdir, "metadata.jsonl"), 'w') as f:
+        for i in range(n_pdfs):
+            paper_id = f"2101.{i:05d}"
+            title = _title(rng)
+            doc = fitz.open()
+            page = doc.new_page()
+            y = 90
+            words = title.split()
+            for j in range(0, len(words), 6):
+                page.insert_text((72, y), " ".join(words[j:j + 6]), fontsize=17, fontname="hebo")
+                y += 22
+            page.insert_text((72, y + 10), "Alice Smith, Bob Jones", fontsize=11)
+            y += 40
+            while y < 780:
+                page.insert_text((72, y), " ".join(rng.choice(WORDS) for _ in range(10)), fontsize=10)
+                y += 13
+            doc.save(os.path.join(pdf_dir, paper_id + ".pdf"))
+            doc.close()
+            f.write(json.dumps({'id': paper_id, 'title': title, 'authors': "Alice Smith, Bob Jones",
+                                'abstract': "x", 'section': "cs.LG", 'year': 2021,
+                                'journal-ref': "J. Test 1 (2021)"}) + "\n")
+
+
+def _pdf_paths(workdir: str):
+    pdf_dir = os.path.join(workdir, "pdfs")
+    return [os.path.join(pdf_dir, f) for f in sorted(os.listdir(pdf_dir)) if f.endswith('.pdf')]
+
+
+def _titles(workdir: str) -> dict:
+    with open(os.path.join(workdir, "metadata.jsonl"), 'r') as f:
+        return {r['id']: r['title'] for r in map(json.loads, f)}
+
+
+# --------------- Stages (run in a child process) --------------- #
+
+def _per_item(fn, items):
+    latencies = []
+    start = time.perf_counter()
+    for item in items:
+        t = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - t)
+    return time.perf_counter() - start, latencies
+
+
+def stage_sampling(workdir: str, workers: int) -> dict:
+    from parser import get_random_post_2007_subset_parallel
+    start = time.perf_counter()
+    df = get_random_post_2007_subset_parallel(['cs', 'physics', 'math', 'q-bio', 'q-fin'], samples_per_cat=200,
+                                              workers=workers, file_path=os.path.join(workdir, "snapshot.jsonl"))
+    seconds = time.perf_counter() - start
+    with open(os.path.join(workdir, "snapshot.jsonl"), 'rb') as f:
+        n_records = sum(1 for _ in f)
+    return {'items': n_records, 'seconds': seconds, 'sampled': len(df)}
+
+
+def stage_extraction(workdir: str, workers: int) -> dict:
+    from pdf_loader import PDFLoader
+
+    def extract(path):
+        loader = PDFLoader(path)
+        try:
+            loader.get_first_page_batch()
+        finally:
+            loader.close()
+
+    paths = _pdf_paths(workdir)
+    seconds, latencies = _per_item(extract, paths)
+    return {'items': len(paths), 'seconds': seconds, 'latencies': latencies}
+
+
+def stage_labeling(workdir: str, workers: int) -> dict:
+    from pdf_loader import load_first_page_batch
+    from title_labeler import TitleLabeler
+
+    titles = _titles(workdir)
+    paths = _pdf_paths(workdir)
+    # Extraction is timed by its own stage; only the labeling is timed here
+    docs = [(load_first_page_batch(p).texts(), titles[os.path.basename(p)[:-4]]) for p in paths]
+    seconds, latencies = _per_item(lambda doc: TitleLabeler(doc[1]).label_lines(doc[0]), docs)
+    return {'items': len(docs), 'seconds': seconds, 'latencies': latencies,
+            'lines': sum(len(texts) for texts, _ in docs)}
+
+
+def stage_training(workdir: str, workers: int) -> dict:
+    from data_builder import extract_labeled_batch
+    from pdf2bibtex.dataset_io import TrainingSetWriter
+    from pdf2bibtex.train_model_random_forest import train_title_classifier
+
+    titles = _titles(workdir)
+    data_path = os.path.join(workdir, "training_set.parquet")
+    with TrainingSetWriter(data_path) as writer:
+        for p in _pdf_paths(workdir):
+            writer.write(extract_labeled_batch(p, titles[os.path.basename(p)[:-4]]))
+
+    start = time.perf_counter()
+    result = train_title_classifier(data_path, n_jobs=workers, model_path=os.path.join(workdir, "model.joblib"))
+    return {'items': result['train_rows'], 'seconds': time.perf_counter() - start,
+            'fit_seconds': result['fit_seconds'], 'f1': result['f1']}
+
+
+def stage_prediction(workdir: str, workers: int) -> dict:
+    from predict_random_forest import TitlePredictor
+
+    predictor = TitlePredictor(os.path.join(workdir, "model.npz"))
+    paths = _pdf_paths(workdir)
+    seconds, latencies = _per_item(predictor.predict_title, paths)
+    start = time.perf_counter()
+    predictor.predict_titles(paths, workers=workers)
+    return {'items': len(paths), 'seconds': seconds, 'latencies': latencies,
+            'batch_seconds': time.perf_counter() - start}
+
+
+STAGE_FUNCTIONS = {
+    "sampling": stage_sampling,
+    "extraction": stage_extraction,
+    "labeling": stage_labeling,
+    "training": stage_training,
+    "prediction": stage_prediction,
+}
+
+
+def summarize(result: dict) -> dict:
+    """Throughput and p50/p95/p99 latency (ms) from a stage's raw result."""
+    latencies = sorted(result.pop('latencies', []))
+    result['throughput_per_s'] = result['items'] / result['seconds'] if result['seconds'] else None
+    for name, q in (("p50_ms", 0.50), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+        result[name] = 1000 * latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else None
+    return result
+
+
+def run_stage_in_child(stage: str, workdir: str, workers: int) -> dict:
+    cmd = [sys.executable, os.path.abspath(__file__), "--stage", stage, "--workdir", workdir,
+           "--workers", str(workers)]
+    src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([src_dir, os.environ.get("PYTHONPATH", "")]))
+    out = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+# --------------- Baseline comparison --------------- #
+
+def compare(results: dict, baseline: dict, tolerance: float, min_seconds: float = 0.05) -> list:
+    """
+    Prints current vs baseline per stage and returns the regressed stages.
+    Slowdowns smaller than min_seconds are treated as timer noise.
+    """
+    regressions = []
+    print(f"\n{'stage':<12}{'seconds':>10}{'baseline':>10}{'ratio':>8}{'RSS MB':>9}{'baseline':>10}  status")
+    for stage, current in results['stages'].items():
+        base = baseline.get('stages', {}).get(stage)
+        if base is None:
+            print(f"{stage:<12}{current['seconds']:>10.3f}{'-':>10}{'-':>8}{current['peak_rss_mb']:>9.0f}{'-':>10}  new")
+            continue
+        time_ratio = current['seconds'] / base['seconds'] if base['seconds'] else 1.0
+        rss_ratio = current['peak_rss_mb'] / base['peak_rss_mb'] if base['peak_rss_mb'] else 1.0
+        slower = time_ratio > 1 + tolerance and current['seconds'] - base['seconds'] > min_seconds
+        regressed = slower or rss_ratio > 1 + tolerance
+        if regressed:
+            regressions.append(stage)
+        print(f"{stage:<12}{current['seconds']:>10.3f}{base['seconds']:>10.3f}{time_ratio:>8.2f}"
+              f"{current['peak_rss_mb']:>9.0f}{base['peak_rss_mb']:>10.0f}  {'REGRESSION' if regressed else 'OK'}")
+    return regressions
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on a synthetic corpus.")
+    arg_parser.add_argument("--pdfs", type=int, default=200, help="Synthetic PDFs to generate")
+    arg_parser.add_argument("--snapshot-records", type=int, default=50000, help="Synthetic snapshot size")
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    arg_parser.add_argument("--workdir", help="Corpus directory (default: a temporary directory)")
+    arg_parser.add_argument("--only", nargs="+", choices=STAGES, help="Run only these stages (in pipeline order)")
+    arg_parser.add_argument("--json", help="Write the results to this JSON file")
+    arg_parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results to compare against")
+    arg_parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    arg_parser.add_argument("--tolerance", type=float, default=0.25,
+                            help="Allowed slowdown / memory growth before a stage counts as a regression")
+    arg_parser.add_argument("--stage", choices=STAGES, help=argparse.SUPPRESS)  # child mode
+    args = arg_parser.parse_args()
+
+    if args.stage:
+        import resource
+        result = summarize(STAGE_FUNCTIONS[args.stage](args.workdir, args.workers))
+        result['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(json.dumps(result))
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        if not os.path.exists(os.path.join(workdir, "metadata.jsonl")):
+            print(f"Generating {args.pdfs} PDFs and {args.snapshot_records} snapshot records in {workdir}...")
+            make_corpus(workdir, args.pdfs, args.snapshot_records)
+
+        results = {
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            'workers': args.workers,
+            'pdfs': len(_pdf_paths(workdir)),
+            'stages': {},
+        }
+        for stage in STAGES:
+            if args.only and stage not in args.only:
+                continue
+            print(f"Running {stage}...")
+            results['stages'][stage] = run_stage_in_child(stage, workdir, args.workers)
+
+    print(f"\n--- Pipeline ({results['pdfs']} PDFs, {args.workers} workers) ---")
+    print(f"{'stage':<12}{'items':>8}{'seconds':>10}{'items/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'RSS MB':>9}")
+    for stage, r in results['stages'].items():
+        pct = [f"{r[k]:>9.2f}" if r[k] is not None else f"{'-':>9}" for k in ("p50_ms", "p95_ms", "p99_ms")]
+        print(f"{stage:<12}{r['items']:>8}{r['seconds']:>10.3f}{r['throughput_per_s']:>10.1f}"
+              f"{''.join(pct)}{r['peak_rss_mb']:>9.0f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    failed = False
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        failed = bool(regressions)
+    else:
+        print(f"\nNo baseline at {args.baseline} (run with --save-baseline to create one)")
+    sys.exit(1 if failed else 0)
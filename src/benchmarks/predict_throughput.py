@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+import argparse
+
+# Make the modules in src/ importable when run as `python src/benchmarks/predict_throughput.py`
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pdf2bibtex.core import RAW_PDF_DIR
+from predict_random_forest import TitlePredictor, default_model_path
+
+"""
+Throughput benchmark: per-file TitlePredictor.predict_title vs the batch
+TitlePredictor.predict_titles API on the same set of PDFs.
+
+    python src/benchmarks/predict_throughput.py --limit 500 --workers 8
+"""
+
+
+def run_benchmark(predictor, paths, workers):
+    start = time.perf_counter()
+    single = [predictor.predict_title(p) for p in paths]
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = predictor.predict_titles(paths, workers=1)
+    batch_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parallel = predictor.predict_titles(paths, workers=workers)
+    parallel_time = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b, c in zip(single, batch, parallel) if not (a == b == c))
+
+    n = len(paths)
+    print(f"\n--- Prediction throughput ({n} PDFs) ---")
+    print(f"predict_title (per file):          {single_time:8.2f}s  {n / single_time:8.1f} docs/s")
+    print(f"predict_titles (batch, 1 worker):  {batch_time:8.2f}s  {n / batch_time:8.1f} docs/s")
+    print(f"predict_titles (batch, {workers} workers): {parallel_time:8.2f}s  {n / parallel_time:8.1f} docs/s")
+    print(f"Titles differing between paths: {mismatches}")
+    return {'single': single_time, 'batch': batch_time, 'parallel': parallel_time, 'mismatches': mismatches}
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark per-file vs batch title prediction.")
+    arg_parser.add_argument("--pdf-dir", default=RAW_PDF_DIR)
+    arg_parser.add_argument("--model", default=default_model_path())
+    arg_parser.add_argument("--limit", type=int, default=200, help="Number of PDFs to use")
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = arg_parser.parse_args()
+
+    pdfs = sorted(f for f in os.listdir(args.pdf_dir) if f.endswith('.pdf'))[:args.limit]
+    run_benchmark(TitlePredictor(args.model), [os.path.join(args.pdf_dir, f) for f in pdfs], args.workers)
@@ -0,0 +1,99 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import numpy as np
+
+# Make the modules in src/ importable when run as `python src/benchmarks/title_matching.py`
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pdf2bibtex.core import TRAIN_DATA_PATH
+from pdf2bibtex.title_index import build_title_index, TitleIndex, DEFAULT_THRESHOLD
+
+"""
+Title matching benchmark: builds the trigram title index of a metadata JSONL
+(in a temporary directory) and looks up a sample of its titles with the
+kinds of noise the PDF extraction produces. Reports build time, index size,
+lookup latency and how often the right paper comes back first.
+
+    python src/benchmarks/title_matching.py --queries 2000
+"""
+
+
+def _drop_spaces(title, rng):
+    return title.replace(" ", "")
+
+
+def _ligature(title, rng):
+    return title.replace("fi", "ﬁ").replace("fl", "ﬂ")
+
+
+def _drop_word(title, rng):
+    words = title.split()
+    if len(words) > 3:
+        del words[rng.randrange(len(words))]
+    return " ".join(words)
+
+
+def _typos(title, rng):
+    chars = list(title)
+    for _ in range(2):
+        chars[rng.randrange(len(chars))] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    return "".join(chars)
+
+
+def _extra_line(title, rng):
+    return title + " " + rng.choice(["Department of Physics", "University of Cambridge", "Abstract"])
+
+
+NOISE = {
+    'exact': lambda title, rng: title,
+    'no_spaces': _drop_spaces,
+    'ligatures': _ligature,
+    'drop_word': _drop_word,
+    'typos': _typos,
+    'extra_line': _extra_line,
+}
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark the approximate title -> metadata matcher.")
+    arg_parser.add_argument("--metadata", default=TRAIN_DATA_PATH, help="Metadata JSONL (default: the gold-standard set)")
+    arg_parser.add_argument("--queries", type=int, default=1000, help="Titles looked up per kind of noise")
+    arg_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with open(args.metadata, 'r', encoding='utf-8') as f:
+        papers = [(str(e.get('id', '')), e.get('title') or "") for e in map(json.loads, f) if e.get('title')]
+    sample = rng.sample(papers, min(args.queries, len(papers)))
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        start = time.perf_counter()
+        build_title_index(args.metadata, index_dir)
+        build_time = time.perf_counter() - start
+        size = sum(os.path.getsize(os.path.join(index_dir, name)) for name in os.listdir(index_dir))
+        index = TitleIndex(index_dir)
+
+        print(f"\n--- Title matching ({len(index)} titles, {len(sample)} queries per noise) ---")
+        print(f"Build: {build_time:.2f}s, index: {size / 1e6:.1f} MB")
+        print(f"{'noise':<12}{'top-1':>8}{'none':>8}{'p50 ms':>10}{'p99 ms':>10}")
+        for noise, distort in NOISE.items():
+            latencies, correct, missing = [], 0, 0
+            for arxiv_id, title in sample:
+                query = distort(title, rng)
+                start = time.perf_counter()
+                match = index.best(query, args.threshold)
+                latencies.append(time.perf_counter() - start)
+                if match is None:
+                    missing += 1
+                # Duplicate titles in the metadata count as correct: any of them is a right answer
+                elif match.arxiv_id == arxiv_id or index.best(title, 1.0).arxiv_id == match.arxiv_id:
+                    correct += 1
+            p50, p99 = 1000 * np.percentile(latencies, [50, 99])
+            print(f"{noise:<12}{correct / len(sample):>8.3f}{missing / len(sample):>8.3f}{p50:>10.3f}{p99:>10.3f}")
+        index.close()
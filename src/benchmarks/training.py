@@ -0,0 +1,73 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# Make the modules in src/ importable when run as `python src/benchmarks/training.py`
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pdf2bibtex.dataset_io import find_training_set
+
+"""
+Training benchmark: compares classifier configurations on the same split.
+
+Each configuration runs in a fresh interpreter, so the peak RSS (ru_maxrss)
+reported for it is its own. Wall time covers loading + fitting + evaluation;
+F1 is for the TITLE class on the (never subsampled) 20% test split. Models
+are not saved.
+
+    python src/benchmarks/training.py --json results.json
+"""
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# name -> train_title_classifier keyword arguments
+CONFIGS = {
+    "rf, 1 core": {"model_type": "rf", "n_jobs": 1},
+    "rf, all cores": {"model_type": "rf", "n_jobs": -1},
+    "rf, all cores, OTHER 10:1": {"model_type": "rf", "n_jobs": -1, "other_ratio": 10},
+    "hgb": {"model_type": "hgb"},
+    "hgb, OTHER 10:1": {"model_type": "hgb", "other_ratio": 10},
+}
+
+_PROBE = """
+import sys, time, json, resource
+start = time.perf_counter()
+from pdf2bibtex.train_model_random_forest import train_title_classifier
+result = train_title_classifier({data!r}, save=False, **{kwargs!r})
+result["wall_seconds"] = time.perf_counter() - start
+result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps(result))
+"""
+
+
+def run_config(data_path: str, kwargs: dict) -> dict:
+    path = os.pathsep.join([SRC_DIR, os.environ.get("PYTHONPATH", "")])
+    env = dict(os.environ, PYTHONPATH=path)
+    out = subprocess.run([sys.executable, "-c", _PROBE.format(data=data_path, kwargs=kwargs)],
+                         env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Compare title classifier training configurations.")
+    arg_parser.add_argument("--data", default=None, help="Training set (default: the fastest one on disk)")
+    arg_parser.add_argument("--only", nargs="+", choices=sorted(CONFIGS), help="Run only these configurations")
+    arg_parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = arg_parser.parse_args()
+
+    data_path = args.data or find_training_set()
+    results = {}
+    for name in args.only or CONFIGS:
+        print(f"Running {name}...")
+        results[name] = run_config(data_path, CONFIGS[name])
+
+    print(f"\n--- Training ({data_path}) ---")
+    print(f"{'configuration':<28}{'wall s':>9}{'fit s':>9}{'peak RSS MB':>13}{'F1':>8}")
+    for name, r in results.items():
+        print(f"{name:<28}{r['wall_seconds']:>9.2f}{r['fit_seconds']:>9.2f}{r['peak_rss_mb']:>13.0f}{r['f1']:>8.3f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
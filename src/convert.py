@@ -0,0 +1,210 @@
+import os
+import json
+import tarfile
+import zipfile
+import argparse
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional, Tuple, Union
+from tqdm import tqdm
+from pdf2bibtex.core import ArxivPaper, TRAIN_DATA_PATH
+from pdf2bibtex.bibtex import BibtexWriter
+from pdf2bibtex.metadata_index import open_metadata_index
+from pdf2bibtex.title_index import get_title_index, DEFAULT_THRESHOLD
+from pdf2bibtex import metrics
+from pdf_loader import load_first_page_batch
+from predict_random_forest import default_model_path, load_model, score_title
+
+"""
+    Bulk PDF -> BibTeX conversion.
+
+        python convert.py papers/ --out papers.bib
+        python convert.py papers.tar.gz --out papers.bib --workers 8
+
+    The source is a directory tree, a single PDF, or a tar/zip archive whose
+    members are read in memory (never unpacked to disk). Every PDF is
+    extracted and classified in a worker process; the predicted title is
+    then matched approximately against the local metadata titles (see
+    pdf2bibtex.title_index) and the matching paper is streamed into the .bib
+    file (see pdf2bibtex.bibtex.BibtexWriter).
+    Memory stays bounded: at most max_in_flight PDFs are read but not yet
+    written out.
+
+    The JSONL report has one line per PDF, in source order:
+        source, status (matched / unmatched / no_text / failed),
+        predicted_title, confidence (mean P(TITLE) of the title lines),
+        arxiv_id, match_score (trigram Dice similarity of the titles),
+        key (citation key in the .bib), error (extraction failure, or a
+        matched metadata record that cannot be turned into an entry)
+    Metadata may be the gold-standard JSONL or raw arXiv snapshot records.
+"""
+
+# --------------- Sources --------------- #
+
+def iter_pdf_sources(source: str) -> Iterator[Tuple[str, Union[str, bytes]]]:
+    """
+    Yields (name, pdf) for every PDF in source: a path for files on disk, the
+    content as bytes for archive members. Names are relative to the source.
+    """
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(".pdf"):
+                    path = os.path.join(root, name)
+                    yield os.path.relpath(path, source), path
+    elif tarfile.is_tarfile(source):
+        # Stream mode: members are read in archive order, also for .tar.gz/.tar.xz
+        with tarfile.open(source, mode='r|*') as tar:
+            for member in tar:
+                if member.isfile() and member.name.lower().endswith(".pdf"):
+                    yield member.name, tar.extractfile(member).read()
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and info.filename.lower().endswith(".pdf"):
+                    yield info.filename, archive.read(info)
+    else:
+        yield os.path.basename(source), source
+
+
+# --------------- Workers --------------- #
+
+_model = None
+_cache_path = None
+
+
+def _init_worker(model_path: str, cache_path: Optional[str]):
+    global _model, _cache_path
+    _model = load_model(model_path)
+    _cache_path = cache_path
+
+
+def _classify(name: str, pdf: Union[str, bytes]) -> dict:
+    """Worker entry point: extracts one PDF and predicts its title."""
+    result = {'source': name}
+    try:
+        batch = load_first_page_batch(pdf, _cache_path)
+        title, confidence = score_title(_model, batch.texts(), batch.features())
+    except Exception as e:
+        result.update(status="failed", error=f"{type(e).__name__}: {e}")
+    else:
+        result.update(status="no_text" if title is None else "classified", predicted_title=title,
+                      confidence=round(confidence, 4))
+    result['metrics'] = metrics.drain()
+    return result
+
+
+# --------------- Conversion --------------- #
+
+@contextmanager
+def _atomic_report(report_path: str):
+    """JSONL report written to report_path + ".tmp": renamed on success, removed on failure."""
+    tmp_path = report_path + ".tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as report:
+            yield report
+            report.flush()
+            os.fsync(report.fileno())
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, report_path)
+
+
+def _add_entry(writer: BibtexWriter, result: dict, match, row: dict):
+    """Writes the matched record; a record that cannot be turned into an entry fails this PDF only."""
+    try:
+        key = writer.add(ArxivPaper.from_dict(row))
+    except (KeyError, TypeError, ValueError) as e:
+        result.update(status="failed", arxiv_id=match.arxiv_id, match_score=match.score,
+                      error=f"metadata record: {type(e).__name__}: {e}")
+        return
+    result.update(status="matched", arxiv_id=match.arxiv_id, match_score=match.score, key=key)
+
+
+@metrics.entry_point("convert")
+def convert(source: str, bib_path: str, report_path: Optional[str] = None, model_path: Optional[str] = None,
+            metadata_path: str = TRAIN_DATA_PATH, workers: int = 1, max_in_flight: Optional[int] = None,
+            min_confidence: float = 0.0, min_score: float = DEFAULT_THRESHOLD,
+            cache_path: Optional[str] = None) -> dict:
+    """
+    Converts every PDF in source into a .bib file and a JSONL report.
+
+    :param report_path: JSONL report (default: bib_path with .jsonl)
+    :param workers: extraction/classification processes
+    :param max_in_flight: PDFs read but not yet reported (default: 4 * workers)
+    :param min_confidence: predictions below this confidence are reported as unmatched
+    :param min_score: minimum title similarity of a match (see pdf2bibtex.title_index)
+    :return: count of PDFs per status, plus the .bib writer stats
+    """
+    model_path = model_path or default_model_path()
+    report_path = report_path or os.path.splitext(bib_path)[0] + ".jsonl"
+    # e.g. --out data/processed/arXiv_v1_06-02-2026.bib: the default report would replace the metadata
+    for path in (bib_path, report_path):
+        if os.path.realpath(path) == os.path.realpath(metadata_path):
+            raise ValueError(f"{path} is the metadata file; choose another --out or --report")
+    max_in_flight = max_in_flight or 4 * workers
+    titles = get_title_index(metadata_path)
+    counts = {'matched': 0, 'unmatched': 0, 'no_text': 0, 'failed': 0}
+
+    # The index is closed (mmap and file handle released) even if the conversion fails
+    with open_metadata_index(metadata_path) as metadata, BibtexWriter(bib_path) as writer, \
+            _atomic_report(report_path) as report:
+        def record(result):
+            metrics.merge(result.pop('metrics', None))
+            if result['status'] == "classified":
+                with metrics.timer("convert.match"):
+                    match = None
+                    if result['confidence'] >= min_confidence:
+                        match = titles.best(result['predicted_title'], min_score)
+                    row = metadata.record(match.arxiv_id, prefix=False) if match else None
+                if row is None:
+                    result['status'] = "unmatched"
+                else:
+                    _add_entry(writer, result, match, row)
+            counts[result['status']] += 1
+            metrics.count(f"convert.{result['status']}")
+            report.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+        sources = tqdm(iter_pdf_sources(source), desc="Converting PDFs")
+        if workers <= 1:
+            _init_worker(model_path, cache_path)
+            for name, pdf in sources:
+                record(_classify(name, pdf))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(model_path, cache_path)) as pool:
+                in_flight = deque()
+                for name, pdf in sources:
+                    in_flight.append(pool.submit(_classify, name, pdf))
+                    # Results are written in source order; block on the oldest once the window is full
+                    while in_flight and (in_flight[0].done() or len(in_flight) >= max_in_flight):
+                        record(in_flight.popleft().result())
+                while in_flight:
+                    record(in_flight.popleft().result())
+
+    counts.update(writer.stats())
+    print(f"Converted {sum(counts[s] for s in ('matched', 'unmatched', 'no_text', 'failed'))} PDFs: "
+          f"{counts['matched']} matched, {counts['unmatched']} unmatched, {counts['no_text']} without text, "
+          f"{counts['failed']} failed. Wrote {counts['written']} entries to {bib_path}, report in {report_path}")
+    return counts
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Convert a directory or tar/zip archive of PDFs into a .bib file.")
+    arg_parser.add_argument("source", help="Directory (searched recursively), PDF, or .tar[.gz|.bz2|.xz]/.zip archive")
+    arg_parser.add_argument("--out", required=True, help="Output .bib file")
+    arg_parser.add_argument("--report", help="JSONL report (default: next to --out, .jsonl)")
+    arg_parser.add_argument("--model", help="Model file (default: the compact .npz export if present)")
+    arg_parser.add_argument("--metadata", default=TRAIN_DATA_PATH, help="Metadata JSONL to match titles against")
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    arg_parser.add_argument("--min-confidence", type=float, default=0.0,
+                            help="Leave predictions below this confidence unmatched")
+    arg_parser.add_argument("--min-score", type=float, default=DEFAULT_THRESHOLD,
+                            help="Minimum title similarity (trigram Dice, 0-1) of a metadata match")
+    args = arg_parser.parse_args()
+    convert(args.source, args.out, args.report, args.model, args.metadata, args.workers,
+            min_confidence=args.min_confidence, min_score=args.min_score)
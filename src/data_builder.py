@@ -1,78 +1,336 @@
-
-
 import os
 import json
-import dataclasses
+import argparse
+import hashlib
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from tqdm import tqdm
 from pdf2bibtex.core import TRAIN_DATA_PATH, RAW_PDF_DIR, BASE_DIR
-from pdf_loader import PDFLoader
+from pdf2bibtex.line_batch import PDFLineBatch
+from pdf2bibtex.metadata_index import get_metadata_index
+from pdf2bibtex.dataset_io import TrainingSetWriter, training_set_path, record_build_formats, FORMAT_EXTENSIONS
+from pdf_loader import load_first_page_batch, EXTRACTOR_VERSION
+from extraction_cache import get_cache, DEFAULT_CACHE_PATH
+from title_labeler import TitleLabeler
+from pdf2bibtex import metrics
 
-def load_title_metadata_to_dict(metadata_path: str) -> dict:
-    """
-    
-    
-    :param metadata_path: arXiv_v1_06-02-2026.jsonl file path
-    :type metadata_path: str
-    :return: 
-    :rtype: dict[Any, Any]
-    
-    Loads metadata once into a dictionary for O(1) lookup speed."""
-    titles_map = {}
-    with open(metadata_path, 'r') as f:
+# Bump this whenever the labeling rules change (see title_labeler.TitleLabeler)
+LABELER_VERSION = "2"
+
+def extract_labeled_batch(pdf_path: str, true_title: str, cache_path=None, sha256=None) -> PDFLineBatch:
+    """Extracts the first page of one PDF as a labeled, columnar PDFLineBatch."""
+    batch = load_first_page_batch(pdf_path, cache_path, sha256=sha256)
+
+    # Assign the label based on fuzzy matcher (title normalized once per document)
+    with metrics.timer("label"):
+        labels, scores = TitleLabeler(true_title).label_lines(batch.texts())
+        batch.set_labels(labels, scores)
+    metrics.count("lines", len(batch))
+    return batch
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """Streams a file through sha256 (used to detect changed PDFs)."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+# --------------- Incremental build manifest --------------- #
+# The manifest is an append-only JSONL journal stored next to the processed data.
+# Every successfully extracted PDF appends one entry as soon as its rows are on
+# disk, so a crashed build resumes from where it stopped. The latest entry for a
+# file wins; the journal is compacted at the end of every build.
+
+MANIFEST_PATH = os.path.join(BASE_DIR, "data", "processed", "training_set_v1.manifest.jsonl")
+PARTS_DIR = os.path.join(BASE_DIR, "data", "processed", "training_set_v1.parts")
+
+def part_path_for(filename: str) -> str:
+    return os.path.join(PARTS_DIR, filename.replace('.pdf', '.npz'))
+
+def _build_version() -> str:
+    return f"{EXTRACTOR_VERSION}+{LABELER_VERSION}"
+
+def _title_hash(true_title: str) -> str:
+    # A changed ground-truth title means the labels are stale even if the PDF is not
+    return hashlib.sha256(true_title.encode('utf-8')).hexdigest()[:16]
+
+def load_manifest(manifest_path: str) -> dict:
+    """Replays the manifest journal into {filename: entry}."""
+    manifest = {}
+    if not os.path.exists(manifest_path):
+        return manifest
+    with open(manifest_path, 'r') as f:
         for line in f:
-            entry = json.loads(line)
-            
-            m_id = str(entry.get('id', ''))
-            titles_map[m_id] = " ".join(entry['title'].split()).strip()
-    return titles_map
-
-def is_line_in_title(line_text: str, true_title: str) -> bool:
-    """Uses 'squashed' text matching to handle spacing issues."""
-    line_squashed = "".join(line_text.lower().split())
-    true_squashed = "".join(true_title.lower().split())
-    if len(line_text.strip()) < 4:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn last line from a crash; everything before it is valid
+                continue
+            if entry.get('deleted'):
+                manifest.pop(entry['file'], None)
+            else:
+                manifest[entry['file']] = entry
+    return manifest
+
+def _write_manifest(manifest_path: str, manifest: dict):
+    """Rewrites (compacts) the journal atomically."""
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        for filename in sorted(manifest):
+            f.write(json.dumps(manifest[filename]) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, manifest_path)
+
+def _is_up_to_date(entry, pdf_path: str, part_path: str, title_hash: str) -> bool:
+    """Cheap size/mtime check first; only hash the file if the mtime moved."""
+    if not entry or entry.get('build_version') != _build_version():
+        return False
+    if entry.get('title_hash') != title_hash or not os.path.exists(part_path):
         return False
-    return line_squashed in true_squashed
+    st = os.stat(pdf_path)
+    if st.st_size != entry['size']:
+        return False
+    if st.st_mtime_ns == entry['mtime_ns']:
+        return True
+    # Touched but possibly identical (e.g. re-downloaded): compare content
+    if file_sha256(pdf_path) == entry['sha256']:
+        entry['mtime_ns'] = st.st_mtime_ns
+        return True
+    return False
+
+def _extract_to_part(filename: str, true_title: str, part_path: str, cache_path=None) -> dict:
+    """
+    Worker entry point: extracts and labels one PDF, writes its rows to its own
+    .npz part file (atomically) and returns the manifest entry. Errors are returned,
+    not printed, so the parent can report them per worker. The worker's metrics
+    travel back with the result (see metrics.drain).
+    """
+    pdf_path = os.path.join(RAW_PDF_DIR, filename)
+    result = {'file': filename, 'pid': os.getpid()}
+    try:
+        st = os.stat(pdf_path)
+        sha = file_sha256(pdf_path)
+        with metrics.timer("document"):
+            # The manifest's digest doubles as the cache key: the PDF is only read once
+            batch = extract_labeled_batch(pdf_path, true_title, cache_path, sha256=sha)
+            with metrics.timer("part.save"):
+                tmp_path = part_path + ".tmp"
+                batch.save(tmp_path)
+                os.replace(tmp_path, part_path)
+    except Exception as e:
+        metrics.count("pdfs.failed")
+        result['error'] = f"{type(e).__name__}: {e}"
+        result['metrics'] = metrics.drain()
+        return result
+
+    metrics.count("pdfs.extracted")
+
+    result['entry'] = {
+        'file': filename,
+        'size': st.st_size,
+        'mtime_ns': st.st_mtime_ns,
+        'sha256': sha,
+        'build_version': _build_version(),
+        'title_hash': _title_hash(true_title),
+        'rows': len(batch),
+    }
+    result['metrics'] = metrics.drain()
+    return result
+
+def _record_result(result: dict, manifest: dict, journal, errors_by_pid: dict):
+    """
+    Merges a worker result: manifest entry journaled (or error kept for the report).
+    A PDF that fails to (re-)extract loses its manifest entry and its old part, so
+    the output never keeps rows (or labels) of a previous version of the file.
+    """
+    metrics.merge(result.pop('metrics', None))
+    if 'error' in result:
+        errors_by_pid.setdefault(result['pid'], []).append((result['file'], result['error']))
+        if manifest.pop(result['file'], None) is not None:
+            journal.write(json.dumps({'file': result['file'], 'deleted': True}) + "\n")
+            journal.flush()
+        if os.path.exists(part_path_for(result['file'])):
+            os.remove(part_path_for(result['file']))
+        return
+    manifest[result['file']] = result['entry']
+    journal.write(json.dumps(result['entry']) + "\n")
+    journal.flush()
 
-def build_training_data():
+def _report_errors(errors_by_pid: dict) -> int:
+    """Per-worker error report; returns the number of errors."""
+    total_errors = 0
+    for pid, errors in sorted(errors_by_pid.items()):
+        print(f"[worker pid {pid}] {len(errors)} errors")
+        for filename, msg in errors:
+            print(f"    Error processing {filename.replace('.pdf', '')}: {msg}")
+        total_errors += len(errors)
+    return total_errors
+
+@metrics.entry_point("build_training_data")
+def build_training_data(workers: int = 1, full: bool = False, formats=("parquet",), cache_path=None):
+    """
+    Builds training_set_v1.parquet (and/or .arrow, .jsonl, .npz) from the PDFs in RAW_PDF_DIR.
+
+    The build is incremental: each PDF's labeled rows are kept in its own .npz part
+    file under training_set_v1.parts/ and tracked in training_set_v1.manifest.jsonl
+    (size, mtime, sha256, extractor/labeler version, title hash). Only new or
+    changed PDFs are re-extracted, parts of deleted PDFs are dropped, and the
+    output is re-assembled from the parts in sorted file order.
+
+    :param workers: number of extraction processes
+    :param full: ignore the manifest and re-extract everything
+    :param formats: any of "parquet", "arrow", "jsonl" (streamed row group by row group)
+                    and "npz" (bulk PDFLineBatch, built in memory); outputs of other
+                    formats left by earlier builds are removed
+    :param cache_path: optional extraction cache (see extraction_cache.py); lets a
+                       --full rebuild or a labeler change skip PDF parsing
+    """
     # Setup paths and load the Ground Truth map
-    output_path = os.path.join(BASE_DIR, "data", "processed", "training_set_v1.jsonl")
-    titles_map = load_title_metadata_to_dict(TRAIN_DATA_PATH)
-    pdf_files = [f for f in os.listdir(RAW_PDF_DIR) if f.endswith('.pdf')]
-    
-    print(f"Starting build for {len(pdf_files)} PDFs...")
-    
-    with open(output_path, 'w') as f_out:
-        # Use tqdm to see a progress bar 
-        for filename in tqdm(pdf_files):
-            arxiv_id = filename.replace('.pdf', '')
-            true_title = titles_map.get(arxiv_id)
-            
+    manifest_path = MANIFEST_PATH
+    os.makedirs(PARTS_DIR, exist_ok=True)
+
+    metadata = get_metadata_index(TRAIN_DATA_PATH)
+    # Sorted so that the output order does not depend on the filesystem
+    pdf_files = sorted(f for f in os.listdir(RAW_PDF_DIR) if f.endswith('.pdf'))
+    manifest = {} if full else load_manifest(manifest_path)
+
+    current, todo = [], []
+    for filename in pdf_files:
+        true_title = metadata.title(filename.replace('.pdf', ''), prefix=False)
+        if not true_title:
+            continue
+        current.append(filename)
+        pdf_path = os.path.join(RAW_PDF_DIR, filename)
+        if not _is_up_to_date(manifest.get(filename), pdf_path, part_path_for(filename), _title_hash(true_title)):
+            todo.append((filename, true_title))
+
+    # Drop rows of PDFs that disappeared (or lost their metadata)
+    current_set = set(current)
+    removed = [f for f in manifest if f not in current_set]
+    for filename in removed:
+        manifest.pop(filename)
+        if os.path.exists(part_path_for(filename)):
+            os.remove(part_path_for(filename))
+
+    print(f"Starting build for {len(pdf_files)} PDFs: {len(current)} with metadata, "
+          f"{len(todo)} to extract, {len(removed)} removed, on {workers} worker(s)...")
+
+    errors_by_pid = {}
+    with open(manifest_path, 'a') as journal:
+        def record(result):
+            _record_result(result, manifest, journal, errors_by_pid)
+
+        if workers <= 1:
+            for filename, true_title in tqdm(todo):
+                record(_extract_to_part(filename, true_title, part_path_for(filename), cache_path))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_extract_to_part, filename, true_title, part_path_for(filename), cache_path)
+                           for filename, true_title in todo]
+                # Use tqdm to see a progress bar
+                for future in tqdm(as_completed(futures), total=len(futures)):
+                    record(future.result())
+
+    _write_manifest(manifest_path, manifest)
+
+    # Re-assemble the output from the parts in sorted file order
+    kept = [f for f in current if f in manifest]
+    saved = []
+    streamed = [fmt for fmt in formats if fmt != "npz"]
+    writers = [TrainingSetWriter(training_set_path(fmt)) for fmt in streamed]
+    total_rows = 0
+    with metrics.timer("build.write"):
+        for filename in kept:
+            part = PDFLineBatch.load(part_path_for(filename))
+            total_rows += len(part)
+            for writer in writers:
+                writer.write(part)
+        for writer in writers:
+            writer.close()
+            saved.append(writer.path)
+
+    if "npz" in formats:
+        npz_path = training_set_path("npz")
+        PDFLineBatch.concat([PDFLineBatch.load(part_path_for(f)) for f in kept]).save(npz_path + ".tmp")
+        os.replace(npz_path + ".tmp", npz_path)
+        saved.append(npz_path)
+    record_build_formats(formats)
+
+    total_errors = _report_errors(errors_by_pid)
+    print(f"Build complete! Saved {total_rows} lines to {', '.join(saved)} ({total_errors} errors)")
+
+@metrics.entry_point("extract_stream")
+def extract_stream(filenames, workers: int = 1, cache_path=None, max_in_flight=None) -> dict:
+    """
+    Streaming counterpart of the extraction step of build_training_data: consumes
+    PDF file names (in RAW_PDF_DIR) as they arrive, e.g. from a queue fed by the
+    downloader, and extracts and labels the new or changed ones. Entries are
+    journaled to the manifest as their parts land, so a following
+    build_training_data only has to re-assemble the output.
+
+    :param filenames: iterable of PDF file names; may block between items
+    :param workers: extraction processes (1: in this process)
+    :param max_in_flight: PDFs submitted to the pool but not yet recorded (default: 2 * workers)
+    :return: counts of extracted, up-to-date, skipped (no metadata) and failed PDFs
+    """
+    os.makedirs(PARTS_DIR, exist_ok=True)
+    metadata = get_metadata_index(TRAIN_DATA_PATH)
+    manifest = load_manifest(MANIFEST_PATH)
+    max_in_flight = max_in_flight or 2 * workers
+    stats = {'extracted': 0, 'up_to_date': 0, 'no_metadata': 0, 'errors': 0}
+
+    def pending():
+        for filename in filenames:
+            true_title = metadata.title(filename.replace('.pdf', ''), prefix=False)
             if not true_title:
+                stats['no_metadata'] += 1
                 continue
-                
-            # Extract visual features using PDFLoader
-            try:
-                loader = PDFLoader(os.path.join(RAW_PDF_DIR, filename))
-                lines = loader.get_first_page_lines()
-                loader.close()
-                
-                # Label each line and save
-                for line_obj in lines:
-                    # Assign the label based on fuzzy matcher
-                    if is_line_in_title(line_obj.text, true_title):
-                        line_obj.label = "TITLE"
-                    else:
-                        line_obj.label = "OTHER"
-                    
-                    # Convert Dataclass to dict and write one JSON line
-                    row = dataclasses.asdict(line_obj)
-                    f_out.write(json.dumps(row) + "\n")
-                    
-            except Exception as e:
-                print(f"Error processing {arxiv_id}: {e}")
-
-    print(f"Build complete! Saved to {output_path}")
+            pdf_path = os.path.join(RAW_PDF_DIR, filename)
+            if _is_up_to_date(manifest.get(filename), pdf_path, part_path_for(filename), _title_hash(true_title)):
+                stats['up_to_date'] += 1
+                continue
+            yield filename, true_title
+
+    errors_by_pid = {}
+    with open(MANIFEST_PATH, 'a') as journal:
+        def record(result):
+            _record_result(result, manifest, journal, errors_by_pid)
+            stats['errors' if 'error' in result else 'extracted'] += 1
+
+        if workers <= 1:
+            for filename, true_title in tqdm(pending(), desc="Extracting"):
+                record(_extract_to_part(filename, true_title, part_path_for(filename), cache_path))
+        else:
+            # spawn: the caller may be running downloader threads, which fork() does not mix well with
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                in_flight = deque()
+                for filename, true_title in tqdm(pending(), desc="Extracting"):
+                    in_flight.append(pool.submit(_extract_to_part, filename, true_title,
+                                                 part_path_for(filename), cache_path))
+                    # Record finished PDFs as we go, blocking on the oldest once the pool is full
+                    while in_flight and (in_flight[0].done() or len(in_flight) >= max_in_flight):
+                        record(in_flight.popleft().result())
+                while in_flight:
+                    record(in_flight.popleft().result())
+
+    _report_errors(errors_by_pid)
+    return stats
 
 if __name__ == "__main__":
-    build_training_data()
\ No newline at end of file
+    arg_parser = argparse.ArgumentParser(description="Build the line-level training set from raw PDFs.")
+    arg_parser.add_argument("--workers", type=int, default=1,
+                            help="Number of worker processes (default: 1)")
+    arg_parser.add_argument("--full", action="store_true",
+                            help="Ignore the manifest and re-extract every PDF")
+    arg_parser.add_argument("--format", nargs="+", choices=list(FORMAT_EXTENSIONS), default=["parquet"],
+                            help="Output format(s); JSONL is kept as an export option (default: parquet)")
+    arg_parser.add_argument("--cache", nargs="?", const=DEFAULT_CACHE_PATH, default=None, metavar="PATH",
+                            help="Use the on-disk extraction cache (default location if no PATH is given)")
+    args = arg_parser.parse_args()
+    build_training_data(workers=args.workers, full=args.full, formats=args.format, cache_path=args.cache)
+    if args.cache:
+        # Workers count in their own processes; see the lifetime_* counters
+        print(f"Extraction cache: {get_cache(args.cache).stats()}")
@@ -1,13 +1,113 @@
-import pandas as pd
+import os
 import json
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+from tqdm import tqdm
 from pdf2bibtex.core import ArxivPaper
 from pdf2bibtex.core import TRAIN_DATA_PATH
+from pdf2bibtex.dataset_io import read_dataframe, write_dataframe
+from pdf2bibtex import metrics
 
-def enrich_gold_standard():
+def _enrich_lines(lines: List[bytes]) -> Tuple[List[bytes], int, Optional[dict]]:
+    """
+    Adds/refreshes the bibtex field of a chunk of JSONL lines; unchanged rows are passed through as-is.
+    Also returns this process's metrics (see metrics.drain) for the parent to merge.
+    """
+    out, changed = [], 0
+    with metrics.timer("enrich.chunk"):
+        for raw_line in lines:
+            if not raw_line.strip():
+                out.append(raw_line)
+                continue
+            with metrics.timer("enrich.json_decode"):
+                row = json.loads(raw_line)
+            with metrics.timer("enrich.bibtex"):
+                bib = ArxivPaper.from_dict(row).generate_bibtex_entry()
+            if row.get('bibtex') == bib:
+                out.append(raw_line)
+                continue
+            row['bibtex'] = bib
+            with metrics.timer("enrich.json_encode"):
+                out.append((json.dumps(row) + "\n").encode('utf-8'))
+            changed += 1
+    metrics.count("enrich.rows", len(lines))
+    metrics.count("enrich.changed", changed)
+    return out, changed, metrics.drain()
+
+def _iter_chunks(f, chunk_size: int) -> Iterator[List[bytes]]:
+    chunk = []
+    for raw_line in f:
+        if not raw_line.endswith(b"\n"):
+            raw_line += b"\n"
+        chunk.append(raw_line)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def enrich_jsonl_streaming(path: str = TRAIN_DATA_PATH, workers: int = 1, chunk_size: int = 5000) -> int:
+    """
+    Streams a JSONL file through _enrich_lines in chunks of chunk_size rows
+    (on a process pool when workers > 1, at most 2 * workers chunks in flight)
+    into path + ".tmp", then atomically replaces the original. The original
+    file is only replaced if at least one row changed, and an interrupted run
+    leaves it untouched. Returns the number of rows that were (re)generated.
+    """
+    tmp_path = path + ".tmp"
+    rows, changed = 0, 0
+    try:
+        with open(path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            def write(result):
+                nonlocal rows, changed
+                out, n_changed, worker_metrics = result
+                metrics.merge(worker_metrics)
+                with metrics.timer("enrich.write"):
+                    dst.writelines(out)
+                rows += len(out)
+                changed += n_changed
+
+            if workers <= 1:
+                for chunk in tqdm(_iter_chunks(src, chunk_size), desc="Enriching chunks"):
+                    write(_enrich_lines(chunk))
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    in_flight = deque()
+                    for chunk in tqdm(_iter_chunks(src, chunk_size), desc="Enriching chunks"):
+                        in_flight.append(executor.submit(_enrich_lines, chunk))
+                        if len(in_flight) >= 2 * workers:
+                            write(in_flight.popleft().result())
+                    while in_flight:
+                        write(in_flight.popleft().result())
+            dst.flush()
+            os.fsync(dst.fileno())
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    if changed:
+        os.replace(tmp_path, path)
+    else:
+        os.remove(tmp_path)
+    print(f"{changed} of {rows} rows (re)generated"
+          f"{'' if changed else ', file left untouched'}.")
+    return changed
+
+@metrics.entry_point("enrich_gold_standard")
+def enrich_gold_standard(workers: int = 1, chunk_size: int = 5000):
     print(f"Loading data from {TRAIN_DATA_PATH}...")
-    
+
+    if TRAIN_DATA_PATH.endswith(".jsonl"):
+        # Bounded memory: the file is streamed chunk by chunk, never loaded whole
+        enrich_jsonl_streaming(TRAIN_DATA_PATH, workers=workers, chunk_size=chunk_size)
+        print("Enrichment complete! BibTeX column added.")
+        return
+
     # Read the existing sampled data
-    df = pd.read_json(TRAIN_DATA_PATH, lines=True)
+    df = read_dataframe(TRAIN_DATA_PATH)
     
     # Generate BibTeX for each row using our Data Schema
     def get_bib(row):
@@ -16,22 +116,24 @@ def enrich_gold_standard():
     
     df['bibtex'] = df.apply(get_bib, axis=1)
     
-    # Save back to the same file (locking the gold standard)
-    df.to_json(TRAIN_DATA_PATH, orient='records', lines=True)
+    # Save back to the same file (locking the gold standard), in the same format
+    write_dataframe(df, TRAIN_DATA_PATH)
     print("Enrichment complete! BibTeX column added.")
 
 if __name__ == "__main__":
-    enrich_gold_standard()
-
-
+    arg_parser = argparse.ArgumentParser(description="Add a BibTeX column to the gold-standard metadata.")
+    arg_parser.add_argument("--workers", type=int, default=1, help="Worker processes for the chunks")
+    arg_parser.add_argument("--chunk-size", type=int, default=5000, help="Rows per chunk")
+    args = arg_parser.parse_args()
+    enrich_gold_standard(workers=args.workers, chunk_size=args.chunk_size)
 
-#### SANITY CHECK ####
-import pandas as pd
-df = pd.read_json("data/processed/arXiv_v1_03-02-2026.jsonl", lines=True)
+    #### SANITY CHECK ####
+    with open(TRAIN_DATA_PATH, 'r') as f:
+        first_row = json.loads(f.readline())
 
-print("Columns found:", df.columns)
-if 'bibtex' in df.columns:
-    print("Sample BibTeX:")
-    print(df['bibtex'].iloc[0])
-else:
-    print("Column NOT found. Something went wrong during saving.")
\ No newline at end of file
+    print("Columns found:", list(first_row))
+    if 'bibtex' in first_row:
+        print("Sample BibTeX:")
+        print(first_row['bibtex'])
+    else:
+        print("Column NOT found. Something went wrong during saving.")
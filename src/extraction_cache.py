@@ -0,0 +1,182 @@
+import os
+import time
+import sqlite3
+import hashlib
+from multiprocessing.util import Finalize
+from typing import Optional, Union
+from pdf2bibtex.core import BASE_DIR
+
+"""
+    Persistent on-disk cache of extracted line features.
+
+    Entries are keyed by the PDF's sha256 plus the extractor version (and the
+    kind of extraction), so a re-downloaded or renamed file still hits and a
+    change to the extraction code invalidates everything at once. Values are
+    opaque bytes (a serialized PDFLineBatch). The cache is one SQLite file; the
+    least recently used entries are evicted once it grows past max_bytes.
+"""
+
+DEFAULT_CACHE_PATH = os.path.join(BASE_DIR, "data", "cache", "extraction_cache.sqlite")
+DEFAULT_MAX_BYTES = 1 << 30  # 1 GiB
+# Lookups whose bookkeeping (last_access, hit/miss counters) is held back before being written
+FLUSH_EVERY = 256
+
+
+class ExtractionCache:
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Bookkeeping of lookups not yet written to the database (see flush)
+        self._accessed = {}
+        self._pending = {'hits': 0, 'misses': 0}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # One connection per process; worker processes open their own cache
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, size INTEGER NOT NULL, last_access REAL NOT NULL, data BLOB NOT NULL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries(last_access)")
+        # Lifetime counters shared by every process using this cache file
+        self.conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self.conn.executemany("INSERT OR IGNORE INTO counters (name, value) VALUES (?, 0)",
+                              [("hits",), ("misses",), ("evictions",)])
+        # Running total of the entry sizes, so that put() never has to SUM the whole table
+        # (seeded once from the entries of caches created before it existed)
+        self.conn.execute("INSERT OR IGNORE INTO counters (name, value) "
+                          "SELECT 'bytes', COALESCE(SUM(size), 0) FROM entries")
+        self.conn.commit()
+
+    @staticmethod
+    def key_for(pdf_path: Union[str, bytes], extractor_version: str, kind: str = "first_page",
+                sha256: Optional[str] = None) -> str:
+        """
+        pdf_path: a file path, or the PDF content itself as bytes. Callers that
+        already hashed the content pass its sha256 hex digest to skip re-reading it.
+        """
+        if sha256 is not None:
+            return f"{sha256}:{extractor_version}:{kind}"
+        h = hashlib.sha256()
+        if isinstance(pdf_path, str):
+            with open(pdf_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+        else:
+            h.update(pdf_path)
+        return f"{h.hexdigest()}:{extractor_version}:{kind}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Cached value of key, or None. A lookup is a plain read: its last_access
+        update and counters are written with the next put, flush or close (or
+        once FLUSH_EVERY lookups are pending).
+        """
+        row = self.conn.execute("SELECT data FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            self._pending['misses'] += 1
+        else:
+            self.hits += 1
+            self._pending['hits'] += 1
+            self._accessed[key] = time.time()
+        if self._pending['hits'] + self._pending['misses'] >= FLUSH_EVERY:
+            self.flush()
+        return None if row is None else row[0]
+
+    def _write_pending(self):
+        if self._accessed:
+            self.conn.executemany("UPDATE entries SET last_access = ? WHERE key = ?",
+                                  [(t, key) for key, t in self._accessed.items()])
+            self._accessed.clear()
+        for name, n in self._pending.items():
+            if n:
+                self._bump(name, n)
+                self._pending[name] = 0
+
+    def flush(self):
+        """Writes the pending lookup bookkeeping in one transaction."""
+        if not (self._accessed or any(self._pending.values())):
+            return
+        self._write_pending()
+        self.conn.commit()
+
+    def _bump(self, name: str, n: int = 1):
+        self.conn.execute("UPDATE counters SET value = value + ? WHERE name = ?", (n, name))
+
+    def _counter(self, name: str) -> int:
+        return self.conn.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()[0]
+
+    def put(self, key: str, data: bytes):
+        self._write_pending()
+        # Subtracting the replaced entry is the first write, so the whole update runs under the write lock
+        self.conn.execute("UPDATE counters SET value = value - COALESCE((SELECT size FROM entries WHERE key = ?), 0) "
+                          "WHERE name = 'bytes'", (key,))
+        self.conn.execute("INSERT OR REPLACE INTO entries (key, data, size, last_access) VALUES (?, ?, ?, ?)",
+                          (key, sqlite3.Binary(data), len(data), time.time()))
+        self._bump("bytes", len(data))
+        self._evict()
+        self.conn.commit()
+
+    def _evict(self, batch_size: int = 64):
+        """Drops least recently used entries until the cache fits in max_bytes."""
+        total = self._counter("bytes")
+        while total > self.max_bytes:
+            # Oldest entries first, a few at a time, straight off the last_access index
+            victims = self.conn.execute("SELECT key, size FROM entries ORDER BY last_access LIMIT ?",
+                                        (batch_size,)).fetchall()
+            if not victims:
+                break
+            for key, size in victims:
+                if total <= self.max_bytes:
+                    break
+                self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._bump("bytes", -size)
+                total -= size
+                self.evictions += 1
+                self._bump("evictions")
+
+    def stats(self) -> dict:
+        """Counters of this instance plus lifetime counters of the cache file."""
+        self.flush()
+        entries = self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        lifetime = dict(self.conn.execute("SELECT name, value FROM counters").fetchall())
+        lookups = self.hits + self.misses
+        total_lookups = lifetime['hits'] + lifetime['misses']
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'lifetime_hits': lifetime['hits'],
+            'lifetime_misses': lifetime['misses'],
+            'lifetime_hit_rate': lifetime['hits'] / total_lookups if total_lookups else 0.0,
+            'lifetime_evictions': lifetime['evictions'],
+            'entries': entries,
+            'bytes': lifetime['bytes'],
+        }
+
+    def clear(self):
+        self.conn.execute("DELETE FROM entries")
+        self.conn.execute("UPDATE counters SET value = 0 WHERE name = 'bytes'")
+        self.conn.commit()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+_open_caches = {}
+
+
+def get_cache(path: str = DEFAULT_CACHE_PATH) -> ExtractionCache:
+    """Per-process cache instance for `path` (safe to call from pool workers)."""
+    key = (os.getpid(), os.path.abspath(path))
+    if key not in _open_caches:
+        cache = _open_caches[key] = ExtractionCache(path)
+        # Pending lookups are written at exit, in pool workers too (plain atexit does not run there)
+        Finalize(cache, cache.flush, exitpriority=10)
+    return _open_caches[key]
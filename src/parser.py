@@ -1,14 +1,22 @@
+import os
+import re
 import json
 import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 from pdf2bibtex.core import set_seed
+from pdf2bibtex.fastjson import json_loads
 
 # Setting the seed here ensures reproducibility
 set_seed(42)
 
+# arXiv Dataset: obtained from https://www.kaggle.com/datasets/Cornell-University/arxiv/data
+SNAPSHOT_PATH = 'data/raw/arxiv-metadata-oai-snapshot.json'
+
 # ------------------------- # Select Random Subset of ArXiv Papers Post-2007 # ------------------------- #
 
-def get_random_post_2007_subset(target_categories, samples_per_cat=500):
+def get_random_post_2007_subset(target_categories, samples_per_cat=500, file_path=SNAPSHOT_PATH):
     """
     This module selects random papers from different sections in arXiv (the original dataset is huge).
     Random samples are used to make sure the training is not biased. 
@@ -21,14 +29,12 @@ def get_random_post_2007_subset(target_categories, samples_per_cat=500):
 
     :param target_categories: sections from arXiv
     :param samples_per_cat: number of samples per section
+    :param file_path: the arXiv metadata snapshot (JSON lines)
     """
 
     buckets = {cat: [] for cat in target_categories}
     counts_seen = {cat: 0 for cat in target_categories}
     
-    # arXiv Dataset: obtained from https://www.kaggle.com/datasets/Cornell-University/arxiv/data
-    file_path = 'data/raw/arxiv-metadata-oai-snapshot.json' 
-    
     with open(file_path, 'r') as f:
         for line in f:
             item = json.loads(line)
@@ -91,21 +97,178 @@ def get_random_post_2007_subset(target_categories, samples_per_cat=500):
 
 
 
-if __name__ == "__main__": 
-    # Create a random subset of ArXiv papers post-2007 & containing journal references 
+# ------------------------- # Parallel sampler # ------------------------- #
+# Same selection rules as get_random_post_2007_subset, but the snapshot is split
+# into byte ranges that are sampled in parallel. Each worker keeps its own
+# reservoirs plus the number of matches it saw; the reservoirs are then merged
+# so the final sample is still a uniform sample of the whole file.
+
+# The snapshot is written compactly ("key":value). These byte patterns let us
+# drop most lines without a JSON parse; anything they do not recognise is
+# still fully parsed and checked, so the pre-filter can only skip true rejects.
+_NULL_JOURNAL_RE = re.compile(rb'"journal-ref":\s*(null|"\s*")')
+_ID_YEAR_RE = re.compile(rb'"id":\s*"(\d\d)\d\d\.')
+_OLD_ID_RE = re.compile(rb'"id":\s*"[^"]*/')
+
+
+def _passes_prefilter(raw_line: bytes) -> bool:
+    if _NULL_JOURNAL_RE.search(raw_line) or _OLD_ID_RE.search(raw_line):
+        return False
+    m = _ID_YEAR_RE.search(raw_line)
+    return m is None or 7 <= int(m.group(1)) <= 26
+
+
+def _make_record(item, paper_id, cat):
+    return {
+        'id': paper_id,
+        'authors': item['authors'],
+        'journal-ref': item['journal-ref'],
+        'year': f"20{paper_id[:2]}",
+        'title': item['title'],
+        'abstract': item['abstract'],
+        'section': cat
+    }
+
+
+def _sample_byte_range(file_path, start, end, target_categories, samples_per_cat, seed):
+    """Reservoir-samples the lines that start inside [start, end) of the snapshot."""
+    rng = random.Random(seed)
+    buckets = {cat: [] for cat in target_categories}
+    counts_seen = {cat: 0 for cat in target_categories}
+
+    with open(file_path, 'rb') as f:
+        if start > 0:
+            # Skip the line that straddles the boundary; the previous chunk owns it
+            f.seek(start - 1)
+            f.readline()
+        pos = f.tell()
+        while pos < end:
+            raw_line = f.readline()
+            if not raw_line:
+                break
+            pos += len(raw_line)
+            if not _passes_prefilter(raw_line):
+                continue
+
+            item = json_loads(raw_line)
+            journal = item.get('journal-ref')
+            if not journal or str(journal).strip() == "":
+                continue
+            paper_id = item['id']
+            parts = paper_id.split('.')
+            if len(parts) < 2 or not parts[0].isdigit():
+                continue
+            if not (7 <= int(parts[0][:2]) <= 26):
+                continue
+
+            for cat in item['categories'].split():
+                for target_cat in target_categories:
+                    if cat.startswith(target_cat):
+                        counts_seen[target_cat] += 1
+                        bucket = buckets[target_cat]
+                        if len(bucket) < samples_per_cat:
+                            bucket.append(_make_record(item, paper_id, cat))
+                        else:
+                            s = rng.randint(0, counts_seen[target_cat] - 1)
+                            if s < samples_per_cat:
+                                bucket[s] = _make_record(item, paper_id, cat)
+                        break
+
+    return buckets, counts_seen
+
+
+def _merge_reservoirs(chunk_results, target_cat, samples_per_cat, rng):
+    """
+    Merges per-chunk reservoirs into one uniform sample. How many items come from
+    each chunk follows the multivariate hypergeometric distribution (drawing
+    without replacement from all matches); within a chunk, any subset of a
+    uniform reservoir is itself uniform.
+    """
+    remaining = [counts[target_cat] for _, counts in chunk_results]
+    total = sum(remaining)
+    take = [0] * len(remaining)
+    for _ in range(min(samples_per_cat, total)):
+        r = rng.randrange(total)
+        for i, n in enumerate(remaining):
+            if r < n:
+                take[i] += 1
+                remaining[i] -= 1
+                break
+            r -= n
+        total -= 1
+
+    merged = []
+    for (buckets, _), k in zip(chunk_results, take):
+        merged.extend(rng.sample(buckets[target_cat], k))
+    return merged
+
+
+def get_random_post_2007_subset_parallel(target_categories, samples_per_cat=500, workers=None,
+                                         file_path=SNAPSHOT_PATH, seed=42):
+    """
+    Parallel version of get_random_post_2007_subset (same filters, same output columns).
 
+    :param workers: number of processes / byte-range chunks (default: all cores)
+    :param seed: base seed; chunk i uses seed + i, so results are reproducible
+                 for a fixed number of workers
+    """
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(file_path)
+    bounds = [size * i // workers for i in range(workers + 1)]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_sample_byte_range, file_path, bounds[i], bounds[i + 1],
+                        target_categories, samples_per_cat, seed + i)
+            for i in range(workers)
+        ]
+        chunk_results = [f.result() for f in futures]
+
+    rng = random.Random(seed)
+    all_data = []
+    for target_cat in target_categories:
+        all_data.extend(_merge_reservoirs(chunk_results, target_cat, samples_per_cat, rng))
+    return pd.DataFrame(all_data)
+
+
+def sample_gold_standard(workers: int = 1, index_dir=None, samples_per_cat: int = 1000,
+                         snapshot_path: str = SNAPSHOT_PATH,
+                         out_path: str = 'data/processed/arXiv_v1_06-02-2026.jsonl') -> pd.DataFrame:
+    """
+    Creates a random subset of ArXiv papers post-2007 & containing journal references
+    (samples_per_cat per section) and saves it as the gold-standard JSONL.
+
+    :param workers: processes for the parallel sampler (1 = original single-threaded sampler)
+    :param index_dir: sample from a columnar snapshot index in this directory instead
+                      (built on first use, see snapshot_index.py)
+    """
     # Define target sections
     my_sections = ['cs', 'physics', 'math', 'q-bio', 'q-fin'] # Major sections of ArXiv
 
-    # Get 1000 random papers per category/section from 2007 onwards
-    df = get_random_post_2007_subset(my_sections, samples_per_cat=1000)
+    if index_dir:
+        from snapshot_index import open_or_build_index
+        df = open_or_build_index(snapshot_path, index_dir).sample_post_2007(my_sections, samples_per_cat=samples_per_cat)
+    elif workers > 1:
+        df = get_random_post_2007_subset_parallel(my_sections, samples_per_cat=samples_per_cat, workers=workers,
+                                                  file_path=snapshot_path)
+    else:
+        df = get_random_post_2007_subset(my_sections, samples_per_cat=samples_per_cat, file_path=snapshot_path)
 
     # Save to disk
-    filename = 'data/processed/arXiv_v1_06-02-2026.jsonl'
-    df.to_json(filename, orient='records', lines=True)
-    print(f"Gold Standard dataset locked at: {filename}")
+    df.to_json(out_path, orient='records', lines=True)
+    print(f"Gold Standard dataset locked at: {out_path}")
 
     # Quick check on the distribution
     print(df.groupby(['section', 'year']).size().unstack(fill_value=0))
+    return df
 
+if __name__ == "__main__": 
+    arg_parser = argparse.ArgumentParser(description="Sample a balanced subset of the arXiv snapshot.")
+    arg_parser.add_argument("--workers", type=int, default=1,
+                            help="Processes for the parallel sampler (1 = original single-threaded sampler)")
+    arg_parser.add_argument("--index", metavar="DIR",
+                            help="Sample from a columnar snapshot index in DIR (built on first use, see snapshot_index.py)")
+    args = arg_parser.parse_args()
 
+    # Get 1000 random papers per category/section from 2007 onwards
+    sample_gold_standard(workers=args.workers, index_dir=args.index)
@@ -0,0 +1,4 @@
+from pdf2bibtex.cli import main
+
+if __name__ == "__main__":
+    main()
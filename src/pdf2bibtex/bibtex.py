@@ -0,0 +1,185 @@
+import os
+import re
+import io
+import json
+import argparse
+from typing import Dict, Iterable, Optional, Set
+from pdf2bibtex.core import ArxivPaper, TRAIN_DATA_PATH
+
+"""
+    Bulk BibTeX export.
+
+    BibtexWriter streams ArxivPapers into a .bib file one entry at a time
+    (through a buffered file, written under a temporary name and renamed into
+    place on close), so memory only grows with the key and id indexes:
+
+        - citation keys are made unique with a/b/c... suffixes
+          (Smith2019, Smith2019a, Smith2019b, ..., Smith2019z, Smith2019aa),
+        - papers are deduplicated on their arXiv id without version
+          (2101.00001v2 == 2101.00001), the first occurrence wins,
+        - field values are LaTeX-escaped (see latex_escape).
+
+    ArxivPaper.generate_bibtex_entry() keeps its historical output.
+"""
+
+_VERSION_SUFFIX = re.compile(r"v\d+$")
+# Specials that are never intended literally in arXiv metadata, unless already escaped
+_UNESCAPED_SPECIAL = re.compile(r"(?<!\\)([&%#_])")
+_MATH = re.compile(r"(?<!\\)\$.*?(?<!\\)\$")
+_LONE_DOLLAR = re.compile(r"(?<!\\)\$")
+_UNESCAPED_BRACE = re.compile(r"(?<!\\)([{}])")
+# Fast path: most fields contain none of these and are returned as they are
+_NEEDS_ESCAPE = re.compile(r"[&%#_${}]")
+
+
+def normalize_arxiv_id(arxiv_id) -> str:
+    """Dedupe key of an arXiv id: no 'arXiv:' prefix, no version suffix."""
+    arxiv_id = str(arxiv_id).strip()
+    if arxiv_id.lower().startswith("arxiv:"):
+        arxiv_id = arxiv_id[6:]
+    return _VERSION_SUFFIX.sub("", arxiv_id)
+
+
+def _braces_balanced(text: str) -> bool:
+    depth = 0
+    for i, ch in enumerate(text):
+        if i and text[i - 1] == "\\":
+            continue
+        if ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth < 0:
+                return False
+    return depth == 0
+
+
+def latex_escape(text) -> str:
+    """
+    Escapes a metadata field for a BibTeX value. arXiv titles/authors are
+    LaTeX source, so math ($...$), accents and commands are kept; unescaped
+    & % # _ outside math are escaped, and braces are escaped only if they are
+    unbalanced (which would otherwise break the .bib file).
+    """
+    text = " ".join(str(text).split())
+    if not _NEEDS_ESCAPE.search(text):
+        return text
+    parts, last = [], 0
+    for m in _MATH.finditer(text):
+        parts.append(_UNESCAPED_SPECIAL.sub(r"\\\1", text[last:m.start()]))
+        parts.append(m.group(0))
+        last = m.end()
+    # A lone '$' left after the math spans would open math mode for the rest of the entry
+    rest = _UNESCAPED_SPECIAL.sub(r"\\\1", text[last:])
+    parts.append(_LONE_DOLLAR.sub(r"\\$", rest))
+    text = "".join(parts)
+    if ("{" in text or "}" in text) and not _braces_balanced(text):
+        text = _UNESCAPED_BRACE.sub(r"\\\1", text)
+    return text
+
+
+def key_suffix(n: int) -> str:
+    """0 -> '', 1 -> 'a', ..., 26 -> 'z', 27 -> 'aa', ..."""
+    suffix = ""
+    while n > 0:
+        n, rem = divmod(n - 1, 26)
+        suffix = chr(ord('a') + rem) + suffix
+    return suffix
+
+
+def format_entry(paper: ArxivPaper, key: str) -> str:
+    """One @article entry with the same fields as generate_bibtex_entry, escaped."""
+    venue = paper.journal_ref if paper.journal_ref else f"arXiv preprint arXiv:{paper.id}"
+    fields = [("author", paper.authors), ("title", paper.title), ("journal", venue),
+              ("year", paper.year), ("note", f"arXiv:{paper.id}")]
+    body = ",\n".join(f"  {name} = {{{latex_escape(value)}}}" for name, value in fields if value is not None)
+    return f"@article{{{key},\n{body}\n}}\n"
+
+
+class BibtexWriter:
+    """
+    Streams deduplicated, uniquely keyed entries into a .bib file.
+
+    :param path: output .bib file (written to path + ".tmp", renamed on close)
+    :param buffer_size: write buffer size in bytes
+    """
+
+    def __init__(self, path: str, buffer_size: int = 1 << 20):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self._file = io.open(self.tmp_path, 'w', encoding='utf-8', buffering=buffer_size)
+        self.used_keys: Set[str] = set()
+        self._next_suffix: Dict[str, int] = {}
+        self.keys_by_id: Dict[str, str] = {}
+        self.written = 0
+        self.duplicates = 0
+
+    def unique_key(self, base: str) -> str:
+        n = self._next_suffix.get(base, 0)
+        key = base + key_suffix(n)
+        while key in self.used_keys:
+            n += 1
+            key = base + key_suffix(n)
+        self._next_suffix[base] = n + 1
+        self.used_keys.add(key)
+        return key
+
+    def add(self, paper: ArxivPaper) -> str:
+        """Writes the paper (unless its arXiv id was already written) and returns its key."""
+        paper_id = normalize_arxiv_id(paper.id)
+        if paper_id in self.keys_by_id:
+            self.duplicates += 1
+            return self.keys_by_id[paper_id]
+        key = self.unique_key(paper.citation_key())
+        self.keys_by_id[paper_id] = key
+        if self.written:
+            self._file.write("\n")
+        self._file.write(format_entry(paper, key))
+        self.written += 1
+        return key
+
+    def add_all(self, papers: Iterable[ArxivPaper]):
+        for paper in papers:
+            self.add(paper)
+
+    def close(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def stats(self) -> dict:
+        return {'written': self.written, 'duplicates': self.duplicates}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            if os.path.exists(self.tmp_path):
+                os.remove(self.tmp_path)
+
+
+def export_jsonl(metadata_path: str, bib_path: str, limit: Optional[int] = None) -> dict:
+    """Streams a metadata JSONL (one paper per line) into a .bib file."""
+    with BibtexWriter(bib_path) as writer, open(metadata_path, 'r') as f:
+        for i, line in enumerate(f):
+            if limit is not None and i >= limit:
+                break
+            if line.strip():
+                writer.add(ArxivPaper.from_dict(json.loads(line)))
+    return writer.stats()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Export the gold-standard metadata as a .bib file.")
+    arg_parser.add_argument("--metadata", default=TRAIN_DATA_PATH, help="Metadata JSONL")
+    arg_parser.add_argument("--out", required=True, help="Output .bib file")
+    arg_parser.add_argument("--limit", type=int, default=None, help="Only export the first N rows")
+    args = arg_parser.parse_args()
+
+    stats = export_jsonl(args.metadata, args.out, args.limit)
+    print(f"Wrote {stats['written']} entries to {args.out} ({stats['duplicates']} duplicates skipped)")
@@ -0,0 +1,254 @@
+import os
+import sys
+import queue
+import argparse
+import threading
+
+# The stage scripts (parser.py, data_builder.py, ...) live next to this package in src/
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pdf2bibtex import metrics
+from pdf2bibtex.core import TRAIN_DATA_PATH
+from pdf2bibtex.dataset_io import FORMAT_EXTENSIONS
+from pdf2bibtex.title_index import DEFAULT_THRESHOLD
+from extraction_cache import DEFAULT_CACHE_PATH
+
+"""
+    Single entry point for the pipeline stages:
+
+        python -m pdf2bibtex sample    select the gold-standard subset of the arXiv snapshot (parser.py)
+        python -m pdf2bibtex download  fetch its PDFs (pdf_downloader.py)
+        python -m pdf2bibtex enrich    add the BibTeX column (enrich_data.py)
+        python -m pdf2bibtex build     extract + label the training set (data_builder.py)
+        python -m pdf2bibtex train     train the title classifier (train_model_random_forest.py)
+        python -m pdf2bibtex predict   predict the titles of PDFs (predict_random_forest.py)
+        python -m pdf2bibtex convert   PDFs (directory or tar/zip archive) -> .bib (convert.py)
+        python -m pdf2bibtex run       download -> extract -> label as one streaming pipeline
+
+    Run from src/, or with src/ on PYTHONPATH. Stage modules are imported
+    lazily, so e.g. `predict` with a compact model never loads scikit-learn.
+"""
+
+# Marks the end of the stream on the download -> extract queue
+_DONE = object()
+
+
+def _iter_queue(q: queue.Queue):
+    while True:
+        item = q.get()
+        if item is _DONE:
+            return
+        yield item
+
+
+@metrics.entry_point("run")
+def run_pipeline(download_workers: int = 4, rate: float = 1 / 3, burst: int = 1, max_rounds: int = 3,
+                 base_url=None, workers: int = 1, queue_size: int = 64, formats=("parquet",),
+                 cache_path=None, train: bool = False) -> dict:
+    """
+    Refreshes the training set in one pass: a downloader thread feeds every PDF
+    (already on disk or freshly fetched) into a bounded queue, and the
+    extraction pool extracts and labels new or changed PDFs while the
+    downloads are still going. A full queue blocks the downloader's
+    bookkeeping, never the downloads themselves; the pool holds at most
+    2 * workers PDFs. The output is then re-assembled from the parts (and
+    the model retrained if train is set).
+
+    :param download_workers: concurrent download threads
+    :param workers: extraction processes
+    :param queue_size: downloaded PDFs waiting for extraction
+    """
+    from pdf_downloader import download_papers_concurrent, ARXIV_PDF_URL
+    from data_builder import extract_stream, build_training_data
+
+    downloaded = queue.Queue(maxsize=queue_size)
+    failures = []
+
+    def download():
+        try:
+            download_papers_concurrent(workers=download_workers, rate=rate, burst=burst, max_rounds=max_rounds,
+                                       base_url=base_url or ARXIV_PDF_URL,
+                                       on_file=lambda paper_id, path: downloaded.put(os.path.basename(path)))
+        except BaseException as e:
+            failures.append(e)
+        finally:
+            downloaded.put(_DONE)
+
+    # Daemon: if extraction fails, a downloader blocked on the full queue must not keep us alive
+    downloader = threading.Thread(target=download, name="download", daemon=True)
+    downloader.start()
+    stats = extract_stream(_iter_queue(downloaded), workers=workers, cache_path=cache_path)
+    downloader.join()
+    if failures:
+        raise failures[0]
+    print(f"Streamed extraction: {stats}")
+
+    build_training_data(workers=workers, formats=formats, cache_path=cache_path)
+    if train:
+        from pdf2bibtex.train_model_random_forest import train_title_classifier
+        stats['train'] = train_title_classifier()
+    return stats
+
+
+def _iter_pdf_paths(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in sorted(os.walk(path)):
+                for name in sorted(files):
+                    if name.lower().endswith(".pdf"):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+# --------------- Subcommands --------------- #
+
+def cmd_sample(args):
+    from parser import sample_gold_standard, SNAPSHOT_PATH
+    sample_gold_standard(workers=args.workers, index_dir=args.index, samples_per_cat=args.samples_per_cat,
+                         snapshot_path=args.snapshot or SNAPSHOT_PATH, out_path=args.out or TRAIN_DATA_PATH)
+
+
+def cmd_download(args):
+    from pdf_downloader import download_papers, download_papers_concurrent, ARXIV_PDF_URL
+    if args.workers <= 1:
+        download_papers()
+    else:
+        download_papers_concurrent(workers=args.workers, rate=args.rate, burst=args.burst,
+                                   max_rounds=args.rounds, base_url=args.base_url or ARXIV_PDF_URL)
+
+
+def cmd_enrich(args):
+    from enrich_data import enrich_gold_standard
+    enrich_gold_standard(workers=args.workers, chunk_size=args.chunk_size)
+
+
+def cmd_build(args):
+    from data_builder import build_training_data
+    build_training_data(workers=args.workers, full=args.full, formats=args.format, cache_path=args.cache)
+
+
+def cmd_train(args):
+    from pdf2bibtex.train_model_random_forest import train_title_classifier
+    train_title_classifier(args.data, args.model, args.n_jobs, args.other_ratio, args.out,
+                           compact=not args.no_compact)
+
+
+def cmd_predict(args):
+    from predict_random_forest import TitlePredictor, PredictionFailed, default_model_path
+    predictor = TitlePredictor(args.model or default_model_path(), cache_path=args.cache)
+    pdf_paths = list(_iter_pdf_paths(args.pdfs))
+    for path, title in zip(pdf_paths, predictor.predict_titles(pdf_paths, workers=args.workers)):
+        if isinstance(title, PredictionFailed):
+            print(f"{path}\tERROR: {title}", file=sys.stderr)
+        else:
+            print(f"{path}\t{title}")
+    metrics.dump()
+
+
+def cmd_convert(args):
+    from convert import convert
+    convert(args.source, args.out, args.report, args.model, args.metadata or TRAIN_DATA_PATH, args.workers,
+            min_confidence=args.min_confidence, min_score=args.min_score, cache_path=args.cache)
+
+
+def cmd_run(args):
+    run_pipeline(download_workers=args.download_workers, rate=args.rate, burst=args.burst, max_rounds=args.rounds,
+                 base_url=args.base_url, workers=args.workers, queue_size=args.queue_size, formats=args.format,
+                 cache_path=args.cache, train=args.train)
+
+
+def _add_download_arguments(parser):
+    parser.add_argument("--rate", type=float, default=1 / 3,
+                        help="Average requests per second (default: one every 3 seconds)")
+    parser.add_argument("--burst", type=int, default=1, help="Token bucket burst size")
+    parser.add_argument("--rounds", type=int, default=3, help="Retry rounds for throttled ids")
+    parser.add_argument("--base-url", default=None, help="PDF server base URL (default: arxiv.org)")
+
+
+def _add_build_arguments(parser):
+    parser.add_argument("--workers", type=int, default=1, help="Extraction processes (default: 1)")
+    parser.add_argument("--format", nargs="+", choices=list(FORMAT_EXTENSIONS), default=["parquet"],
+                        help="Training set format(s) (default: parquet)")
+    parser.add_argument("--cache", nargs="?", const=DEFAULT_CACHE_PATH, default=None, metavar="PATH",
+                        help="Use the on-disk extraction cache (default location if no PATH is given)")
+
+
+def make_parser() -> argparse.ArgumentParser:
+    arg_parser = argparse.ArgumentParser(prog="pdf2bibtex", description="PDF to BibTeX pipeline.")
+    subparsers = arg_parser.add_subparsers(dest="command", required=True)
+
+    p = subparsers.add_parser("sample", help="Sample the gold-standard subset of the arXiv snapshot")
+    p.add_argument("--workers", type=int, default=1, help="Processes for the parallel sampler")
+    p.add_argument("--index", metavar="DIR", help="Sample from a columnar snapshot index in DIR")
+    p.add_argument("--samples-per-cat", type=int, default=1000, help="Papers per arXiv section")
+    p.add_argument("--snapshot", help="arXiv metadata snapshot (default: data/raw/arxiv-metadata-oai-snapshot.json)")
+    p.add_argument("--out", help="Output JSONL (default: the gold-standard path in core.py)")
+    p.set_defaults(func=cmd_sample)
+
+    p = subparsers.add_parser("download", help="Download the PDFs of the gold-standard set")
+    p.add_argument("--workers", type=int, default=1,
+                   help="Concurrent download threads; 1 uses the original serial downloader")
+    _add_download_arguments(p)
+    p.set_defaults(func=cmd_download)
+
+    p = subparsers.add_parser("enrich", help="Add the bibtex column to the gold-standard set")
+    p.add_argument("--workers", type=int, default=1, help="Processes for JSONL enrichment")
+    p.add_argument("--chunk-size", type=int, default=5000, help="Rows per chunk")
+    p.set_defaults(func=cmd_enrich)
+
+    p = subparsers.add_parser("build", help="Build the line-level training set from the PDFs")
+    _add_build_arguments(p)
+    p.add_argument("--full", action="store_true", help="Ignore the manifest and re-extract every PDF")
+    p.set_defaults(func=cmd_build)
+
+    p = subparsers.add_parser("train", help="Train the title classifier")
+    p.add_argument("--data", help="Training set (default: the fastest one on disk)")
+    p.add_argument("--model", choices=["hgb", "rf"], default="rf", help="rf or hgb (HistGradientBoosting)")
+    p.add_argument("--n-jobs", type=int, default=-1, help="Cores for the Random Forest (-1: all)")
+    p.add_argument("--other-ratio", type=float, default=None,
+                   help="Subsample OTHER lines to this many per TITLE line in the training split")
+    p.add_argument("--out", help="Model file (default: models/title_classifier_<model>.joblib)")
+    p.add_argument("--no-compact", action="store_true", help="Do not export the compact .npz model")
+    p.set_defaults(func=cmd_train)
+
+    p = subparsers.add_parser("predict", help="Predict the titles of PDFs")
+    p.add_argument("pdfs", nargs="+", help="PDF files or directories (searched recursively)")
+    p.add_argument("--model", help="Model file (default: the compact .npz export if present)")
+    p.add_argument("--workers", type=int, default=1, help="Extraction processes")
+    p.add_argument("--cache", nargs="?", const=DEFAULT_CACHE_PATH, default=None, metavar="PATH",
+                   help="Use the on-disk extraction cache")
+    p.set_defaults(func=cmd_predict)
+
+    p = subparsers.add_parser("convert", help="Convert a directory or tar/zip archive of PDFs into a .bib file")
+    p.add_argument("source", help="Directory (searched recursively), PDF, or .tar[.gz|.bz2|.xz]/.zip archive")
+    p.add_argument("--out", required=True, help="Output .bib file")
+    p.add_argument("--report", help="JSONL report of confidences and failures (default: next to --out)")
+    p.add_argument("--model", help="Model file (default: the compact .npz export if present)")
+    p.add_argument("--metadata", help="Metadata JSONL to match titles against (default: the gold-standard set)")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    p.add_argument("--min-confidence", type=float, default=0.0,
+                   help="Leave predictions below this confidence unmatched")
+    p.add_argument("--min-score", type=float, default=DEFAULT_THRESHOLD,
+                   help="Minimum title similarity (trigram Dice, 0-1) of a metadata match")
+    p.add_argument("--cache", nargs="?", const=DEFAULT_CACHE_PATH, default=None, metavar="PATH",
+                   help="Use the on-disk extraction cache")
+    p.set_defaults(func=cmd_convert)
+
+    p = subparsers.add_parser("run", help="Download -> extract -> label as one streaming pipeline")
+    p.add_argument("--download-workers", type=int, default=4, help="Concurrent download threads")
+    _add_download_arguments(p)
+    _add_build_arguments(p)
+    p.add_argument("--queue-size", type=int, default=64, help="Downloaded PDFs waiting for extraction")
+    p.add_argument("--train", action="store_true", help="Also retrain the title classifier")
+    p.set_defaults(func=cmd_run)
+    return arg_parser
+
+
+def main(argv=None):
+    args = make_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
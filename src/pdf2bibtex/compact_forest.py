@@ -0,0 +1,166 @@
+import json
+import numpy as np
+
+"""
+    Compact, scikit-learn-free inference for the title classifier.
+
+    A trained RandomForestClassifier or HistGradientBoostingClassifier is
+    compiled into flat NumPy arrays (one row per node, all trees back to back)
+    and saved as a small .npz:
+
+        feature    int8    split feature (0 for leaves)
+        threshold  float32 go left if x[feature] <= threshold (+inf for leaves)
+        left/right int32   child node ids (leaves point to themselves)
+        value      float32 leaf output: P(TITLE) for forests, raw score for boosting
+        roots      int32   root node id of every tree
+
+    Scoring walks every (sample, tree) pair down its tree in vectorized rounds
+    of gathers, dropping pairs as they reach a leaf, with no per-node branching
+    in Python. Loading needs only NumPy.
+"""
+
+# How the per-tree leaf values are combined
+KIND_MEAN = "mean"              # random forest: average of leaf probabilities
+KIND_SUM_SIGMOID = "sum_sigmoid"  # gradient boosting: sigmoid(baseline + sum of leaf scores)
+
+
+def _round_down_float32(threshold: np.ndarray) -> np.ndarray:
+    """
+    float32 thresholds that split float32 inputs exactly like the float64 ones
+    (x <= t64 <=> x <= largest float32 not above t64).
+    """
+    t32 = threshold.astype(np.float32)
+    too_high = t32.astype(np.float64) > threshold
+    t32[too_high] = np.nextafter(t32[too_high], np.float32(-np.inf))
+    return t32
+
+
+class CompactForest:
+    def __init__(self, feature, threshold, left, right, value, roots,
+                 kind: str = KIND_MEAN, baseline: float = 0.0, n_features: int = 0):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.kind = kind
+        self.baseline = baseline
+        self.n_features = n_features
+        self.is_leaf = left == np.arange(len(left))
+        # Lookup tables for predict_proba: child of node i is _children[2 * i + went_left]
+        self._children = np.stack([right, left], axis=1).ravel().astype(np.int64)
+        self._feature = feature.astype(np.int64)
+
+    def __len__(self):
+        return len(self.roots)
+
+    # --------------- Export --------------- #
+
+    @classmethod
+    def _from_trees(cls, trees, kind: str, baseline: float, n_features: int) -> "CompactForest":
+        """trees: list of (feature, threshold, left, right, value, is_leaf) arrays, node ids local to the tree."""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for feature, threshold, left, right, value, is_leaf in trees:
+            n = len(feature)
+            node_ids = np.arange(n, dtype=np.int64) + offset
+            features.append(np.where(is_leaf, 0, feature).astype(np.int8))
+            thresholds.append(np.where(is_leaf, np.inf, _round_down_float32(np.asarray(threshold, dtype=np.float64))))
+            lefts.append(np.where(is_leaf, node_ids, left + offset).astype(np.int32))
+            rights.append(np.where(is_leaf, node_ids, right + offset).astype(np.int32))
+            values.append(np.where(is_leaf, value, 0.0).astype(np.float32))
+            roots.append(offset)
+            offset += n
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds).astype(np.float32),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.array(roots, dtype=np.int32),
+            kind=kind, baseline=baseline, n_features=n_features,
+        )
+
+    @classmethod
+    def from_sklearn(cls, model) -> "CompactForest":
+        """Compiles a fitted binary RandomForestClassifier or HistGradientBoostingClassifier."""
+        n_features = int(model.n_features_in_)
+        if hasattr(model, "estimators_"):
+            trees = []
+            for estimator in model.estimators_:
+                t = estimator.tree_
+                counts = t.value[:, 0, :]
+                # Leaf probability of class 1, as DecisionTreeClassifier.predict_proba computes it
+                value = counts[:, 1] / counts.sum(axis=1)
+                trees.append((t.feature, t.threshold, t.children_left, t.children_right, value,
+                              t.children_left == -1))
+            return cls._from_trees(trees, KIND_MEAN, 0.0, n_features)
+
+        if hasattr(model, "_predictors"):
+            if model.n_trees_per_iteration_ != 1:
+                raise ValueError("Only binary gradient boosting models can be exported")
+            trees = []
+            for (predictor,) in model._predictors:
+                nodes = predictor.nodes
+                is_leaf = nodes['is_leaf'].astype(bool)
+                trees.append((nodes['feature_idx'], nodes['num_threshold'], nodes['left'].astype(np.int64),
+                              nodes['right'].astype(np.int64), nodes['value'], is_leaf))
+            baseline = float(np.ravel(model._baseline_prediction)[0])
+            return cls._from_trees(trees, KIND_SUM_SIGMOID, baseline, n_features)
+
+        raise TypeError(f"Cannot export {type(model).__name__}")
+
+    # --------------- Inference --------------- #
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Same shape and meaning as sklearn's predict_proba: columns P(OTHER), P(TITLE)."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n, n_trees = len(X), len(self.roots)
+        x_flat = X.ravel()
+        # One walker per (sample, tree); walkers are dropped once they reach a leaf
+        nodes = np.tile(self.roots.astype(np.int64), n)
+        x_base = np.repeat(np.arange(n, dtype=np.int64) * X.shape[1], n_trees)
+        active = np.arange(n * n_trees)
+        current = nodes.copy()
+        while len(active):
+            go_left = x_flat[x_base + self._feature[current]] <= self.threshold[current]
+            current = self._children[2 * current + go_left]
+            keep = ~self.is_leaf[current]
+            if not keep.all():
+                nodes[active] = current
+                active, current, x_base = active[keep], current[keep], x_base[keep]
+        nodes = nodes.reshape(n, n_trees)
+        leaf_values = self.value[nodes].astype(np.float64)
+
+        if self.kind == KIND_MEAN:
+            p = leaf_values.mean(axis=1)
+        else:
+            p = 1.0 / (1.0 + np.exp(-(self.baseline + leaf_values.sum(axis=1))))
+        return np.column_stack([1.0 - p, p])
+
+    # --------------- Persistence --------------- #
+
+    def save(self, path: str):
+        meta = {'kind': self.kind, 'baseline': self.baseline,
+                'n_features': self.n_features}
+        with open(path, 'wb') as f:
+            np.savez(f, feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+                     value=self.value, roots=self.roots, meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8))
+
+    @classmethod
+    def load(cls, path: str) -> "CompactForest":
+        with np.load(path) as data:
+            meta = json.loads(data['meta'].tobytes().decode())
+            return cls(feature=data['feature'], threshold=data['threshold'], left=data['left'],
+                       right=data['right'], value=data['value'], roots=data['roots'], **meta)
+
+
+def check_parity(model, compact: CompactForest, X, atol: float = 1e-6) -> float:
+    """Max |P_sklearn - P_compact| over X; raises if it exceeds atol."""
+    expected = model.predict_proba(X)[:, 1]
+    actual = compact.predict_proba(np.asarray(X, dtype=np.float32))[:, 1]
+    diff = float(np.max(np.abs(expected - actual))) if len(expected) else 0.0
+    if diff > atol:
+        raise ValueError(f"Compact model differs from the sklearn model by {diff:.3g} (> {atol})")
+    return diff
@@ -1,12 +1,13 @@
+import os
+import sys
 import random
-import numpy as np
-import torch
+import unicodedata
 from dataclasses import dataclass
 from typing import List, Optional
-import pandas as pd 
-import os
-
 
+# This module only imports the standard library: the schemas and path
+# constants are used by almost every script, so they must stay cheap to
+# import. Heavy libraries (numpy, torch, pandas) are never imported here.
 
 
 # --------------- Configuration Constants --------------- #
@@ -23,18 +24,44 @@ TRAIN_DATA_PATH = os.path.join(BASE_DIR, "data", "processed", "arXiv_v1_06-02-20
 
 # --------------- Utility Functions --------------- #
 
+def year_from_arxiv_id(arxiv_id: str) -> Optional[int]:
+    """
+    Submission year encoded in an arXiv id: YYMM.NNNNN (April 2007 on) or the
+    old archive/YYMMNNN scheme (1991-2007). None if the id has neither form.
+    """
+    number = arxiv_id.rsplit('/', 1)[-1]
+    if len(number) < 4 or not number[:4].isdigit():
+        return None
+    yy = int(number[:2])
+    return (1900 if yy >= 91 else 2000) + yy
+
 # Sets the random seed for reproducibility across various libraries
 def set_seed(seed=42):
-    """Sets all seeds for reproducibility."""
+    """
+    Sets all seeds for reproducibility.
+
+    numpy and torch are only seeded if they have already been imported, so
+    calling this never pulls them in. Call set_seed after importing them.
+    """
     random.seed(seed)
-    np.random.seed(seed)
-    torch.manual_seed(seed)
-    torch.cuda.manual_seed_all(seed)
-    # Ensure deterministic behavior in CuDNN
-    torch.backends.cudnn.deterministic = True
-    torch.backends.cudnn.benchmark = False
+
+    np = sys.modules.get("numpy")
+    if np is not None:
+        np.random.seed(seed)
+
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.manual_seed(seed)
+        torch.cuda.manual_seed_all(seed)
+        # Ensure deterministic behavior in CuDNN
+        torch.backends.cudnn.deterministic = True
+        torch.backends.cudnn.benchmark = False
     print(f"Global seed set to: {seed}")
 
+def normalize_for_matching(text: str) -> str:
+    """NFKC-folded, lowercased, alphanumerics only (title matching and labeling)."""
+    return "".join(ch for ch in unicodedata.normalize("NFKC", text).lower() if ch.isalnum())
+
 
 
 
@@ -64,19 +91,26 @@ class ArxivPaper:
 
     @classmethod
     def from_dict(cls, data: dict):
-        # Maps the JSON keys to our class fields
+        # Maps the JSON keys to our class fields. Gold-standard records (parser.py)
+        # carry 'section' and 'year'; raw arXiv snapshot records do not, so those
+        # fall back to the first category and to the year encoded in the id.
+        year = data.get('year')
+        if year is None:
+            year = year_from_arxiv_id(str(data['id']))
+        if year is None and data.get('update_date'):
+            year = str(data['update_date'])[:4]
+        categories = str(data.get('categories') or "").split()
         return cls(
             id=data['id'],
             title=data['title'],
-            abstract=data['abstract'],
-            section=data['section'],
-            year=int(data['year']),
+            abstract=data.get('abstract', ""),
+            section=data.get('section') or (categories[0] if categories else ""),
+            year=int(year) if year is not None else None,
             authors=data['authors'],
             journal_ref=data.get('journal-ref')
         )
-    def generate_bibtex_entry(self) -> str:
-        """Generates a simple BibTeX entry for the paper."""
-        
+    def citation_key(self) -> str:
+        """Base citation key, e.g. Einstein1935 (not unique; see pdf2bibtex.bibtex.BibtexWriter)."""
         # 1. Extract the Last Name of the first author safely
         try:
             # Get the first author's full name chunk
@@ -88,18 +122,24 @@ class ArxivPaper:
         except (IndexError, AttributeError):
             clean_name = "Unknown"
 
-        # 2. Build the citation key (e.g., Einstein1935)
-        cite_key = f"{clean_name}{self.year}"
+        # 2. Build the citation key (e.g., Einstein1935; just the name if the year is unknown)
+        return f"{clean_name}{self.year if self.year is not None else ''}"
+
+    def generate_bibtex_entry(self) -> str:
+        """Generates a simple BibTeX entry for the paper."""
+        cite_key = self.citation_key()
 
         # Use journal_ref if available, otherwise fallback to arXiv preprint
         venue = self.journal_ref if self.journal_ref else f"arXiv preprint arXiv:{self.id}"
         
+        # The year field is left out when it is unknown
+        year = f"  year = {{{self.year}}},\n" if self.year is not None else ""
         bib = (
             f"@article{{{cite_key},\n"
             f"  author = {{{self.authors}}},\n"
             f"  title = {{{self.title}}},\n"
             f"  journal = {{{venue}}},\n"
-            f"  year = {{{self.year}}},\n"
+            f"{year}"
             f"  note = {{arXiv:{self.id}}}\n"
             f"}}"
         )
@@ -108,7 +148,7 @@ class ArxivPaper:
 
 
 
-@dataclass
+@dataclass(slots=True) # __slots__: no per-instance __dict__, we create hundreds of thousands of these
 class PDFLine:
     """A single line extracted from a PDF to be classified by the model."""
     text: str
@@ -117,4 +157,5 @@ class PDFLine:
     y_position: float     # Normalized vertical position (0.0 to 1.0)
     font_size: float
     is_bold: bool
-    label: Optional[str] = None  # TITLE, AUTHOR, VENUE, YEAR, or OTHER
\ No newline at end of file
+    label: Optional[str] = None  # TITLE, AUTHOR, VENUE, YEAR, or OTHER
+    label_confidence: Optional[float] = None  # Labeler score in [0, 1]
\ No newline at end of file
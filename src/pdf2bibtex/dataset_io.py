@@ -0,0 +1,218 @@
+import os
+import json
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+from pdf2bibtex.core import BASE_DIR
+from pdf2bibtex.line_batch import PDFLineBatch, FEATURE_COLUMNS, LABELS
+
+"""
+    Reading and writing the line-level training set.
+
+    The primary format is Parquet (typed columns, written in row groups while
+    the build streams through its parts, read back memory-mapped). Arrow IPC
+    (.arrow) is offered for the fastest zero-copy reads; JSONL and the bulk
+    .npz PDFLineBatch remain available as export formats. Every reader picks
+    the format from the file extension.
+"""
+
+# data/processed/training_set_v1.<ext>
+TRAINING_SET_BASE = os.path.join(BASE_DIR, "data", "processed", "training_set_v1")
+FORMAT_EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow", "npz": ".npz", "jsonl": ".jsonl"}
+# Formats written by the last build (see record_build_formats)
+BUILD_FORMATS_PATH = TRAINING_SET_BASE + ".formats.json"
+
+SCHEMA = pa.schema([
+    ("text", pa.large_string()),
+    ("page_number", pa.int32()),
+    ("line_index", pa.int32()),
+    ("y_position", pa.float64()),
+    ("font_size", pa.float64()),
+    ("is_bold", pa.bool_()),
+    ("label", pa.dictionary(pa.int8(), pa.string())),
+    ("label_confidence", pa.float32()),
+])
+
+
+def training_set_path(fmt: str = "parquet") -> str:
+    return TRAINING_SET_BASE + FORMAT_EXTENSIONS[fmt]
+
+
+def record_build_formats(formats):
+    """
+    Records the formats the last build wrote and removes the files of every other
+    format, so that no reader can pick up the output of an older build.
+    """
+    for fmt in FORMAT_EXTENSIONS:
+        if fmt not in formats and os.path.exists(training_set_path(fmt)):
+            os.remove(training_set_path(fmt))
+    with open(BUILD_FORMATS_PATH + ".tmp", 'w') as f:
+        json.dump(sorted(formats), f)
+    os.replace(BUILD_FORMATS_PATH + ".tmp", BUILD_FORMATS_PATH)
+
+
+def find_training_set() -> str:
+    """Path of the last build's training set, in the fastest format it was written in."""
+    built = list(FORMAT_EXTENSIONS)
+    if os.path.exists(BUILD_FORMATS_PATH):
+        with open(BUILD_FORMATS_PATH, 'r') as f:
+            built = json.load(f)
+    else:
+        # Built before the formats were recorded: the most recently written file is the current one
+        existing = [fmt for fmt in built if os.path.exists(training_set_path(fmt))]
+        if existing:
+            return training_set_path(max(existing, key=lambda fmt: os.path.getmtime(training_set_path(fmt))))
+    for fmt in ("parquet", "arrow", "npz", "jsonl"):
+        if fmt in built and os.path.exists(training_set_path(fmt)):
+            return training_set_path(fmt)
+    raise FileNotFoundError(f"No training set found at {TRAINING_SET_BASE}.*")
+
+
+def batch_to_record_batch(batch: PDFLineBatch) -> pa.RecordBatch:
+    """Zero-copy (for text and numeric columns) conversion of a PDFLineBatch."""
+    n = len(batch)
+    text = pa.LargeStringArray.from_buffers(
+        n, pa.py_buffer(np.ascontiguousarray(batch.text_offsets, dtype=np.int64)),
+        pa.py_buffer(np.ascontiguousarray(batch.text_bytes)))
+    label = pa.DictionaryArray.from_arrays(
+        pa.array(batch.label, type=pa.int8(), mask=batch.label < 0),
+        pa.array(LABELS, type=pa.string()))
+    return pa.RecordBatch.from_arrays([
+        text,
+        pa.array(batch.page_number, type=pa.int32()),
+        pa.array(batch.line_index, type=pa.int32()),
+        pa.array(batch.y_position, type=pa.float64()),
+        pa.array(batch.font_size, type=pa.float64()),
+        pa.array(batch.is_bold, type=pa.bool_()),
+        label,
+        pa.array(batch.label_confidence, type=pa.float32(), from_pandas=True),
+    ], schema=SCHEMA)
+
+
+class TrainingSetWriter:
+    """
+    Streams PDFLineBatches into a .parquet, .arrow or .jsonl file. Small batches
+    are buffered until row_group_size rows are available, so memory stays
+    bounded by one row group. The file is written under a temporary name and
+    renamed into place on close.
+    """
+
+    def __init__(self, path: str, row_group_size: int = 64 * 1024):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.row_group_size = row_group_size
+        self.pending: List[PDFLineBatch] = []
+        self.pending_rows = 0
+        self.rows = 0
+        if path.endswith(".parquet"):
+            self._writer = pq.ParquetWriter(self.tmp_path, SCHEMA)
+        elif path.endswith(".arrow"):
+            self._sink = pa.OSFile(self.tmp_path, 'wb')
+            self._writer = ipc.new_file(self._sink, SCHEMA)
+        elif path.endswith(".jsonl"):
+            self._writer = open(self.tmp_path, 'w')
+        else:
+            raise ValueError(f"Unsupported training set format: {path}")
+
+    def write(self, batch: PDFLineBatch):
+        if not len(batch):
+            return
+        self.pending.append(batch)
+        self.pending_rows += len(batch)
+        if self.pending_rows >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if not self.pending:
+            return
+        batch = PDFLineBatch.concat(self.pending)
+        self.pending, self.pending_rows = [], 0
+        self.rows += len(batch)
+        if self.path.endswith(".jsonl"):
+            for row in batch.rows():
+                self._writer.write(json.dumps(row) + "\n")
+        elif self.path.endswith(".parquet"):
+            self._writer.write_batch(batch_to_record_batch(batch), row_group_size=self.row_group_size)
+        else:
+            self._writer.write_batch(batch_to_record_batch(batch))
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+        if self.path.endswith(".arrow"):
+            self._sink.close()
+        os.replace(self.tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._writer.close()
+            if os.path.exists(self.tmp_path):
+                os.remove(self.tmp_path)
+
+
+def read_table(path: str, columns: Optional[List[str]] = None) -> pa.Table:
+    """Reads a .parquet/.arrow (memory-mapped) or .jsonl/.npz file into an Arrow table."""
+    if path.endswith(".parquet"):
+        return pq.read_table(path, columns=columns, memory_map=True)
+    if path.endswith(".arrow"):
+        table = ipc.open_file(pa.memory_map(path, 'r')).read_all()
+        return table.select(columns) if columns else table
+    if path.endswith(".npz"):
+        table = pa.Table.from_batches([batch_to_record_batch(PDFLineBatch.load(path))])
+        return table.select(columns) if columns else table
+    df = pd.read_json(path, lines=True)
+    return pa.Table.from_pandas(df[columns] if columns else df, preserve_index=False)
+
+
+def read_dataframe(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """pandas view of read_table (JSONL files are read with pandas directly)."""
+    if path.endswith(".jsonl"):
+        df = pd.read_json(path, lines=True)
+        return df[columns] if columns else df
+    table = read_table(path, columns)
+    # Decode dictionary-encoded columns (label) so the frame matches the JSONL one
+    for i, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(field.type.value_type))
+    return table.to_pandas()
+
+
+def write_dataframe(df: pd.DataFrame, path: str):
+    """Writes a DataFrame in the format given by the extension, atomically."""
+    tmp_path = path + ".tmp"
+    if path.endswith(".parquet"):
+        df.to_parquet(tmp_path, index=False)
+    elif path.endswith(".arrow"):
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            with ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    else:
+        df.to_json(tmp_path, orient='records', lines=True)
+    os.replace(tmp_path, path)
+
+
+def load_features(path: str):
+    """
+    Loads the classifier inputs as NumPy arrays: X (float32, FEATURE_COLUMNS order)
+    and y (1 for TITLE lines, 0 otherwise).
+    """
+    if path.endswith(".npz"):
+        batch = PDFLineBatch.load(path)
+        return batch.features(), (batch.label == LABELS.index("TITLE")).astype(np.int8)
+
+    table = read_table(path, FEATURE_COLUMNS + ["label"])
+    X = np.empty((table.num_rows, len(FEATURE_COLUMNS)), dtype=np.float32)
+    for j, name in enumerate(FEATURE_COLUMNS):
+        X[:, j] = table.column(name).to_numpy(zero_copy_only=False)
+    labels = table.column("label").to_pandas()
+    y = (labels == "TITLE").to_numpy().astype(np.int8)
+    return X, y
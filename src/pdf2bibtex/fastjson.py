@@ -0,0 +1,14 @@
+import json
+
+# orjson is optional: it parses the snapshot and metadata JSONL several times faster than json
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+"""
+    Shared JSON decoding for the line-by-line scans of the arXiv snapshot and
+    the metadata JSONL (parser, snapshot_index, metadata_index, title_index).
+    json_loads accepts str or bytes with either backend.
+"""
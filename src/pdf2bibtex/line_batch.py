@@ -0,0 +1,204 @@
+import io
+from array import array
+from typing import List, Optional
+import numpy as np
+from pdf2bibtex.core import PDFLine
+
+"""
+    Columnar storage for many PDFLines.
+
+    A list of 250k PDFLine objects costs one Python object (plus a str and
+    several floats) per line, and serializing it means one dict + json.dumps
+    per line. PDFLineBatch keeps the same fields as flat NumPy arrays plus one
+    UTF-8 text buffer with offsets, and is saved/loaded in bulk as .npz.
+"""
+
+# Label vocabulary; label codes index into this tuple (-1 means unlabeled)
+LABELS = ("OTHER", "TITLE", "AUTHOR", "VENUE", "YEAR")
+LABEL_CODES = {name: code for code, name in enumerate(LABELS)}
+
+# Column order of PDFLineBatch.features() (same as the classifier's training columns)
+FEATURE_COLUMNS = ['line_index', 'y_position', 'font_size', 'is_bold']
+
+
+class PDFLineBatchBuilder:
+    """Append-only builder (stdlib arrays) that PDFLoader fills line by line."""
+
+    def __init__(self):
+        self.page_number = array('i')
+        self.line_index = array('i')
+        self.y_position = array('d')
+        self.font_size = array('d')
+        self.is_bold = array('b')
+        self.text_offsets = array('q', [0])
+        self.text_parts = []
+        self._text_len = 0
+
+    def __len__(self):
+        return len(self.line_index)
+
+    def append(self, text: str, page_number: int, line_index: int,
+               y_position: float, font_size: float, is_bold: bool):
+        encoded = text.encode('utf-8')
+        self.text_parts.append(encoded)
+        self._text_len += len(encoded)
+        self.text_offsets.append(self._text_len)
+        self.page_number.append(page_number)
+        self.line_index.append(line_index)
+        self.y_position.append(y_position)
+        self.font_size.append(font_size)
+        self.is_bold.append(1 if is_bold else 0)
+
+    def build(self) -> "PDFLineBatch":
+        n = len(self)
+        return PDFLineBatch(
+            page_number=np.frombuffer(self.page_number, dtype=np.int32).copy(),
+            line_index=np.frombuffer(self.line_index, dtype=np.int32).copy(),
+            y_position=np.frombuffer(self.y_position, dtype=np.float64).copy(),
+            font_size=np.frombuffer(self.font_size, dtype=np.float64).copy(),
+            is_bold=np.frombuffer(self.is_bold, dtype=np.int8).astype(bool),
+            label=np.full(n, -1, dtype=np.int8),
+            label_confidence=np.full(n, np.nan, dtype=np.float32),
+            text_offsets=np.frombuffer(self.text_offsets, dtype=np.int64).copy(),
+            text_bytes=np.frombuffer(b"".join(self.text_parts), dtype=np.uint8).copy(),
+        )
+
+
+class PDFLineBatch:
+    """Column-oriented equivalent of List[PDFLine]."""
+
+    def __init__(self, page_number, line_index, y_position, font_size, is_bold,
+                 label, text_offsets, text_bytes, label_confidence=None):
+        self.page_number = page_number
+        self.line_index = line_index
+        self.y_position = y_position
+        self.font_size = font_size
+        self.is_bold = is_bold
+        self.label = label
+        # NaN where no labeler score is available (older parts, unlabeled lines)
+        if label_confidence is None:
+            label_confidence = np.full(len(line_index), np.nan, dtype=np.float32)
+        self.label_confidence = label_confidence
+        self.text_offsets = text_offsets
+        self.text_bytes = text_bytes
+
+    def __len__(self):
+        return len(self.line_index)
+
+    # --------------- Conversions --------------- #
+
+    @classmethod
+    def empty(cls) -> "PDFLineBatch":
+        return PDFLineBatchBuilder().build()
+
+    @classmethod
+    def from_lines(cls, lines: List[PDFLine]) -> "PDFLineBatch":
+        builder = PDFLineBatchBuilder()
+        for l in lines:
+            builder.append(l.text, l.page_number, l.line_index, l.y_position, l.font_size, l.is_bold)
+        batch = builder.build()
+        batch.set_labels([l.label for l in lines],
+                         [l.label_confidence for l in lines])
+        return batch
+
+    def text(self, i: int) -> str:
+        return bytes(self.text_bytes[self.text_offsets[i]:self.text_offsets[i + 1]]).decode('utf-8')
+
+    def texts(self) -> List[str]:
+        buffer = self.text_bytes.tobytes()
+        offsets = self.text_offsets.tolist()
+        return [buffer[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(self))]
+
+    def labels(self) -> List[Optional[str]]:
+        return [LABELS[c] if c >= 0 else None for c in self.label.tolist()]
+
+    def label_confidences(self) -> List[Optional[float]]:
+        return [None if c != c else c for c in self.label_confidence.tolist()]
+
+    def set_labels(self, labels, confidences=None):
+        self.label = np.array([LABEL_CODES[l] if l is not None else -1 for l in labels], dtype=np.int8)
+        if confidences is None:
+            self.label_confidence = np.full(len(self.label), np.nan, dtype=np.float32)
+        else:
+            self.label_confidence = np.array([np.nan if c is None else c for c in confidences], dtype=np.float32)
+
+    def to_lines(self) -> List[PDFLine]:
+        return [
+            PDFLine(text=t, page_number=p, line_index=i, y_position=y, font_size=f, is_bold=b, label=l,
+                    label_confidence=c)
+            for t, p, i, y, f, b, l, c in zip(self.texts(), self.page_number.tolist(), self.line_index.tolist(),
+                                              self.y_position.tolist(), self.font_size.tolist(),
+                                              self.is_bold.tolist(), self.labels(), self.label_confidences())
+        ]
+
+    def rows(self):
+        """Yields one dict per line, with the same keys as dataclasses.asdict(PDFLine)."""
+        for line in self.to_lines():
+            yield {
+                'text': line.text,
+                'page_number': line.page_number,
+                'line_index': line.line_index,
+                'y_position': line.y_position,
+                'font_size': line.font_size,
+                'is_bold': line.is_bold,
+                'label': line.label,
+                'label_confidence': line.label_confidence,
+            }
+
+    def features(self) -> np.ndarray:
+        """float32 feature matrix in FEATURE_COLUMNS order."""
+        X = np.empty((len(self), len(FEATURE_COLUMNS)), dtype=np.float32)
+        X[:, 0] = self.line_index
+        X[:, 1] = self.y_position
+        X[:, 2] = self.font_size
+        X[:, 3] = self.is_bold
+        return X
+
+    # --------------- Bulk operations --------------- #
+
+    @classmethod
+    def concat(cls, batches: List["PDFLineBatch"]) -> "PDFLineBatch":
+        batches = [b for b in batches if len(b)]
+        if not batches:
+            return cls.empty()
+        # Shift each batch's text offsets by the size of the text before it
+        text_sizes = np.array([len(b.text_bytes) for b in batches], dtype=np.int64)
+        shifts = np.concatenate([[0], np.cumsum(text_sizes)[:-1]])
+        text_offsets = np.concatenate(
+            [np.zeros(1, dtype=np.int64)] + [b.text_offsets[1:] + s for b, s in zip(batches, shifts)])
+        return cls(
+            page_number=np.concatenate([b.page_number for b in batches]),
+            line_index=np.concatenate([b.line_index for b in batches]),
+            y_position=np.concatenate([b.y_position for b in batches]),
+            font_size=np.concatenate([b.font_size for b in batches]),
+            is_bold=np.concatenate([b.is_bold for b in batches]),
+            label=np.concatenate([b.label for b in batches]),
+            label_confidence=np.concatenate([b.label_confidence for b in batches]),
+            text_offsets=text_offsets,
+            text_bytes=np.concatenate([b.text_bytes for b in batches]),
+        )
+
+    def save(self, path):
+        """Writes all columns to one uncompressed .npz file (path or file-like object)."""
+        if isinstance(path, str):
+            with open(path, 'wb') as f:
+                self.save(f)
+            return
+        np.savez(path, page_number=self.page_number, line_index=self.line_index,
+                 y_position=self.y_position, font_size=self.font_size, is_bold=self.is_bold,
+                 label=self.label, label_confidence=self.label_confidence, text_offsets=self.text_offsets, text_bytes=self.text_bytes)
+
+    @classmethod
+    def load(cls, path) -> "PDFLineBatch":
+        """Loads a batch written by save() (path or file-like object)."""
+        with np.load(path) as data:
+            return cls(**{name: data[name] for name in data.files})
+
+    def to_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        self.save(buffer)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "PDFLineBatch":
+        return cls.load(io.BytesIO(data))
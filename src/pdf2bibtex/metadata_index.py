@@ -0,0 +1,221 @@
+import os
+import json
+import zlib
+from array import array
+from typing import Optional
+import numpy as np
+from pdf2bibtex.fastjson import json_loads
+
+"""
+    On-disk id -> record index for the metadata JSONL (arXiv_v1_*.jsonl).
+
+    The JSONL is scanned once and the index is stored next to it in
+    `<metadata>.idx/` as plain NumPy arrays, opened memory-mapped:
+
+        ids.npy        arXiv ids (fixed-width bytes), sorted
+        offsets.npy    byte offset of each record in the JSONL (same order as ids)
+        lengths.npy    byte length of each record
+        slots.npy      open-addressing hash table (crc32, linear probing) of
+                       positions in ids.npy, -1 for empty slots
+
+    Exact lookups (prefix=False) go through the hash table (O(1)). Prefix
+    lookups keep get_true_title's original rule, the first record in file
+    order whose id starts with the given id (which is not always the exact
+    match: "2101.0001" also prefixes "2101.00015"); they use a binary search
+    on the sorted ids. An id that appears more than once resolves to its first
+    record in file order.
+
+    Only the requested record is read from the JSONL (os.pread), so nothing
+    but the index pages that are touched ends up in RAM. The index is rebuilt
+    when the JSONL's size or mtime changes.
+"""
+
+INDEX_VERSION = 1
+ID_WIDTH = 32
+
+
+def default_index_dir(metadata_path: str) -> str:
+    return metadata_path + ".idx"
+
+
+def _id_hash(id_bytes: bytes) -> int:
+    return zlib.crc32(id_bytes)
+
+
+def build_metadata_index(metadata_path: str, index_dir: Optional[str] = None):
+    """One-time scan of the metadata JSONL into the index directory."""
+    index_dir = index_dir or default_index_dir(metadata_path)
+    os.makedirs(index_dir, exist_ok=True)
+    meta_path = os.path.join(index_dir, "meta.json")
+    # meta.json is written last and marks a complete index
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    ids, offsets, lengths = [], array('q'), array('i')
+    with open(metadata_path, 'rb') as f:
+        pos = 0
+        for raw_line in f:
+            length = len(raw_line)
+            if raw_line.strip():
+                entry = json_loads(raw_line)
+                # Force the ID to a string (pandas may have written it as a float)
+                ids.append(str(entry.get('id', '')).encode('utf-8')[:ID_WIDTH])
+                offsets.append(pos)
+                lengths.append(length)
+            pos += length
+
+    ids = np.array(ids, dtype=f"S{ID_WIDTH}")
+    offsets = np.frombuffer(offsets, dtype=np.int64)
+    lengths = np.frombuffer(lengths, dtype=np.int32)
+    order = np.argsort(ids, kind='stable')  # duplicates keep file order
+    ids, offsets, lengths = ids[order], offsets[order], lengths[order]
+
+    # Hash table over the sorted positions; the first (file order) duplicate wins
+    n_slots = 1 << max(4, (2 * len(ids) - 1).bit_length())
+    slots = [-1] * n_slots
+    mask = n_slots - 1
+    id_list = ids.tolist()
+    for pos, id_bytes in enumerate(id_list):
+        slot = _id_hash(id_bytes) & mask
+        while slots[slot] >= 0:
+            if id_list[slots[slot]] == id_bytes:
+                break
+            slot = (slot + 1) & mask
+        else:
+            slots[slot] = pos
+    slots = np.array(slots, dtype=np.int64)
+
+    for name, values in (("ids", ids), ("offsets", offsets), ("lengths", lengths), ("slots", slots)):
+        tmp_path = os.path.join(index_dir, f"{name}.tmp.npy")
+        np.save(tmp_path, values)
+        os.replace(tmp_path, os.path.join(index_dir, f"{name}.npy"))
+
+    st = os.stat(metadata_path)
+    meta = {
+        'version': INDEX_VERSION,
+        'metadata_path': os.path.abspath(metadata_path),
+        'metadata_size': st.st_size,
+        'metadata_mtime_ns': st.st_mtime_ns,
+        'n_records': len(ids),
+    }
+    with open(meta_path + ".tmp", 'w') as f:
+        json.dump(meta, f)
+    os.replace(meta_path + ".tmp", meta_path)
+
+
+class MetadataIndex:
+    """Read-only, memory-mapped view of an index built by build_metadata_index."""
+
+    def __init__(self, index_dir: str):
+        with open(os.path.join(index_dir, "meta.json"), 'r') as f:
+            self.meta = json.load(f)
+        self.metadata_path = self.meta['metadata_path']
+
+        def load(name):
+            return np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode='r')
+
+        self.ids = load("ids")
+        self.offsets = load("offsets")
+        self.lengths = load("lengths")
+        self.slots = load("slots")
+        self._mask = len(self.slots) - 1
+        self._fd = os.open(self.metadata_path, os.O_RDONLY)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, arxiv_id) -> bool:
+        return self.find(arxiv_id, prefix=False) is not None
+
+    def is_stale(self) -> bool:
+        """True if the JSONL changed (or the index format did) since the index was built."""
+        if self.meta.get('version') != INDEX_VERSION or not os.path.exists(self.metadata_path):
+            return True
+        st = os.stat(self.metadata_path)
+        return (st.st_size, st.st_mtime_ns) != (self.meta['metadata_size'], self.meta['metadata_mtime_ns'])
+
+    def find(self, arxiv_id, prefix: bool = True) -> Optional[int]:
+        """
+        Position of arxiv_id in the index: with prefix, the first record in file
+        order whose id starts with arxiv_id (the exact id included, like the
+        original linear scan); without, the exact id only.
+        """
+        key = str(arxiv_id).encode('utf-8')[:ID_WIDTH]
+        if prefix:
+            return self._find_prefix(key)
+        slot = _id_hash(key) & self._mask
+        while True:
+            pos = int(self.slots[slot])
+            if pos < 0:
+                break
+            if self.ids[pos] == key:
+                return pos
+            slot = (slot + 1) & self._mask
+        return None
+
+    def _find_prefix(self, key: bytes) -> Optional[int]:
+        # All ids starting with key sort between key and key + 0xff...
+        upper = np.array(key + b"\xff" * (ID_WIDTH - len(key)), dtype=self.ids.dtype)
+        lo = int(np.searchsorted(self.ids, key, side='left'))
+        hi = int(np.searchsorted(self.ids, upper, side='right'))
+        if lo >= hi:
+            return None
+        return lo + int(np.argmin(self.offsets[lo:hi]))
+
+    def _read(self, pos: int) -> dict:
+        return json_loads(os.pread(self._fd, int(self.lengths[pos]), int(self.offsets[pos])))
+
+    def record(self, arxiv_id, prefix: bool = True) -> Optional[dict]:
+        """Full JSON record for arxiv_id, or None."""
+        pos = self.find(arxiv_id, prefix)
+        return None if pos is None else self._read(pos)
+
+    def title(self, arxiv_id, prefix: bool = True) -> Optional[str]:
+        """Whitespace-normalized title, or None."""
+        record = self.record(arxiv_id, prefix)
+        return None if record is None else " ".join(record['title'].split()).strip()
+
+    def authors(self, arxiv_id, prefix: bool = True) -> Optional[str]:
+        record = self.record(arxiv_id, prefix)
+        return None if record is None else record.get('authors')
+
+    def year(self, arxiv_id, prefix: bool = True) -> Optional[int]:
+        record = self.record(arxiv_id, prefix)
+        return None if record is None or record.get('year') is None else int(record['year'])
+
+    def close(self):
+        os.close(self._fd)
+        # Drop the memory maps (closed once garbage collected)
+        self.ids = self.offsets = self.lengths = self.slots = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def open_metadata_index(metadata_path: str, index_dir: Optional[str] = None) -> MetadataIndex:
+    """Opens the index, (re)building it first if it is missing or stale."""
+    index_dir = index_dir or default_index_dir(metadata_path)
+    if os.path.exists(os.path.join(index_dir, "meta.json")):
+        index = MetadataIndex(index_dir)
+        if not index.is_stale():
+            return index
+        index.close()
+    build_metadata_index(metadata_path, index_dir)
+    return MetadataIndex(index_dir)
+
+
+_open_indexes = {}
+
+
+def get_metadata_index(metadata_path: str) -> MetadataIndex:
+    """Per-process index for metadata_path (reopened if the JSONL changed)."""
+    key = (os.getpid(), os.path.abspath(metadata_path))
+    index = _open_indexes.get(key)
+    if index is None or index.is_stale():
+        if index is not None:
+            index.close()
+        index = _open_indexes[key] = open_metadata_index(metadata_path)
+    return index
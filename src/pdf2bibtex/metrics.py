@@ -0,0 +1,352 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import functools
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Optional
+
+"""
+    Lightweight stage timers and counters for the pipeline entry points.
+
+    Disabled by default: timer() then returns a shared no-op context manager
+    and count() returns immediately, so instrumented code pays one flag check.
+    Enable with the environment variable
+
+        PDF2BIBTEX_METRICS=1                 print a report when an entry point finishes
+        PDF2BIBTEX_METRICS=out/metrics.json  write JSON there instead
+        PDF2BIBTEX_METRICS=out/metrics.prom  write the Prometheus text format there
+
+    or call metrics.enable(). Optional profiling of a whole entry point:
+
+        PDF2BIBTEX_PROFILE=cprofile      -> <stage>.prof (pstats / snakeviz)
+        PDF2BIBTEX_PROFILE=pyinstrument  -> <stage>.html (if pyinstrument is installed)
+        PDF2BIBTEX_PROFILE_DIR=...       output directory (default: current directory)
+
+    Timers keep count/sum/min/max plus a bounded random sample of durations
+    for p50/p95/p99, so per-document timers stay small. Worker processes
+    collect their own metrics and send them back with drain(); the parent
+    merges them with merge().
+"""
+
+SAMPLE_SIZE = 4096
+
+
+class _Timer:
+    __slots__ = ("count", "total", "min", "max", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.samples = []
+
+    def add(self, seconds: float, rng: random.Random):
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        # Reservoir sample of the durations (for the percentiles)
+        if len(self.samples) < SAMPLE_SIZE:
+            self.samples.append(seconds)
+        else:
+            j = rng.randrange(self.count)
+            if j < SAMPLE_SIZE:
+                self.samples[j] = seconds
+
+    def summary(self) -> dict:
+        s = sorted(self.samples)
+
+        def pct(q):
+            return s[min(len(s) - 1, int(q * len(s)))] if s else None
+        return {'count': self.count, 'sum_s': self.total, 'min_s': self.min if self.count else None,
+                'max_s': self.max, 'p50_s': pct(0.50), 'p95_s': pct(0.95), 'p99_s': pct(0.99)}
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timers: Dict[str, _Timer] = {}
+        self.counters: Dict[str, float] = {}
+        self.rng = random.Random(0)
+        self.pid = os.getpid()
+
+    def _check_fork(self):
+        # A forked worker starts with a copy of the parent's metrics (and lock): drop them
+        if self.pid != os.getpid():
+            self.timers, self.counters, self.pid = {}, {}, os.getpid()
+            self.lock = threading.Lock()
+
+    def add_time(self, name: str, seconds: float):
+        self._check_fork()
+        with self.lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                timer = self.timers[name] = _Timer()
+            timer.add(seconds, self.rng)
+
+    def add_count(self, name: str, n: float):
+        self._check_fork()
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self) -> dict:
+        self._check_fork()
+        with self.lock:
+            return {
+                'timers': {name: t.summary() for name, t in sorted(self.timers.items())},
+                'counters': dict(sorted(self.counters.items())),
+            }
+
+    def drain(self) -> dict:
+        """Raw state (mergeable in another process), then reset."""
+        self._check_fork()
+        with self.lock:
+            state = {
+                'timers': {name: [t.count, t.total, t.min, t.max, t.samples] for name, t in self.timers.items()},
+                'counters': self.counters,
+            }
+            self.timers, self.counters = {}, {}
+            return state
+
+    def merge(self, state: Optional[dict]):
+        if not state:
+            return
+        self._check_fork()
+        with self.lock:
+            for name, (count, total, t_min, t_max, samples) in state['timers'].items():
+                timer = self.timers.get(name)
+                if timer is None:
+                    timer = self.timers[name] = _Timer()
+                timer.count += count
+                timer.total += total
+                timer.min = min(timer.min, t_min)
+                timer.max = max(timer.max, t_max)
+                timer.samples.extend(samples)
+                if len(timer.samples) > SAMPLE_SIZE:
+                    timer.samples = self.rng.sample(timer.samples, SAMPLE_SIZE)
+            for name, n in state['counters'].items():
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def reset(self):
+        with self.lock:
+            self.timers, self.counters = {}, {}
+
+
+_registry = Registry()
+_enabled = bool(os.environ.get("PDF2BIBTEX_METRICS"))
+_active_entry_points = 0
+
+
+def enable(on: bool = True):
+    global _enabled
+    _enabled = on
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+# --------------- Timers and counters --------------- #
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _StageTimer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _registry.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def timer(name: str):
+    """Context manager timing one occurrence of `name` (no-op when disabled)."""
+    return _StageTimer(name) if _enabled else _NULL_TIMER
+
+
+def timed(name: str):
+    """Decorator version of timer()."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _registry.add_time(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def count(name: str, n: float = 1):
+    if _enabled:
+        _registry.add_count(name, n)
+
+
+def snapshot() -> dict:
+    return _registry.snapshot()
+
+
+def drain() -> Optional[dict]:
+    """This process's metrics (None when disabled), for a worker to return to its parent."""
+    return _registry.drain() if _enabled else None
+
+
+def merge(state: Optional[dict]):
+    if _enabled:
+        _registry.merge(state)
+
+
+def reset():
+    _registry.reset()
+
+
+# --------------- Export --------------- #
+
+def to_json() -> str:
+    return json.dumps(snapshot(), indent=2)
+
+
+def _prom_name(name: str) -> str:
+    return "pdf2bibtex_" + re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def to_prometheus() -> str:
+    """Prometheus text exposition format: timers as summaries, counters as counters."""
+    snap = snapshot()
+    lines = []
+    for name, t in snap['timers'].items():
+        metric = _prom_name(name) + "_seconds"
+        lines.append(f"# TYPE {metric} summary")
+        for q, key in (("0.5", "p50_s"), ("0.95", "p95_s"), ("0.99", "p99_s")):
+            if t[key] is not None:
+                lines.append(f'{metric}{{quantile="{q}"}} {t[key]:.9g}')
+        lines.append(f"{metric}_sum {t['sum_s']:.9g}")
+        lines.append(f"{metric}_count {t['count']}")
+    for name, value in snap['counters'].items():
+        metric = _prom_name(name) + "_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {value:.9g}")
+    return "\n".join(lines) + "\n"
+
+
+def report(file=None):
+    """Human-readable table of all timers and counters."""
+    file = file or sys.stdout
+    snap = snapshot()
+
+    def ms(v):
+        return f"{1000 * v:10.2f}" if v is not None else f"{'-':>10}"
+    print(f"\n--- Metrics ---\n{'timer':<32}{'count':>8}{'total s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}",
+          file=file)
+    for name, t in snap['timers'].items():
+        print(f"{name:<32}{t['count']:>8}{t['sum_s']:>10.3f}{ms(t['p50_s'])}{ms(t['p95_s'])}{ms(t['p99_s'])}",
+              file=file)
+    for name, value in snap['counters'].items():
+        print(f"{name:<32}{value:>8g}", file=file)
+
+
+def dump(target: Optional[str] = None):
+    """Writes the metrics to target (.json/.prom) or PDF2BIBTEX_METRICS, or prints them."""
+    if not _enabled:
+        return
+    target = target or os.environ.get("PDF2BIBTEX_METRICS", "1")
+    if target.endswith(".json") or target.endswith(".prom"):
+        os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+        tmp_path = target + ".tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(to_json() if target.endswith(".json") else to_prometheus())
+        os.replace(tmp_path, target)
+        print(f"Metrics written to {target}")
+    else:
+        report()
+
+
+# --------------- Profiling --------------- #
+
+@contextmanager
+def profile(stage: str, mode: Optional[str] = None):
+    """Profiles the block with cProfile or pyinstrument if PDF2BIBTEX_PROFILE (or mode) is set."""
+    mode = mode or os.environ.get("PDF2BIBTEX_PROFILE")
+    if not mode:
+        yield
+        return
+    out_dir = os.environ.get("PDF2BIBTEX_PROFILE_DIR", ".")
+    os.makedirs(out_dir, exist_ok=True)
+    if mode == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("pyinstrument is not installed, falling back to cProfile")
+            mode = "cprofile"
+        else:
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                path = os.path.join(out_dir, f"{stage}.html")
+                with open(path, 'w') as f:
+                    f.write(profiler.output_html())
+                print(f"Profile written to {path}")
+            return
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        path = os.path.join(out_dir, f"{stage}.prof")
+        profiler.dump_stats(path)
+        print(f"Profile written to {path}")
+
+
+def entry_point(stage: str):
+    """
+    Decorator for pipeline entry points: times the whole call as `stage`.
+    The outermost entry point (e.g. `run`, which calls the others) is the one
+    profiled if requested, and dumps the metrics when it returns.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            global _active_entry_points
+            if not _enabled and not os.environ.get("PDF2BIBTEX_PROFILE"):
+                return fn(*args, **kwargs)
+            outermost = _active_entry_points == 0
+            _active_entry_points += 1
+            try:
+                with (profile(stage) if outermost else nullcontext()), timer(stage):
+                    return fn(*args, **kwargs)
+            finally:
+                _active_entry_points -= 1
+                if _active_entry_points == 0:
+                    dump()
+        return wrapper
+    return decorator
@@ -0,0 +1,223 @@
+import os
+import json
+import math
+from typing import List, NamedTuple, Optional
+import numpy as np
+from pdf2bibtex.core import normalize_for_matching
+from pdf2bibtex.fastjson import json_loads
+
+"""
+    Approximate title -> arXiv id matching for predicted titles.
+
+    Titles are normalized (NFKC, lowercase, alphanumerics only: see
+    core.normalize_for_matching) and cut into overlapping character
+    trigrams, so extraction noise only costs a few grams: a missing space
+    or hyphenation costs nothing, a garbled glyph or a line too many/few
+    costs the grams around it. Similarity is the Dice coefficient of the
+    two trigram sets, 2 |A & B| / (|A| + |B|).
+
+    The index is stored next to the metadata JSONL in `<metadata>.titles/`
+    as plain NumPy arrays, opened memory-mapped:
+
+        grams.npy          trigram codes (3 code points packed in an int64), sorted
+        gram_offsets.npy   postings of grams[i] are postings[gram_offsets[i]:gram_offsets[i + 1]]
+        postings.npy       title positions, sorted within each gram
+        ids.npy            arXiv id of every title (fixed-width bytes)
+        title_grams.npy    trigram codes of every title (sorted per title, titles back to back)
+        title_offsets.npy  title i owns title_grams[title_offsets[i]:title_offsets[i + 1]]
+
+    A lookup only reads the postings of the query's rarest trigrams (prefix
+    filtering: a title reaching the threshold must share at least one of
+    them; on long queries full of common grams, only as many as fit in
+    MAX_POSTINGS), ranks those candidates by shared rare grams and computes
+    the exact Dice score of the best few in one vectorized pass over their
+    trigrams.
+    Like the metadata index, it is rebuilt when the JSONL's size or mtime
+    changes.
+"""
+
+INDEX_VERSION = 1
+ID_WIDTH = 32
+# Minimum Dice score of a match (unrelated titles rarely reach 0.5)
+DEFAULT_THRESHOLD = 0.6
+# Candidates whose exact score is computed per lookup
+MAX_VERIFY = 32
+# Postings read per lookup: rarer grams are read first, common ones only while they fit
+MAX_POSTINGS = 8192
+
+
+class TitleMatch(NamedTuple):
+    arxiv_id: str
+    score: float
+
+
+def default_index_dir(metadata_path: str) -> str:
+    return metadata_path + ".titles"
+
+
+def trigram_codes(normalized: str) -> np.ndarray:
+    """Sorted, distinct trigram codes of a normalized title (empty below 3 characters)."""
+    if len(normalized) < 3:
+        return np.empty(0, dtype=np.int64)
+    cp = np.frombuffer(normalized.encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+    return np.unique((cp[:-2] << 42) | (cp[1:-1] << 21) | cp[2:])
+
+
+def build_title_index(metadata_path: str, index_dir: Optional[str] = None):
+    """One-time scan of the metadata JSONL into the index directory."""
+    index_dir = index_dir or default_index_dir(metadata_path)
+    os.makedirs(index_dir, exist_ok=True)
+    meta_path = os.path.join(index_dir, "meta.json")
+    # meta.json is written last and marks a complete index
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    ids, sizes, codes = [], [], []
+    with open(metadata_path, 'rb') as f:
+        for raw_line in f:
+            if not raw_line.strip():
+                continue
+            entry = json_loads(raw_line)
+            normalized = normalize_for_matching(str(entry.get('title') or ""))
+            title_codes = trigram_codes(normalized)
+            if not len(title_codes):
+                continue
+            # Force the ID to a string (pandas may have written it as a float)
+            ids.append(str(entry.get('id', '')).encode('utf-8')[:ID_WIDTH])
+            sizes.append(len(title_codes))
+            codes.append(title_codes)
+
+    sizes = np.array(sizes, dtype=np.int32)
+    all_codes = np.concatenate(codes) if codes else np.empty(0, dtype=np.int64)
+    owners = np.repeat(np.arange(len(sizes), dtype=np.int32), sizes)
+    # Stable: postings stay sorted by title position within each gram
+    order = np.argsort(all_codes, kind='stable')
+    title_grams = all_codes.copy()
+    all_codes, postings = all_codes[order], owners[order]
+    grams, gram_starts = np.unique(all_codes, return_index=True)
+    gram_offsets = np.append(gram_starts, len(postings)).astype(np.int64)
+    title_offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=title_offsets[1:])
+
+    arrays = (("grams", grams), ("gram_offsets", gram_offsets), ("postings", postings),
+              ("ids", np.array(ids, dtype=f"S{ID_WIDTH}")), ("title_grams", title_grams), ("title_offsets", title_offsets))
+    for name, values in arrays:
+        tmp_path = os.path.join(index_dir, f"{name}.tmp.npy")
+        np.save(tmp_path, values)
+        os.replace(tmp_path, os.path.join(index_dir, f"{name}.npy"))
+
+    st = os.stat(metadata_path)
+    meta = {
+        'version': INDEX_VERSION,
+        'metadata_path': os.path.abspath(metadata_path),
+        'metadata_size': st.st_size,
+        'metadata_mtime_ns': st.st_mtime_ns,
+        'n_titles': len(ids),
+        'n_grams': len(grams),
+    }
+    with open(meta_path + ".tmp", 'w') as f:
+        json.dump(meta, f)
+    os.replace(meta_path + ".tmp", meta_path)
+
+
+class TitleIndex:
+    """Read-only, memory-mapped view of an index built by build_title_index."""
+
+    def __init__(self, index_dir: str):
+        with open(os.path.join(index_dir, "meta.json"), 'r') as f:
+            self.meta = json.load(f)
+        self.metadata_path = self.meta['metadata_path']
+
+        def load(name):
+            # Plain ndarray views of the maps: slicing np.memmap objects is much slower
+            return np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode='r').view(np.ndarray)
+
+        self.grams = load("grams")
+        self.gram_offsets = load("gram_offsets")
+        self.postings = load("postings")
+        self.ids = load("ids")
+        self.title_grams = load("title_grams")
+        self.title_offsets = load("title_offsets")
+
+    def __len__(self):
+        return len(self.ids)
+
+    def is_stale(self) -> bool:
+        """True if the JSONL changed (or the index format did) since the index was built."""
+        if self.meta.get('version') != INDEX_VERSION or not os.path.exists(self.metadata_path):
+            return True
+        st = os.stat(self.metadata_path)
+        return (st.st_size, st.st_mtime_ns) != (self.meta['metadata_size'], self.meta['metadata_mtime_ns'])
+
+    def search(self, title: str, threshold: float = DEFAULT_THRESHOLD, limit: int = 5) -> List[TitleMatch]:
+        """Titles with a trigram Dice score >= threshold, best first (at most limit)."""
+        query = trigram_codes(normalize_for_matching(title))
+        n_query = len(query)
+        if not n_query or not len(self.grams):
+            return []
+
+        pos = np.searchsorted(self.grams, query)
+        pos[pos >= len(self.grams)] = 0
+        pos = pos[self.grams[pos] == query]
+        starts, ends = self.gram_offsets[pos], self.gram_offsets[pos + 1]
+        # Dice >= t needs at least t * n_query / (2 - t) shared grams, so a match
+        # shares one of the n_query - that + 1 rarest (grams missing from the index
+        # are the rarest of all and have no postings)
+        min_shared = max(1, math.ceil(threshold * n_query / (2 - threshold) - 1e-9))
+        n_prefix = n_query - min_shared + 1 - (n_query - len(pos))
+        if n_prefix <= 0:
+            return []
+        df = ends - starts
+        rarest = np.argsort(df, kind='stable')[:n_prefix]
+        # Always the rarest gram, then as many more as fit in the postings budget
+        rarest = rarest[:max(1, int(np.searchsorted(np.cumsum(df[rarest]), MAX_POSTINGS, side='right')))]
+        candidates = np.concatenate([self.postings[starts[i]:ends[i]] for i in rarest.tolist()])
+        candidates, shared = np.unique(candidates, return_counts=True)
+        if len(candidates) > MAX_VERIFY:
+            # Sorted again so that ties go to the first title in file order
+            candidates = np.sort(candidates[np.argpartition(-shared, MAX_VERIFY)[:MAX_VERIFY]])
+
+        # Exact Dice of every candidate: which of its trigrams are in the query
+        starts, ends = self.title_offsets[candidates], self.title_offsets[candidates + 1]
+        candidate_grams = np.concatenate([self.title_grams[a:b] for a, b in zip(starts.tolist(), ends.tolist())])
+        hits = query[np.minimum(np.searchsorted(query, candidate_grams), n_query - 1)] == candidate_grams
+        n_shared = np.add.reduceat(hits, np.concatenate([[0], np.cumsum(ends - starts)[:-1]]))
+        scores = 2.0 * n_shared / (n_query + (ends - starts))
+        best = np.argsort(-scores, kind='stable')[:limit]
+        return [TitleMatch(self.ids[candidates[i]].decode('utf-8'), round(float(scores[i]), 4))
+                for i in best if scores[i] >= threshold]
+
+    def best(self, title: str, threshold: float = DEFAULT_THRESHOLD) -> Optional[TitleMatch]:
+        """The best match for title, or None if nothing reaches threshold."""
+        matches = self.search(title, threshold, limit=1)
+        return matches[0] if matches else None
+
+    def close(self):
+        # Drop the memory maps (closed once garbage collected)
+        self.grams = self.gram_offsets = self.postings = self.title_grams = None
+
+
+def open_title_index(metadata_path: str, index_dir: Optional[str] = None) -> TitleIndex:
+    """Opens the index, (re)building it first if it is missing or stale."""
+    index_dir = index_dir or default_index_dir(metadata_path)
+    if os.path.exists(os.path.join(index_dir, "meta.json")):
+        index = TitleIndex(index_dir)
+        if not index.is_stale():
+            return index
+        index.close()
+    build_title_index(metadata_path, index_dir)
+    return TitleIndex(index_dir)
+
+
+_open_indexes = {}
+
+
+def get_title_index(metadata_path: str) -> TitleIndex:
+    """Per-process index for metadata_path (reopened if the JSONL changed)."""
+    key = (os.getpid(), os.path.abspath(metadata_path))
+    index = _open_indexes.get(key)
+    if index is None or index.is_stale():
+        if index is not None:
+            index.close()
+        index = _open_indexes[key] = open_title_index(metadata_path)
+    return index
@@ -1,52 +1,133 @@
 import pandas as pd
+import numpy as np
 import os
+import sys
+import time
+import argparse
 import joblib
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import classification_report, confusion_matrix
-from core import BASE_DIR
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from sklearn.metrics import classification_report, precision_recall_fscore_support
 
-def train_title_classifier():
-    # Load the data
-    data_path = os.path.join(BASE_DIR, "data", "processed", "training_set_v1.jsonl")
-    print("Loading data...")
-    df = pd.read_json(data_path, lines=True)
+# Run as `python src/pdf2bibtex/train_model_random_forest.py`, only this package's own
+# directory is on sys.path; src/ is needed to import it as pdf2bibtex
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pdf2bibtex.core import BASE_DIR
+from pdf2bibtex.line_batch import FEATURE_COLUMNS
+from pdf2bibtex.dataset_io import find_training_set, load_features
+from pdf2bibtex.compact_forest import CompactForest, check_parity
+
+# Default output file per model type
+MODEL_FILES = {"rf": "title_classifier_rf.joblib", "hgb": "title_classifier_hgb.joblib"}
+
+def subsample_other(X, y, other_ratio: float, seed: int = 42):
+    """Keeps every TITLE row and at most other_ratio OTHER rows per TITLE row."""
+    rng = np.random.default_rng(seed)
+    title_rows = np.flatnonzero(y == 1)
+    other_rows = np.flatnonzero(y == 0)
+    n_other = min(len(other_rows), int(other_ratio * len(title_rows)))
+    keep = np.sort(np.concatenate([title_rows, rng.choice(other_rows, size=n_other, replace=False)]))
+    return X.iloc[keep], y.iloc[keep]
+
+def make_model(model_type: str = "rf", n_jobs: int = -1):
+    # class_weight='balanced' helps the model not ignore our rare Title lines
+    if model_type == "rf":
+        return RandomForestClassifier(n_estimators=100, class_weight='balanced', random_state=42, n_jobs=n_jobs)
+    if model_type == "hgb":
+        # Bins every feature into <= 255 buckets; multithreaded through OpenMP
+        return HistGradientBoostingClassifier(class_weight='balanced', random_state=42)
+    raise ValueError(f"Unknown model type: {model_type}")
+
+def train_title_classifier(data_path=None, model_type: str = "rf", n_jobs: int = -1,
+                           other_ratio=None, model_path=None, save: bool = True, compact: bool = True) -> dict:
+    """
+    Trains the title classifier and returns its evaluation on the held-out 20%.
+
+    :param model_type: "rf" (Random Forest) or "hgb" (HistGradientBoosting)
+    :param n_jobs: cores for the Random Forest (-1: all cores)
+    :param other_ratio: if set, the training split keeps at most this many OTHER
+                        lines per TITLE line (the test split is never subsampled)
+    :param save: write the model to model_path (default: models/<MODEL_FILES[model_type]>)
+    :param compact: with save, also export the sklearn-free model (same path, .npz;
+                    see compact_forest.py) after checking it against the test split
+    """
+    # Load the data (.parquet/.arrow are memory-mapped; .jsonl/.npz also work)
+    if data_path is None:
+        data_path = find_training_set()
+    print(f"Loading data from {data_path}...")
 
     # Prepare Features (X) and Labels (y)
-    # We convert the boolean 'is_bold' into 1/0 for the math engine
-    X = df[['line_index', 'y_position', 'font_size', 'is_bold']].copy()
-    X['is_bold'] = X['is_bold'].astype(int)
-    
-    y = df['label'].apply(lambda x: 1 if x == "TITLE" else 0)
+    # 'is_bold' comes back as 1/0 for the math engine, all features as float32
+    X_arr, y_arr = load_features(data_path)
+    X = pd.DataFrame(X_arr, columns=FEATURE_COLUMNS, copy=False)
+    y = pd.Series(y_arr)
 
     # Split into Training (80%) and Testing (20%) sets
     # This ensures we test the model on data it hasn't seen
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.2, random_state=42, stratify=y
     )
+    if other_ratio is not None:
+        X_train, y_train = subsample_other(X_train, y_train, other_ratio)
 
-    # Initialize and Train the Random Forest
-    print(f"Training on {len(X_train)} lines...")
-    # class_weight='balanced' helps the model not ignore our rare Title lines
-    model = RandomForestClassifier(n_estimators=100, class_weight='balanced', random_state=42)
+    # Initialize and Train the model
+    print(f"Training {model_type} on {len(X_train)} lines ({int(y_train.sum())} TITLE)...")
+    model = make_model(model_type, n_jobs)
+    start = time.perf_counter()
     model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
 
     # Evaluate the results
     y_pred = model.predict(X_test)
     print("\n--- Model Evaluation ---")
     print(classification_report(y_test, y_pred))
-    
-    # Check Feature Importance
-    print("\n--- Feature Importance ---")
-    for name, importance in zip(X.columns, model.feature_importances_):
-        print(f"{name}: {importance:.4f}")
+    precision, recall, f1, _ = precision_recall_fscore_support(y_test, y_pred, average='binary', zero_division=0)
+
+    # Check Feature Importance (Random Forest only)
+    if hasattr(model, "feature_importances_"):
+        print("\n--- Feature Importance ---")
+        for name, importance in zip(X.columns, model.feature_importances_):
+            print(f"{name}: {importance:.4f}")
 
     # Save the model for later use
-    model_dir = os.path.join(BASE_DIR, "models")
-    os.makedirs(model_dir, exist_ok=True)
-    model_path = os.path.join(model_dir, "title_classifier_rf.joblib")
-    joblib.dump(model, model_path)
-    print(f"\nModel saved to {model_path}")
+    if save:
+        if model_path is None:
+            model_dir = os.path.join(BASE_DIR, "models")
+            os.makedirs(model_dir, exist_ok=True)
+            model_path = os.path.join(model_dir, MODEL_FILES[model_type])
+        joblib.dump(model, model_path)
+        print(f"\nModel saved to {model_path}")
+
+        if compact:
+            compact_model = CompactForest.from_sklearn(model)
+            max_diff = check_parity(model, compact_model, X_test)
+            compact_path = os.path.splitext(model_path)[0] + ".npz"
+            compact_model.save(compact_path)
+            print(f"Compact model saved to {compact_path} "
+                  f"({os.path.getsize(compact_path) / 1e6:.2f} MB vs {os.path.getsize(model_path) / 1e6:.2f} MB, "
+                  f"max probability difference {max_diff:.2g})")
+
+    return {
+        'model': model_type,
+        'n_jobs': n_jobs,
+        'other_ratio': other_ratio,
+        'train_rows': len(X_train),
+        'fit_seconds': fit_seconds,
+        'precision': float(precision),
+        'recall': float(recall),
+        'f1': float(f1),
+    }
 
 if __name__ == "__main__":
-    train_title_classifier()
\ No newline at end of file
+    arg_parser = argparse.ArgumentParser(description="Train the Random Forest title classifier.")
+    arg_parser.add_argument("--data", help="Training set (.parquet, .arrow, .jsonl or .npz); default: the fastest one on disk")
+    arg_parser.add_argument("--model", choices=sorted(MODEL_FILES), default="rf", help="rf or hgb (HistGradientBoosting)")
+    arg_parser.add_argument("--n-jobs", type=int, default=-1, help="Cores for the Random Forest (-1: all)")
+    arg_parser.add_argument("--other-ratio", type=float, default=None,
+                            help="Subsample OTHER lines to this many per TITLE line in the training split")
+    arg_parser.add_argument("--out", help="Model file (default: models/title_classifier_<model>.joblib)")
+    arg_parser.add_argument("--no-compact", action="store_true", help="Do not export the compact .npz model")
+    args = arg_parser.parse_args()
+    train_title_classifier(args.data, args.model, args.n_jobs, args.other_ratio, args.out,
+                           compact=not args.no_compact)
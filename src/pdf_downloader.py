@@ -2,20 +2,142 @@
 import sys
 import os
 import time
+import json
+import random
+import hashlib
+import argparse
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
 from tqdm import tqdm
 from pdf2bibtex.core import TRAIN_DATA_PATH, RAW_PDF_DIR
+from pdf2bibtex import metrics
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
 
+ARXIV_PDF_URL = "https://arxiv.org/pdf"
+USER_AGENT = 'EducationalProject/1.0 (contact: your@email.com)'
+PDF_INDEX_NAME = "pdf_index.jsonl"
 
 
+
+# --------------- Safe PDF writes --------------- #
+# PDFs are streamed in chunks to a temporary file, checked, fsync'ed and then
+# atomically renamed into place, so a killed process never leaves a truncated
+# .pdf behind. Every finished file is recorded (size + sha256) in a sidecar
+# index next to the PDFs, which is what resumed runs trust.
+
+def check_pdf_bytes(head: bytes, tail: bytes):
+    """Raises ValueError unless the file looks like a complete PDF."""
+    if not head.startswith(b"%PDF"):
+        raise ValueError("missing %PDF header")
+    if b"%%EOF" not in tail:
+        raise ValueError("missing %%EOF trailer (truncated download?)")
+
+
+def save_pdf_stream(response, file_path: str, chunk_size: int = 64 * 1024):
+    """
+    Streams a requests response (opened with stream=True) into file_path.
+    Memory use is bounded by chunk_size. Returns (size, sha256).
+    """
+    tmp_path = file_path + ".part"
+    h = hashlib.sha256()
+    size = 0
+    head = b""
+    tail = b""
+    try:
+        with open(tmp_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if not chunk:
+                    continue
+                if len(head) < 8:
+                    head += chunk[:8]
+                tail = (tail + chunk)[-1024:]
+                h.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        check_pdf_bytes(head, tail)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return size, h.hexdigest()
+
+
+def check_pdf_file(file_path: str):
+    """Same sanity check as check_pdf_bytes, for a file already on disk."""
+    with open(file_path, 'rb') as f:
+        head = f.read(8)
+        f.seek(max(0, os.path.getsize(file_path) - 1024))
+        tail = f.read()
+    check_pdf_bytes(head, tail)
+
+
+class PDFIndex:
+    """Append-only sidecar index {filename: {size, sha256}} of verified downloads."""
+    def __init__(self, pdf_dir: str):
+        self.path = os.path.join(pdf_dir, PDF_INDEX_NAME)
+        self.entries = {}
+        self.lock = threading.Lock()
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self.entries[entry['file']] = entry
+
+    def record(self, file_path: str, size: int, sha256: str):
+        entry = {'file': os.path.basename(file_path), 'size': size, 'sha256': sha256}
+        with self.lock:
+            self.entries[entry['file']] = entry
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def is_complete(self, file_path: str) -> bool:
+        """
+        True if file_path is a finished download. Files from before the index
+        existed are sanity-checked and adopted; broken ones are deleted so
+        they get downloaded again.
+        """
+        if not os.path.exists(file_path):
+            return False
+        entry = self.entries.get(os.path.basename(file_path))
+        if entry is not None:
+            if os.path.getsize(file_path) == entry['size']:
+                return True
+        else:
+            try:
+                check_pdf_file(file_path)
+                h = hashlib.sha256()
+                with open(file_path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(1 << 20), b""):
+                        h.update(chunk)
+                sha = h.hexdigest()
+                self.record(file_path, os.path.getsize(file_path), sha)
+                return True
+            except (OSError, ValueError):
+                pass
+        os.remove(file_path)
+        return False
+
+
+
+@metrics.entry_point("download_papers")
 def download_papers():
     # Setup local storage
     if not os.path.exists(RAW_PDF_DIR):
         os.makedirs(RAW_PDF_DIR)
     
+    index = PDFIndex(RAW_PDF_DIR)
+
     # Load the data you (just enriched)
     df = pd.read_json(TRAIN_DATA_PATH, lines=True)
     print(f"Total papers to verify/download: {len(df)}")
@@ -34,34 +156,256 @@ def download_papers():
         safe_id = paper_id.replace('/', '_')
         file_path = os.path.join(RAW_PDF_DIR, f"{safe_id}.pdf")
 
-        # Skip if we already have it
-        if os.path.exists(file_path):
+        # Skip if we already have it (and it is a complete download)
+        if index.is_complete(file_path):
             continue
 
         # ArXiv PDF URL format
-        pdf_url = f"https://arxiv.org/pdf/{paper_id}.pdf"
+        pdf_url = f"{ARXIV_PDF_URL}/{paper_id}.pdf"
         
         try:
-            headers = {'User-Agent': 'EducationalProject/1.0 (contact: your@email.com)'}
-            response = requests.get(pdf_url, headers=headers, timeout=15)
+            headers = {'User-Agent': USER_AGENT}
+            with metrics.timer("download.request"):
+                response = requests.get(pdf_url, headers=headers, timeout=15, stream=True)
+                if response.status_code == 200:
+                    size, sha = save_pdf_stream(response, file_path)
             
             if response.status_code == 200:
-                with open(file_path, 'wb') as f:
-                    f.write(response.content)
+                index.record(file_path, size, sha)
                 download_count += 1
+                metrics.count("download.ok")
+                metrics.count("download.bytes", size)
                 # 3 seconds is the "polite" minimum.
                 time.sleep(3) 
             elif response.status_code == 403:
                 print("\n[!] Access Forbidden. You are likely rate-limited. Stopping.")
                 break
             else:
+                metrics.count("download.failed")
                 print(f"\n[!] Failed {paper_id} (Status: {response.status_code})")
 
         except Exception as e:
+            metrics.count("download.failed")
             print(f"\n[!] Error with {paper_id}: {e}")
             time.sleep(5)
 
     print(f"\nFinished! Downloaded {download_count} new papers.")
 
+
+
+# --------------- Concurrent downloader --------------- #
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: allows `rate` requests per second on average,
+    with bursts of up to `capacity` requests.
+    """
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostBackoff:
+    """
+    Per-host exponential backoff with full jitter. After a 403/429/5xx every
+    worker talking to that host pauses until the backoff window has passed.
+    """
+    def __init__(self, base: float = 5.0, cap: float = 300.0):
+        self.base = base
+        self.cap = cap
+        self.failures = {}
+        self.resume_at = {}
+        self.lock = threading.Lock()
+
+    def wait(self, host: str):
+        with self.lock:
+            delay = self.resume_at.get(host, 0) - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def failure(self, host: str, retry_after=None) -> float:
+        with self.lock:
+            n = self.failures.get(host, 0) + 1
+            self.failures[host] = n
+            delay = random.uniform(0, min(self.cap, self.base * 2 ** (n - 1)))
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            self.resume_at[host] = max(self.resume_at.get(host, 0), time.monotonic() + delay)
+            return delay
+
+    def success(self, host: str):
+        with self.lock:
+            self.failures.pop(host, None)
+
+
+def make_session(pool_size: int) -> requests.Session:
+    """One pooled session shared by all workers (keeps connections alive)."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers['User-Agent'] = USER_AGENT
+    return session
+
+
+def _retry_after_seconds(response):
+    value = response.headers.get('Retry-After')
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _fetch_one(session, bucket, backoff, index, pdf_url, file_path, timeout):
+    """
+    Downloads one PDF. Returns "ok", "retry" (throttled or transient error)
+    or "failed" (permanent error such as 404).
+    """
+    host = urlparse(pdf_url).netloc
+    backoff.wait(host)
+    bucket.acquire()
+    try:
+        with metrics.timer("download.request"), session.get(pdf_url, timeout=timeout, stream=True) as response:
+            if response.status_code == 200:
+                size, sha = save_pdf_stream(response, file_path)
+                index.record(file_path, size, sha)
+                backoff.success(host)
+                metrics.count("download.ok")
+                metrics.count("download.bytes", size)
+                return "ok"
+            if response.status_code in (403, 429) or response.status_code >= 500:
+                backoff.failure(host, _retry_after_seconds(response))
+                metrics.count("download.retry")
+                return "retry"
+            metrics.count("download.failed")
+            return "failed"
+    except (requests.RequestException, ValueError):
+        # Connection problems and truncated/invalid bodies are worth a retry
+        backoff.failure(host)
+        metrics.count("download.retry")
+        return "retry"
+
+
+def _load_paper_ids() -> list:
+    # dtype: ids such as 2101.00010 must not be parsed as floats (2101.0001)
+    df = pd.read_json(TRAIN_DATA_PATH, lines=True, dtype={"id": str})
+    ids = []
+    for raw_id in df['id']:
+        # Force the ID to be a string and strip any weird whitespace
+        paper_id = str(raw_id).strip()
+        if paper_id and paper_id != "nan":
+            ids.append(paper_id)
+    return ids
+
+
+@metrics.entry_point("download_papers")
+def download_papers_concurrent(paper_ids=None, out_dir=RAW_PDF_DIR, base_url=ARXIV_PDF_URL,
+                               workers=4, rate=1 / 3, burst=1, max_rounds=3, timeout=15, on_file=None):
+    """
+    Downloads PDFs with a pool of threads sharing one pooled HTTP session.
+
+    :param paper_ids: arXiv ids to fetch (default: every id in TRAIN_DATA_PATH)
+    :param base_url: PDFs are fetched from f"{base_url}/{paper_id}.pdf"
+    :param rate: average requests per second across all workers (token bucket)
+    :param burst: maximum burst size of the token bucket
+    :param max_rounds: throttled/failed ids are retried for up to this many rounds
+    :param on_file: called as on_file(paper_id, file_path) for every PDF on disk: the
+                    ones already there, then each new download as it completes
+                    (from this thread; a blocking callback only delays the bookkeeping)
+    :return: dict with the downloaded, skipped and failed ids
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    index = PDFIndex(out_dir)
+    if paper_ids is None:
+        paper_ids = _load_paper_ids()
+
+    pending = {}
+    skipped = {}
+    for paper_id in paper_ids:
+        safe_id = paper_id.replace('/', '_')
+        file_path = os.path.join(out_dir, f"{safe_id}.pdf")
+        if index.is_complete(file_path):
+            skipped[paper_id] = file_path
+        else:
+            pending[paper_id] = file_path
+    print(f"Total papers to download: {len(pending)} ({len(skipped)} already on disk)")
+
+    def report_skipped():
+        if on_file is not None:
+            for paper_id, file_path in skipped.items():
+                on_file(paper_id, file_path)
+
+    if not pending:
+        report_skipped()
+
+    bucket = TokenBucket(rate, burst)
+    backoff = HostBackoff()
+    downloaded, failed = [], []
+    session = make_session(workers)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for round_no in range(1, max_rounds + 1):
+                if not pending:
+                    break
+                futures = {
+                    pool.submit(_fetch_one, session, bucket, backoff, index,
+                                f"{base_url}/{paper_id}.pdf", file_path, timeout): paper_id
+                    for paper_id, file_path in pending.items()
+                }
+                if round_no == 1:
+                    # Downloads are already running in the pool meanwhile
+                    report_skipped()
+                retry = {}
+                for future in tqdm(as_completed(futures), total=len(futures),
+                                   desc=f"Downloading PDFs (round {round_no})"):
+                    paper_id = futures[future]
+                    status = future.result()
+                    if status == "ok":
+                        downloaded.append(paper_id)
+                        if on_file is not None:
+                            on_file(paper_id, pending[paper_id])
+                    elif status == "retry":
+                        retry[paper_id] = pending[paper_id]
+                    else:
+                        failed.append(paper_id)
+                pending = retry
+    finally:
+        session.close()
+
+    failed.extend(pending)
+    for paper_id in failed:
+        print(f"[!] Failed {paper_id}")
+    print(f"\nFinished! Downloaded {len(downloaded)} new papers, {len(failed)} failed.")
+    return {'downloaded': downloaded, 'skipped': list(skipped), 'failed': failed}
+
 if __name__ == "__main__":
-    download_papers()
\ No newline at end of file
+    arg_parser = argparse.ArgumentParser(description="Download arXiv PDFs for the gold-standard set.")
+    arg_parser.add_argument("--workers", type=int, default=1,
+                            help="Concurrent download threads; 1 uses the original serial downloader")
+    arg_parser.add_argument("--rate", type=float, default=1 / 3,
+                            help="Average requests per second (default: one every 3 seconds)")
+    arg_parser.add_argument("--burst", type=int, default=1, help="Token bucket burst size")
+    arg_parser.add_argument("--rounds", type=int, default=3, help="Retry rounds for throttled ids")
+    arg_parser.add_argument("--base-url", default=ARXIV_PDF_URL, help="PDF server base URL")
+    args = arg_parser.parse_args()
+
+    if args.workers <= 1:
+        download_papers()
+    else:
+        download_papers_concurrent(workers=args.workers, rate=args.rate, burst=args.burst,
+                                   max_rounds=args.rounds, base_url=args.base_url)
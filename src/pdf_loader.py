@@ -1,7 +1,15 @@
 import fitz  # This is PyMuPDF
-from typing import List, Dict, Any, cast
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional, Union, cast
 from pdf2bibtex.core import PDFLine 
-import json
+from pdf2bibtex.line_batch import PDFLineBatch, PDFLineBatchBuilder
+from pdf2bibtex.metadata_index import get_metadata_index
+from pdf2bibtex import metrics
+from extraction_cache import get_cache, DEFAULT_CACHE_PATH
+import os
+
+# Bump this whenever the extraction output changes, so that incremental
+# builds (see data_builder.py) know that previously extracted rows are stale.
+EXTRACTOR_VERSION = "1"
 
 """     
     PDFLoader is responsible for loading and parsing PDF documents.
@@ -10,23 +18,171 @@ import json
 """
 
 class PDFLoader:
-    def __init__(self, pdf_path: str):
-        self.pdf_path = pdf_path
-        self.doc = fitz.open(pdf_path)
+    def __init__(self, pdf_path: Union[str, bytes], fast: bool = True, clip_top: Optional[float] = None):
+        """
+        :param pdf_path: path of the PDF, or its content as bytes (e.g. a member
+                         of a tar/zip archive, never written to disk)
+        :param fast: use the lean extraction path (text-only TextPage, no image
+                     blocks, fewer per-span allocations). Output is identical to
+                     the reference path (fast=False), with or without clip_top.
+        :param clip_top: only extract text from the top `clip_top` fraction of
+                         the page (e.g. 0.4 for title detection). Lines below the
+                         clip are skipped, so line_index counts clipped lines only.
+        """
+        self.pdf_path = pdf_path if isinstance(pdf_path, str) else "<stream>"
+        with metrics.timer("pdf.open"):
+            if isinstance(pdf_path, str):
+                self.doc = fitz.open(pdf_path)
+            else:
+                self.doc = fitz.open(stream=pdf_path, filetype="pdf")
+        self.fast = fast
+        self.clip_top = clip_top
 
     def get_first_page_lines(self) -> List[PDFLine]:
         """
         Extracts lines from the first page with their metadata.
         """
-        page = self.doc[0]  # Get the first page of the PDF
-        page_dict = cast(Dict[str, Any], page.get_text("dict")) # type: ignore
+        lines_data = []
+        for text, normalized_y, font_size, is_bold in self._iter_line_fields(0):
+            # Create ONE PDFLine for the entire line
+            line_obj = PDFLine(
+                text=text,
+                page_number=0,
+                line_index=len(lines_data),
+                y_position=normalized_y,
+                font_size=font_size,
+                is_bold=is_bold,
+            )
+            lines_data.append(line_obj)   
+                    
+        return lines_data
+
+    def get_first_page_batch(self) -> PDFLineBatch:
+        """
+        Same as get_first_page_lines, but fills a columnar PDFLineBatch directly
+        (no per-line PDFLine objects).
+        """
+        builder = PDFLineBatchBuilder()
+        for text, normalized_y, font_size, is_bold in self._iter_line_fields(0):
+            builder.append(text, 0, len(builder), normalized_y, font_size, is_bold)
+        return builder.build()
+
+    @property
+    def page_count(self) -> int:
+        return len(self.doc)
+
+    def iter_lines(self, pages: Optional[Iterable[int]] = None,
+                   stop: Optional[Callable[[PDFLine], bool]] = None) -> Iterator[PDFLine]:
+        """
+        Streams PDFLines page by page (line_index restarts at 0 on every page).
+
+        Only one page's text dict is alive at a time, so memory stays bounded
+        for long documents.
+
+        :param pages: page numbers to read, in order (default: all pages).
+                      Negative numbers count from the end; out-of-range pages are skipped.
+        :param stop: called with every yielded line; returning True ends the
+                     stream after that line (e.g. once the references start)
+        """
+        if pages is None:
+            pages = range(self.page_count)
+        for page_number in pages:
+            if page_number < 0:
+                page_number += self.page_count
+            if not 0 <= page_number < self.page_count:
+                continue
+            line_index = 0
+            for text, normalized_y, font_size, is_bold in self._iter_line_fields(page_number):
+                line_obj = PDFLine(
+                    text=text,
+                    page_number=page_number,
+                    line_index=line_index,
+                    y_position=normalized_y,
+                    font_size=font_size,
+                    is_bold=is_bold,
+                )
+                line_index += 1
+                yield line_obj
+                if stop is not None and stop(line_obj):
+                    return
+
+    def iter_page_batches(self, pages: Optional[Iterable[int]] = None) -> Iterator[PDFLineBatch]:
+        """Columnar variant of iter_lines: yields one PDFLineBatch per page."""
+        if pages is None:
+            pages = range(self.page_count)
+        for page_number in pages:
+            if page_number < 0:
+                page_number += self.page_count
+            if not 0 <= page_number < self.page_count:
+                continue
+            builder = PDFLineBatchBuilder()
+            for text, normalized_y, font_size, is_bold in self._iter_line_fields(page_number):
+                builder.append(text, page_number, len(builder), normalized_y, font_size, is_bold)
+            yield builder.build()
+
+    def _iter_line_fields(self, page_number: int):
+        """
+        Yields (text, normalized_y, max_font_size, any_bold) for every non-empty
+        text line of a page.
+        """
+        if self.fast:
+            return self._iter_line_fields_fast(page_number)
+        return self._iter_line_fields_dict(page_number)
+
+    def _clip_rect(self, page):
+        """Top clip_top fraction of the page (None: the whole page)."""
+        if self.clip_top is None:
+            return None
+        return fitz.Rect(page.rect.x0, page.rect.y0, page.rect.x1, page.rect.y0 + page.rect.height * self.clip_top)
+
+    def _iter_line_fields_fast(self, page_number: int):
+        """
+        Lean version of _iter_line_fields_dict: asks MuPDF for text blocks only
+        (image blocks are never decoded or converted to Python), optionally
+        clipped to the top of the page, and handles the common single-span
+        line without building intermediate lists.
+        """
+        page = self.doc[page_number]
+        page_height = page.rect.height
+        flags = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+        with metrics.timer("pdf.get_text"):
+            page_dict = cast(Dict[str, Any], page.get_text("dict", flags=flags, clip=self._clip_rect(page))) # type: ignore
+
+        for b in page_dict["blocks"]:
+            lines = b.get("lines")
+            if not lines:
+                continue
+            for l in lines:
+                spans = l["spans"]
+                first = spans[0]
+                if len(spans) == 1:
+                    text = first["text"].strip()
+                    max_font_size = max(0.0, float(first["size"]))
+                    any_bold = bool(int(first["flags"]) & 16)
+                else:
+                    text = " ".join([s["text"] for s in spans]).strip()
+                    max_font_size = 0.0
+                    any_bold = False
+                    for s in spans:
+                        size = float(s["size"])
+                        if size > max_font_size:
+                            max_font_size = size
+                        if int(s["flags"]) & 16:
+                            any_bold = True
+                if text:
+                    yield text, first["bbox"][1] / page_height, max_font_size, any_bold
+
+    def _iter_line_fields_dict(self, page_number: int):
+        """Reference extraction path: walks the full get_text("dict") output (clipped like the fast path)."""
+        page = self.doc[page_number]
+        with metrics.timer("pdf.get_text"):
+            page_dict = cast(Dict[str, Any], page.get_text("dict", clip=self._clip_rect(page))) # type: ignore
         blocks = page_dict.get("blocks", []) 
         # PyMuPDF's get_text("dict") provides various levels of detail:
         # “blocks”: generate a list of text blocks (= paragraphs). Each block contains lines, and each line contains spans (with font info).
         # “html”: creates a full visual version of the page including any images. This can be displayed with your internet browser.
         # “dict” / “json”: same information level as HTML, but provided as a Python dictionary or resp. JSON string. See TextPage.extractDICT() for details of its structure.
         
-        lines_data = []
         # Before the loop
         page_height = page.rect.height
 
@@ -60,24 +216,12 @@ class PDFLoader:
                 if not full_line_text:
                     continue
 
-                # Create ONE PDFLine for the entire line
-                normalized_y = first_span_y / page_height
-                
-                line_obj = PDFLine(
-                    text=full_line_text,
-                    page_number=0,
-                    line_index=len(lines_data),
-                    y_position=normalized_y,
-                    font_size=max_font_size,
-                    is_bold=any_bold,
-                )
-                lines_data.append(line_obj)   
-                    
-        return lines_data
+                yield full_line_text, first_span_y / page_height, max_font_size, any_bold
     
 
     
-    def get_title_candidate(self, lines: List[PDFLine]) -> str:
+    @staticmethod
+    def get_title_candidate(lines: List[PDFLine]) -> str:
         # Filter out known noise and restrict to the top of the page
         # We ignore the very top (headers) and anything below 35% of the page
         title_zone_lines = [
@@ -105,26 +249,56 @@ class PDFLoader:
 
 
 
+def load_first_page_batch(pdf_path: Union[str, bytes], cache_path: Optional[str] = None,
+                          clip_top: Optional[float] = None, sha256: Optional[str] = None) -> PDFLineBatch:
+    """
+    Extracts the first page of a PDF (path or bytes) as a PDFLineBatch. With
+    cache_path, the result is looked up in / stored to the on-disk extraction
+    cache (keyed by content hash + EXTRACTOR_VERSION), so repeated runs skip
+    PDF parsing. sha256: the content hash, if the caller already computed it.
+    """
+    cache = get_cache(cache_path) if cache_path else None
+    key = None
+    if cache is not None:
+        kind = "first_page" if clip_top is None else f"first_page_clip{clip_top}"
+        key = cache.key_for(pdf_path, EXTRACTOR_VERSION, kind, sha256)
+        data = cache.get(key)
+        if data is not None:
+            metrics.count("cache.hits")
+            return PDFLineBatch.from_bytes(data)
+        metrics.count("cache.misses")
+
+    with metrics.timer("pdf.extract_first_page"):
+        loader = PDFLoader(pdf_path, clip_top=clip_top)
+        try:
+            batch = loader.get_first_page_batch()
+        finally:
+            loader.close()
+
+    if cache is not None:
+        cache.put(key, batch.to_bytes())
+    return batch
+
+
+def load_first_page_lines(pdf_path: Union[str, bytes], cache_path: Optional[str] = None,
+                          clip_top: Optional[float] = None) -> List[PDFLine]:
+    """List[PDFLine] version of load_first_page_batch."""
+    return load_first_page_batch(pdf_path, cache_path, clip_top).to_lines()
+
+
+
 def get_true_title(arxiv_id, metadata_path):
     if not os.path.exists(metadata_path):
         return f"File Not Found: {metadata_path}"
-        
-    with open(metadata_path, 'r') as f:
-        for line in f:
-            entry = json.loads(line)
-            # Force the ID to a string to avoid the 'float' error
-            meta_id = str(entry.get('id', ''))
-            
-            # Now .startswith() will work safely
-            if meta_id.startswith(str(arxiv_id)):
-                return " ".join(entry['title'].split()).strip()
-    return "ID Not in JSON"
-   
+
+    # First record (file order) whose id starts with arxiv_id, as the original scan
+    title = get_metadata_index(metadata_path).title(str(arxiv_id))
+    return title if title is not None else "ID Not in JSON"
+
 
 
 if __name__ == "__main__":
     from pdf2bibtex.core import RAW_PDF_DIR, TRAIN_DATA_PATH
-    import os
     
     metadata_path = TRAIN_DATA_PATH # os.path.join(BASE_DIR, "data", "processed", "arXiv_v1_06-02-2026.jsonl")
     test_files = [f for f in os.listdir(RAW_PDF_DIR) if f.endswith('.pdf')]
@@ -134,13 +308,15 @@ if __name__ == "__main__":
 
     for filename in test_files[:3]:
         arxiv_id = filename.replace('.pdf', '')
-        loader = PDFLoader(os.path.join(RAW_PDF_DIR, filename))
-        lines = loader.get_first_page_lines()
+        # The title candidate only looks at the top 35% of the page
+        lines = load_first_page_lines(os.path.join(RAW_PDF_DIR, filename), DEFAULT_CACHE_PATH, clip_top=0.4)
         
-        pred = loader.get_title_candidate(lines)
+        pred = PDFLoader.get_title_candidate(lines)
         true = get_true_title(arxiv_id, metadata_path)
         
         print(f"\nID: {arxiv_id}")
         print(f"PRED: {pred}")
         print(f"TRUE: {true}")
-        print("-" * 30)
\ No newline at end of file
+        print("-" * 30)
+
+    print(f"Extraction cache: {get_cache(DEFAULT_CACHE_PATH).stats()}")
\ No newline at end of file
@@ -1,20 +1,105 @@
 import os
+import functools
 import joblib
+import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from pdf2bibtex.core import RAW_PDF_DIR, BASE_DIR
-from pdf_loader import PDFLoader
+from pdf2bibtex.line_batch import FEATURE_COLUMNS
+from pdf2bibtex.compact_forest import CompactForest
+from pdf2bibtex import metrics
+from pdf_loader import load_first_page_batch, load_first_page_lines
+from extraction_cache import DEFAULT_CACHE_PATH
+
+
+def extract_line_features(pdf_path: str, cache_path=None):
+    """
+    Extracts the first page of one PDF as (line texts, float32 feature matrix).
+    Module-level so it can run in a worker process.
+    """
+    batch = load_first_page_batch(pdf_path, cache_path)
+    return batch.texts(), batch.features()
+
+
+class PredictionFailed(str):
+    """
+    Placeholder returned by predict_titles for a PDF that could not be read;
+    the string is the error message. The other documents are unaffected.
+    """
+
+
+def _extract_for_batch(pdf_path: str, cache_path=None) -> dict:
+    """
+    Worker entry point of predict_titles: the extracted lines (or the error,
+    so that one bad PDF does not fail the batch) plus this process's metrics.
+    """
+    try:
+        texts, features = extract_line_features(pdf_path, cache_path)
+        result = {'texts': texts, 'features': features}
+    except Exception as e:
+        metrics.count("predict.failed")
+        result = {'texts': [], 'features': np.empty((0, len(FEATURE_COLUMNS)), dtype=np.float32),
+                  'error': f"{type(e).__name__}: {e}"}
+    result['metrics'] = metrics.drain()
+    return result
+
+
+def select_title_indices(probs) -> list:
+    """Indices of the lines the model thinks belong to the title."""
+    # We'll take all lines the model is > 50% sure are titles
+    title_indices = [i for i, p in enumerate(probs) if p > 0.5]
+
+    if not title_indices:
+        # Fallback: just take the single highest probability line
+        title_indices = [int(np.argmax(probs))]
+    return title_indices
+
+
+def select_title(texts, probs) -> str:
+    """Joins the lines the model thinks belong to the title."""
+    return " ".join([texts[i] for i in select_title_indices(probs)]).strip()
+
+
+def score_title(model, texts, features):
+    """
+    (title, confidence) for one document's lines, or (None, 0.0) if it has no text.
+    The confidence is the mean P(TITLE) of the selected lines.
+    """
+    if not len(texts):
+        return None, 0.0
+    with metrics.timer("predict.inference"):
+        probs = model.predict_proba(pd.DataFrame(features, columns=FEATURE_COLUMNS))[:, 1]
+    title_indices = select_title_indices(probs)
+    title = " ".join([texts[i] for i in title_indices]).strip()
+    return title, float(np.mean(probs[title_indices]))
+
+
+def load_model(model_path: str):
+    """.npz models (compact_forest.py) only need NumPy; anything else is a joblib'd sklearn model."""
+    if model_path.endswith(".npz"):
+        return CompactForest.load(model_path)
+    return joblib.load(model_path)
+
+
+def default_model_path() -> str:
+    """The compact .npz export if it exists (no scikit-learn needed), else the joblib model."""
+    base = os.path.join(BASE_DIR, "models", "title_classifier_rf")
+    return base + ".npz" if os.path.exists(base + ".npz") else base + ".joblib"
+
 
 class TitlePredictor:
-    def __init__(self, model_path: str):
-        # Load the trained brain
-        self.model = joblib.load(model_path)
+    def __init__(self, model_path: str, cache_path=None):
+        # Load the trained brain: .npz models (compact_forest.py) only need NumPy
+        self.model = load_model(model_path)
+        # Optional on-disk extraction cache (see extraction_cache.py)
+        self.cache_path = cache_path
         print("Model loaded successfully.")
 
+    @metrics.timed("predict.document")
     def predict_title(self, pdf_path: str) -> str:
         # Extract lines from the first page
-        loader = PDFLoader(pdf_path)
-        lines = loader.get_first_page_lines()
-        loader.close()
+        with metrics.timer("predict.extract"):
+            lines = load_first_page_lines(pdf_path, self.cache_path)
 
         if not lines:
             return "No text found in PDF."
@@ -33,24 +118,66 @@ class TitlePredictor:
 
         # Get probabilities for each line
         # predict_proba returns [prob_of_0, prob_of_1]
-        probs = self.model.predict_proba(X)[:, 1]
+        with metrics.timer("predict.inference"):
+            probs = self.model.predict_proba(X)[:, 1]
+        metrics.count("predict.documents")
 
-        # Find the lines with the highest probability
-        # We'll take all lines the model is > 50% sure are titles
-        title_indices = [i for i, p in enumerate(probs) if p > 0.5]
-        
-        if not title_indices:
-            # Fallback: just take the single highest probability line
-            best_idx = probs.argmax()
-            title_indices = [best_idx]
+        # Find the lines with the highest probability and join them together
+        return select_title([l.text for l in lines], probs)
+
+    @metrics.timed("predict.batch")
+    def predict_titles(self, pdf_paths, workers: int = 1, executor=None) -> list:
+        """
+        Batch version of predict_title: extracts all PDFs (in parallel if
+        workers > 1 or an executor is given), stacks every line into one
+        pre-allocated float32 feature matrix, calls predict_proba once and
+        splits the probabilities back per document. A PDF that cannot be read
+        gets a PredictionFailed (the error message) instead of a title.
+        """
+        pdf_paths = list(pdf_paths)
+        extract = functools.partial(_extract_for_batch, cache_path=self.cache_path)
+        with metrics.timer("predict.batch.extract"):
+            if executor is not None:
+                results = list(executor.map(extract, pdf_paths))
+            elif workers > 1:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    results = list(pool.map(extract, pdf_paths, chunksize=8))
+            else:
+                results = [extract(p) for p in pdf_paths]
+        # Worker metrics (pdf.*, cache.*) are merged here, as data_builder does
+        extracted, errors = [], []
+        for result in results:
+            metrics.merge(result['metrics'])
+            extracted.append((result['texts'], result['features']))
+            errors.append(result.get('error'))
+
+        # Document i owns rows offsets[i]:offsets[i + 1] of the feature matrix
+        offsets = np.zeros(len(extracted) + 1, dtype=np.int64)
+        np.cumsum([len(features) for _, features in extracted], out=offsets[1:])
+        X = np.empty((offsets[-1], len(FEATURE_COLUMNS)), dtype=np.float32)
+        for (_, features), start, end in zip(extracted, offsets[:-1], offsets[1:]):
+            if end > start:
+                X[start:end] = features
+
+        probs = np.empty(0)
+        if len(X):
+            with metrics.timer("predict.inference"):
+                probs = self.model.predict_proba(pd.DataFrame(X, columns=FEATURE_COLUMNS))[:, 1]
+        metrics.count("predict.documents", len(pdf_paths))
 
-        # Join the predicted lines together
-        predicted_title = " ".join([lines[i].text for i in title_indices])
-        return predicted_title.strip()
+        titles = []
+        for (texts, _), error, start, end in zip(extracted, errors, offsets[:-1], offsets[1:]):
+            if error is not None:
+                titles.append(PredictionFailed(error))
+            elif end == start:
+                titles.append("No text found in PDF.")
+            else:
+                titles.append(select_title(texts, probs[start:end]))
+        return titles
 
 if __name__ == "__main__":
-    model_file = os.path.join(BASE_DIR, "models", "title_classifier_rf.joblib")
-    predictor = TitlePredictor(model_file)
+    model_file = default_model_path()
+    predictor = TitlePredictor(model_file, cache_path=DEFAULT_CACHE_PATH)
 
     # Test on a few files from raw folder
     test_files = [f for f in os.listdir(RAW_PDF_DIR) if f.endswith('.pdf')][:5]
@@ -60,4 +187,5 @@ if __name__ == "__main__":
         title = predictor.predict_title(path)
         print(f"\nFILE: {filename}")
         print(f"PREDICTED TITLE: {title}")
-        print("-" * 30)
\ No newline at end of file
+        print("-" * 30)
+    metrics.dump()
\ No newline at end of file
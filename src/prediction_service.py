@@ -0,0 +1,256 @@
+import os
+import json
+import time
+import queue
+import tempfile
+import argparse
+import threading
+import socketserver
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pdf2bibtex.core import ArxivPaper, TRAIN_DATA_PATH
+from pdf2bibtex.metadata_index import open_metadata_index
+from pdf2bibtex.title_index import open_title_index
+from predict_random_forest import TitlePredictor, PredictionFailed, default_model_path
+from extraction_cache import DEFAULT_CACHE_PATH
+
+"""
+    Long-running title prediction service.
+
+    The model is loaded once and PDF extraction runs in a persistent pool of
+    worker processes. Concurrent requests are collected by a micro-batcher and
+    scored with a single TitlePredictor.predict_titles call.
+
+    Endpoints (HTTP over TCP or a Unix socket):
+        POST /predict   JSON body {"paths": ["/abs/path/a.pdf", ...]}
+                        or a raw PDF body (Content-Type: application/pdf,
+                        optional X-Filename header used to look up metadata)
+                        Metadata is found by arXiv id (filename) or else by
+                        approximate title match (see pdf2bibtex.title_index).
+        GET  /stats     request count and p50/p99 latency in milliseconds
+        GET  /health
+"""
+
+
+class LatencyStats:
+    """Keeps the most recent request latencies and reports percentiles."""
+    def __init__(self, window: int = 10000):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self.lock:
+            self.samples.append(seconds)
+            self.count += 1
+
+    def summary(self) -> dict:
+        with self.lock:
+            samples = sorted(self.samples)
+            count = self.count
+        if not samples:
+            return {'requests': count, 'p50_ms': None, 'p99_ms': None}
+
+        def pct(p):
+            return round(1000 * samples[min(len(samples) - 1, int(p * len(samples)))], 2)
+        return {'requests': count, 'p50_ms': pct(0.50), 'p99_ms': pct(0.99)}
+
+
+class PredictionService:
+    def __init__(self, model_path: str, workers: int = 2, max_batch: int = 32,
+                 batch_window: float = 0.01, metadata_path: str = TRAIN_DATA_PATH, cache_path=None):
+        self.predictor = TitlePredictor(model_path, cache_path=cache_path)
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        # Memory-mapped id -> record and title -> id indexes (None if there is no gold-standard metadata)
+        self.metadata = open_metadata_index(metadata_path) if os.path.exists(metadata_path) else None
+        self.titles = open_title_index(metadata_path) if self.metadata is not None else None
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.stats = LatencyStats()
+        self.pending = queue.Queue()
+        self.batcher = threading.Thread(target=self._batch_loop, daemon=True)
+        self.batcher.start()
+
+    def _batch_loop(self):
+        """Waits for a request, then gathers more for up to batch_window seconds."""
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            paths = [path for path, _ in batch]
+            try:
+                # Unreadable PDFs come back as PredictionFailed, so only this batch-wide call can raise
+                titles = self.predictor.predict_titles(paths, executor=self.executor)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), title in zip(batch, titles):
+                future.set_result(title)
+
+    def predict(self, pdf_paths, names=None) -> list:
+        """Queues the PDFs for the batcher and returns one result dict per PDF."""
+        futures = []
+        for path in pdf_paths:
+            future = Future()
+            self.pending.put((path, future))
+            futures.append(future)
+
+        names = names or [os.path.basename(p) for p in pdf_paths]
+        results = []
+        for name, future in zip(names, futures):
+            try:
+                title = future.result()
+            except Exception as e:
+                results.append({'file': name, 'error': f"{type(e).__name__}: {e}"})
+                continue
+            if isinstance(title, PredictionFailed):
+                results.append({'file': name, 'error': str(title)})
+                continue
+            result = {'file': name, 'title': title}
+            record, score = self.resolve(name, title)
+            if record is not None:
+                result.update(arxiv_id=str(record['id']), match_score=score)
+            result['bibtex'] = self.bibtex_for(name, title, record)
+            results.append(result)
+        return results
+
+    def resolve(self, filename: str, title: str):
+        """
+        (metadata record, match score) for a PDF: by arXiv id if the filename is
+        one (score 1.0), else by approximate title match; (None, None) if neither.
+        """
+        if self.metadata is None:
+            return None, None
+        arxiv_id = filename[:-4] if filename.endswith('.pdf') else filename
+        record = self.metadata.record(arxiv_id.replace('_', '/'), prefix=False)
+        if record is not None:
+            return record, 1.0
+        match = self.titles.best(title)
+        if match is None:
+            return None, None
+        return self.metadata.record(match.arxiv_id, prefix=False), match.score
+
+    def bibtex_for(self, filename: str, title: str, record=None) -> str:
+        """
+        BibTeX entry of the metadata record if one matched (with its own title, not
+        the prediction); otherwise a minimal entry around the predicted title.
+        """
+        if record is not None:
+            paper = ArxivPaper.from_dict(record)
+        else:
+            arxiv_id = filename[:-4] if filename.endswith('.pdf') else filename
+            paper = ArxivPaper(id=arxiv_id, title=title, authors="Unknown", abstract="",
+                               section="", journal_ref=None, year=None)
+        return paper.generate_bibtex_entry()
+
+    def close(self):
+        self.executor.shutdown()
+        if self.metadata is not None:
+            self.metadata.close()
+            self.titles.close()
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    service = None  # set by make_server
+
+    def _send_json(self, status: int, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix sockets have no (host, port) client address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self._send_json(200, self.service.stats.summary())
+        elif self.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self._send_json(404, {'error': 'not found'})
+            return
+
+        start = time.perf_counter()
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        content_type = self.headers.get('Content-Type', '')
+
+        if content_type.startswith('application/pdf'):
+            # Uploaded PDF: spill it to a temp file the workers can open
+            name = self.headers.get('X-Filename', 'upload.pdf')
+            fd, tmp_path = tempfile.mkstemp(suffix='.pdf')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(body)
+                results = self.service.predict([tmp_path], names=[name])
+            finally:
+                os.remove(tmp_path)
+            payload = results[0]
+        else:
+            try:
+                paths = json.loads(body)['paths']
+            except (ValueError, KeyError, TypeError):
+                self._send_json(400, {'error': 'expected JSON {"paths": [...]} or a PDF body'})
+                return
+            payload = self.service.predict(paths)
+
+        self.service.stats.add(time.perf_counter() - start)
+        self._send_json(200, payload)
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service: PredictionService, host: str = "127.0.0.1", port: int = 8765, unix_socket=None):
+    handler = type('BoundPredictionHandler', (PredictionHandler,), {'service': service})
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        return ThreadingUnixHTTPServer(unix_socket, handler)
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Serve title predictions over HTTP.")
+    arg_parser.add_argument("--model", default=default_model_path(),
+                            help="Model file (.npz compact export or .joblib)")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument("--unix-socket", help="Listen on this Unix socket instead of TCP")
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="PDF extraction worker processes")
+    arg_parser.add_argument("--max-batch", type=int, default=32)
+    arg_parser.add_argument("--batch-window-ms", type=float, default=10.0)
+    arg_parser.add_argument("--cache", nargs="?", const=DEFAULT_CACHE_PATH, default=None, metavar="PATH",
+                            help="Use the on-disk extraction cache for repeated PDFs")
+    args = arg_parser.parse_args()
+
+    service = PredictionService(args.model, workers=args.workers, max_batch=args.max_batch,
+                                batch_window=args.batch_window_ms / 1000, cache_path=args.cache)
+    server = make_server(service, args.host, args.port, args.unix_socket)
+    print(f"Serving predictions on {args.unix_socket or f'http://{args.host}:{args.port}'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
@@ -0,0 +1,177 @@
+import os
+import json
+from array import array
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+from pdf2bibtex.fastjson import json_loads
+
+"""
+    Columnar index of the raw arXiv snapshot (arxiv-metadata-oai-snapshot.json).
+
+    The snapshot is parsed once and its per-paper fields are stored as plain
+    NumPy arrays (.npy) in an index directory:
+
+        offsets.npy / lengths.npy   byte range of each record in the snapshot
+        ids.npy                     arXiv id (fixed-width bytes)
+        years.npy                   publication year for new-style ids, 0 otherwise
+        has_journal_ref.npy         non-empty journal-ref field
+        cat_ptr.npy / cat_codes.npy categories in CSR layout (codes into meta.json's vocabulary)
+
+    The arrays are opened memory-mapped, so sampling is a handful of vectorized
+    filters; title/abstract/authors are only read (via the byte offsets) for
+    the rows that end up in the sample.
+"""
+
+ID_WIDTH = 32
+
+
+def build_snapshot_index(snapshot_path: str, index_dir: str):
+    """One-time conversion of the snapshot into the columnar index."""
+    os.makedirs(index_dir, exist_ok=True)
+    offsets, lengths = array('q'), array('i')
+    years, has_jref = array('h'), array('b')
+    cat_ptr, cat_codes = array('q', [0]), array('i')
+    ids = []
+    vocab = {}
+
+    with open(snapshot_path, 'rb') as f:
+        pos = 0
+        for raw_line in tqdm(f, desc="Indexing snapshot"):
+            length = len(raw_line)
+            if not raw_line.strip():
+                pos += length
+                continue
+            item = json_loads(raw_line)
+
+            paper_id = str(item['id'])
+            parts = paper_id.split('.')
+            # Same rule as parser.py: only new-style ids (YYMM.number) carry the year
+            year = 2000 + int(parts[0][:2]) if len(parts) >= 2 and parts[0].isdigit() else 0
+            journal = item.get('journal-ref')
+
+            offsets.append(pos)
+            lengths.append(length)
+            ids.append(paper_id.encode('utf-8')[:ID_WIDTH])
+            years.append(year)
+            has_jref.append(1 if journal and str(journal).strip() != "" else 0)
+            for cat in item['categories'].split():
+                cat_codes.append(vocab.setdefault(cat, len(vocab)))
+            cat_ptr.append(len(cat_codes))
+            pos += length
+
+    np.save(os.path.join(index_dir, "offsets.npy"), np.frombuffer(offsets, dtype=np.int64))
+    np.save(os.path.join(index_dir, "lengths.npy"), np.frombuffer(lengths, dtype=np.int32))
+    np.save(os.path.join(index_dir, "ids.npy"), np.array(ids, dtype=f"S{ID_WIDTH}"))
+    np.save(os.path.join(index_dir, "years.npy"), np.frombuffer(years, dtype=np.int16))
+    np.save(os.path.join(index_dir, "has_journal_ref.npy"), np.frombuffer(has_jref, dtype=np.int8).astype(bool))
+    np.save(os.path.join(index_dir, "cat_ptr.npy"), np.frombuffer(cat_ptr, dtype=np.int64))
+    np.save(os.path.join(index_dir, "cat_codes.npy"), np.frombuffer(cat_codes, dtype=np.int32))
+
+    st = os.stat(snapshot_path)
+    meta = {
+        'snapshot_path': os.path.abspath(snapshot_path),
+        'snapshot_size': st.st_size,
+        'snapshot_mtime_ns': st.st_mtime_ns,
+        'n_papers': len(offsets),
+        'categories': sorted(vocab, key=vocab.get),
+    }
+    with open(os.path.join(index_dir, "meta.json"), 'w') as f:
+        json.dump(meta, f)
+    print(f"Indexed {len(offsets)} papers into {index_dir}")
+
+
+class SnapshotIndex:
+    """Read-only, memory-mapped view of an index built by build_snapshot_index."""
+
+    def __init__(self, index_dir: str):
+        with open(os.path.join(index_dir, "meta.json"), 'r') as f:
+            self.meta = json.load(f)
+        self.snapshot_path = self.meta['snapshot_path']
+        self.categories = self.meta['categories']
+
+        def load(name):
+            return np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode='r')
+
+        self.offsets = load("offsets")
+        self.lengths = load("lengths")
+        self.ids = load("ids")
+        self.years = load("years")
+        self.has_journal_ref = load("has_journal_ref")
+        self.cat_ptr = load("cat_ptr")
+        self.cat_codes = load("cat_codes")
+
+    def is_stale(self) -> bool:
+        """True if the snapshot changed since the index was built."""
+        if not os.path.exists(self.snapshot_path):
+            return True
+        st = os.stat(self.snapshot_path)
+        return (st.st_size, st.st_mtime_ns) != (self.meta['snapshot_size'], self.meta['snapshot_mtime_ns'])
+
+    def read_records(self, rows) -> list:
+        """Lazily fetches the full JSON records for the given row numbers."""
+        rows = np.asarray(rows)
+        order = np.argsort(self.offsets[rows], kind='stable')  # sequential reads
+        records = [None] * len(rows)
+        with open(self.snapshot_path, 'rb') as f:
+            for i in order:
+                f.seek(int(self.offsets[rows[i]]))
+                records[i] = json_loads(f.read(int(self.lengths[rows[i]])))
+        return records
+
+    def sample_post_2007(self, target_categories, samples_per_cat=500, seed=42,
+                         min_year=2007, max_year=2026) -> pd.DataFrame:
+        """
+        Same selection rules and output columns as parser.get_random_post_2007_subset,
+        computed with vectorized filters over the index. Each (paper, category)
+        pair is attributed to the first target section its category starts with.
+        """
+        rng = np.random.default_rng(seed)
+
+        # Map every category in the vocabulary to its target section (-1: none)
+        cat_target = np.full(len(self.categories), -1, dtype=np.int32)
+        for code, cat in enumerate(self.categories):
+            for t, target_cat in enumerate(target_categories):
+                if cat.startswith(target_cat):
+                    cat_target[code] = t
+                    break
+
+        paper_ok = (np.asarray(self.has_journal_ref)
+                    & (self.years >= min_year) & (self.years <= max_year))
+        counts = np.diff(self.cat_ptr)
+        entry_paper = np.repeat(np.arange(len(counts)), counts)
+        entry_target = cat_target[self.cat_codes]
+        entry_ok = paper_ok[entry_paper] & (entry_target >= 0)
+
+        chosen_entries = []
+        for t in range(len(target_categories)):
+            candidates = np.flatnonzero(entry_ok & (entry_target == t))
+            k = min(samples_per_cat, len(candidates))
+            chosen_entries.append(rng.choice(candidates, size=k, replace=False))
+        chosen_entries = np.concatenate(chosen_entries) if chosen_entries else np.array([], dtype=np.int64)
+
+        rows = entry_paper[chosen_entries]
+        records = self.read_records(rows)
+        all_data = []
+        for entry, item in zip(chosen_entries, records):
+            paper_id = item['id']
+            all_data.append({
+                'id': paper_id,
+                'authors': item['authors'],
+                'journal-ref': item['journal-ref'],
+                'year': f"20{paper_id[:2]}",
+                'title': item['title'],
+                'abstract': item['abstract'],
+                'section': self.categories[self.cat_codes[entry]]
+            })
+        return pd.DataFrame(all_data)
+
+
+def open_or_build_index(snapshot_path: str, index_dir: str) -> SnapshotIndex:
+    """Opens the index, (re)building it first if it is missing or stale."""
+    if os.path.exists(os.path.join(index_dir, "meta.json")):
+        index = SnapshotIndex(index_dir)
+        if not index.is_stale():
+            return index
+    build_snapshot_index(snapshot_path, index_dir)
+    return SnapshotIndex(index_dir)
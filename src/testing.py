@@ -1,6 +1,4 @@
-import pandas as pd
-from pdf2bibtex.core import BASE_DIR
-import os
+from pdf2bibtex.dataset_io import find_training_set, read_dataframe
 
 
 
@@ -28,10 +26,11 @@ that our labeling process is capturing the visual features we intended.
 """
 
 ### Simple analysis of the built training data ###
-# This script reads the training data JSONL file created in data_builder.py
+# This script reads the training data file created in data_builder.py
+# (Parquet by default, memory-mapped; only the columns we need are loaded)
 # and prints out some basic statistics about it.
-path = os.path.join(BASE_DIR, "data", "processed", "training_set_v1.jsonl")
-df = pd.read_json(path, lines=True)
+path = find_training_set()
+df = read_dataframe(path, columns=['label', 'font_size'])
 
 print(f"Total lines extracted: {len(df)}")
 print("\nLabel Distribution:")
@@ -0,0 +1,124 @@
+from typing import List, Tuple
+from pdf2bibtex.core import normalize_for_matching
+
+"""
+    Title-line labeling for data_builder.
+
+    The ground-truth title is normalized once per document and compiled into a
+    suffix automaton. Each extracted line is then aligned against it in a single
+    left-to-right pass (O(len(line))), which gives, for every character, the
+    longest run ending there that also occurs in the title. The line's score is
+    the fraction of its characters covered by such runs (minus a small penalty
+    per extra run), so near-misses still score high:
+
+        - ligatures ("ﬁ" -> "fi") and full-width forms are folded by NFKC,
+        - hyphenation and punctuation are dropped by keeping only alphanumerics,
+        - a dropped or garbled glyph only breaks one run into two.
+
+    Exact substrings of the title (the original whitespace-squashed substring rule) always score 1.0.
+"""
+
+
+class SuffixAutomaton:
+    """Suffix automaton of one string: recognizes all of its substrings."""
+
+    def __init__(self, text: str):
+        self.next = [{}]
+        self.link = [-1]
+        self.length = [0]
+        last = 0
+        for ch in text:
+            cur = len(self.next)
+            self.next.append({})
+            self.length.append(self.length[last] + 1)
+            self.link.append(0)
+            p = last
+            while p != -1 and ch not in self.next[p]:
+                self.next[p][ch] = cur
+                p = self.link[p]
+            if p != -1:
+                q = self.next[p][ch]
+                if self.length[p] + 1 == self.length[q]:
+                    self.link[cur] = q
+                else:
+                    clone = len(self.next)
+                    self.next.append(dict(self.next[q]))
+                    self.length.append(self.length[p] + 1)
+                    self.link.append(self.link[q])
+                    while p != -1 and self.next[p].get(ch) == q:
+                        self.next[p][ch] = clone
+                        p = self.link[p]
+                    self.link[q] = clone
+                    self.link[cur] = clone
+            last = cur
+
+    def match_lengths(self, s: str) -> List[int]:
+        """For each i, the length of the longest suffix of s[:i + 1] that occurs in the text."""
+        out = []
+        state, length = 0, 0
+        nxt, link, lens = self.next, self.link, self.length
+        for ch in s:
+            while state and ch not in nxt[state]:
+                state = link[state]
+                length = lens[state]
+            if ch in nxt[state]:
+                state = nxt[state][ch]
+                length += 1
+            else:
+                state, length = 0, 0
+            out.append(length)
+        return out
+
+
+class TitleLabeler:
+    """
+    Labels the lines of one document against its ground-truth title.
+
+    :param true_title: ground-truth title from the metadata
+    :param threshold: minimum coverage score for a TITLE label
+    :param min_run: shortest matching run that counts towards the coverage
+                    (shorter runs only count if they span the whole line)
+    :param min_chars: lines shorter than this (stripped) are never TITLE
+    :param segment_penalty: score deducted for every matching run beyond the first
+    """
+
+    def __init__(self, true_title: str, threshold: float = 0.9, min_run: int = 5, min_chars: int = 4,
+                 segment_penalty: float = 0.05):
+        self.title = normalize_for_matching(true_title)
+        self.automaton = SuffixAutomaton(self.title)
+        self.threshold = threshold
+        self.min_run = min_run
+        self.min_chars = min_chars
+        self.segment_penalty = segment_penalty
+
+    def score(self, line_text: str) -> float:
+        """Share of the line's (normalized) characters covered by runs found in the title, in [0, 1]."""
+        if len(line_text.strip()) < self.min_chars:
+            return 0.0
+        s = normalize_for_matching(line_text)
+        if not s or not self.title:
+            return 0.0
+        lengths = self.automaton.match_lengths(s)
+        min_run = min(self.min_run, len(s))
+
+        # Greedy right-to-left parse of the line into runs found in the title.
+        # Each extra run (a glitch, or title words quoted out of order in body
+        # text) costs segment_penalty.
+        covered, segments = 0, 0
+        i = len(s) - 1
+        while i >= 0:
+            if lengths[i] >= min_run:
+                covered += lengths[i]
+                segments += 1
+                i -= lengths[i]
+            else:
+                i -= 1
+        if not segments:
+            return 0.0
+        return max(0.0, covered / len(s) - self.segment_penalty * (segments - 1))
+
+    def label_lines(self, texts: List[str]) -> Tuple[List[str], List[float]]:
+        """Labels (TITLE/OTHER) and confidence scores for all lines of a page, in one pass."""
+        scores = [self.score(t) for t in texts]
+        labels = ["TITLE" if sc >= self.threshold else "OTHER" for sc in scores]
+        return labels, scores
@@ -0,0 +1,19 @@
+import os
+import sys
+import json
+import pytest
+
+# The modules live in src/ (no installed package): same bootstrap as pdf2bibtex/cli.py
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+
+@pytest.fixture
+def write_metadata(tmp_path):
+    """Writes metadata records as a JSONL file and returns its path."""
+    def write(records, name="metadata.jsonl"):
+        path = tmp_path / name
+        with open(path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        return str(path)
+    return write
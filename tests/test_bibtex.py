@@ -0,0 +1,84 @@
+import os
+import pytest
+from pdf2bibtex.core import ArxivPaper
+from pdf2bibtex.bibtex import BibtexWriter, export_jsonl, format_entry, key_suffix, latex_escape, normalize_arxiv_id
+
+
+def paper(arxiv_id="2101.00001", authors="Alice Smith, Bob Jones", year=2021, title="A Title", journal_ref=None):
+    return ArxivPaper(id=arxiv_id, title=title, authors=authors, abstract="", section="cs",
+                      journal_ref=journal_ref, year=year)
+
+
+def test_key_suffix():
+    assert [key_suffix(n) for n in (0, 1, 2, 26, 27, 28, 52, 53)] == ["", "a", "b", "z", "aa", "ab", "az", "ba"]
+
+
+def test_unique_keys(tmp_path):
+    with BibtexWriter(str(tmp_path / "out.bib")) as writer:
+        keys = [writer.unique_key("Smith2021") for _ in range(28)]
+        assert keys[:3] == ["Smith2021", "Smith2021a", "Smith2021b"]
+        assert keys[26:] == ["Smith2021z", "Smith2021aa"]
+        # A base that collides with an earlier suffixed key skips the keys already used
+        assert writer.unique_key("Smith2021a") == "Smith2021ab"
+        assert len(writer.used_keys) == 29
+
+
+@pytest.mark.parametrize("raw, escaped", [
+    ("Plain title", "Plain title"),
+    ("Q&A for 100% of #tags_here", r"Q\&A for 100\% of \#tags\_here"),
+    (r"Already \& escaped", r"Already \& escaped"),
+    ("Bounds on $x_i^2$ and $a_b$", "Bounds on $x_i^2$ and $a_b$"),
+    ("Costs $5 only", r"Costs \$5 only"),
+    (r"\'{E}cole {\bf bold}", r"\'{E}cole {\bf bold}"),
+    ("Unbalanced {brace", r"Unbalanced \{brace"),
+    ("Line\n  breaks", "Line breaks"),
+])
+def test_latex_escape(raw, escaped):
+    assert latex_escape(raw) == escaped
+
+
+def test_normalize_arxiv_id():
+    assert normalize_arxiv_id("arXiv:2101.00001v3") == "2101.00001"
+    assert normalize_arxiv_id(" hep-th/9901001v1 ") == "hep-th/9901001"
+
+
+def test_format_entry_omits_unknown_fields():
+    entry = format_entry(paper(year=None, journal_ref="J. Test 1 & 2"), "Smith")
+    assert "year" not in entry
+    assert r"journal = {J. Test 1 \& 2}" in entry
+    assert entry.startswith("@article{Smith,\n") and entry.endswith("}\n")
+
+
+def test_writer_dedupes_and_suffixes_keys(tmp_path):
+    path = str(tmp_path / "out.bib")
+    with BibtexWriter(path) as writer:
+        first = writer.add(paper("2101.00001"))
+        assert writer.add(paper("2101.00001v2")) == first
+        second = writer.add(paper("2101.00002"))
+    assert (first, second) == ("Smith2021", "Smith2021a")
+    assert writer.stats() == {'written': 2, 'duplicates': 1}
+    with open(path) as f:
+        assert f.read().count("@article{") == 2
+    assert not os.path.exists(path + ".tmp")
+
+
+def test_writer_discards_output_on_error(tmp_path):
+    path = str(tmp_path / "out.bib")
+    with pytest.raises(RuntimeError):
+        with BibtexWriter(path) as writer:
+            writer.add(paper())
+            raise RuntimeError("boom")
+    assert not os.path.exists(path) and not os.path.exists(path + ".tmp")
+
+
+def test_export_jsonl(tmp_path, write_metadata):
+    records = [{'id': "2101.00001", 'title': "T1", 'authors': "Alice Smith", 'abstract': "", 'section': "cs",
+                'year': "2021"},
+               # Raw arXiv snapshot record: no section/year fields
+               {'id': "0704.0001", 'title': "T2", 'authors': "C. Balazs", 'abstract': "", 'categories': "hep-ph",
+                'journal-ref': "Phys.Rev.D76:013009,2007", 'update_date': "2008-11-13"}]
+    bib_path = str(tmp_path / "out.bib")
+    assert export_jsonl(write_metadata(records), bib_path) == {'written': 2, 'duplicates': 0}
+    with open(bib_path) as f:
+        text = f.read()
+    assert "@article{Smith2021," in text and "@article{Balazs2007," in text
@@ -0,0 +1,72 @@
+import random
+import pytest
+from pdf2bibtex.metadata_index import get_metadata_index, open_metadata_index
+
+
+def make_records(seed=0):
+    rng = random.Random(seed)
+    # Old 4-digit and new 5-digit numbers in the same month: many ids prefix others
+    ids = [f"2101.{rng.randint(0, 99999):05d}" for _ in range(300)] + \
+          [f"2101.{rng.randint(0, 9999):04d}" for _ in range(300)] + ["2101.0001", "2101.00015", "2101.0001"]
+    rng.shuffle(ids)
+    return [{'id': arxiv_id, 'title': f"Title  {i}\n", 'authors': f"Author {i}", 'year': 2021}
+            for i, arxiv_id in enumerate(ids)]
+
+
+def scan(records, arxiv_id):
+    """The original get_true_title rule: first record in file order whose id starts with arxiv_id."""
+    return next((r for r in records if str(r['id']).startswith(arxiv_id)), None)
+
+
+@pytest.fixture
+def records():
+    return make_records()
+
+
+@pytest.fixture
+def index(records, write_metadata):
+    with open_metadata_index(write_metadata(records)) as index:
+        yield index
+
+
+def test_prefix_lookups_match_linear_scan(records, index):
+    queries = [r['id'] for r in records] + [r['id'][:-1] for r in records[:200]] + ["2101.", "2101.9", "9999", ""]
+    for query in queries:
+        expected = scan(records, query)
+        assert index.record(query) == expected, query
+
+
+def test_exact_lookups(records, index):
+    for record in records:
+        assert index.record(record['id'], prefix=False)['id'] == record['id']
+    assert index.record("2101.000", prefix=False) is None
+    assert "2101.00015" in index and "2101.000" not in index
+
+
+def test_duplicate_ids_resolve_to_first_record(records, index):
+    first = next(r for r in records if r['id'] == "2101.0001")
+    assert index.record("2101.0001", prefix=False) == first
+
+
+def test_field_accessors(records, index):
+    record = records[10]
+    assert index.title(record['id'], prefix=False) == " ".join(record['title'].split())
+    assert index.authors(record['id'], prefix=False) == record['authors']
+    assert index.year(record['id'], prefix=False) == 2021
+    assert index.title("0000.00000") is None
+
+
+def test_ids_written_as_numbers_are_strings(write_metadata):
+    with open_metadata_index(write_metadata([{'id': 704.0001, 'title': "T", 'authors': "A"}])) as index:
+        assert index.title("704.0001", prefix=False) == "T"
+
+
+def test_stale_index_is_rebuilt(records, write_metadata):
+    path = write_metadata(records)
+    index = get_metadata_index(path)
+    assert index.record("2201.00001") is None
+    with open(path, 'a') as f:
+        f.write('{"id": "2201.00001", "title": "New", "authors": "B"}\n')
+    assert index.is_stale()
+    refreshed = get_metadata_index(path)
+    assert refreshed is not index and refreshed.title("2201.00001") == "New"
@@ -0,0 +1,86 @@
+import os
+import random
+import pytest
+from pdf2bibtex.core import normalize_for_matching
+from pdf2bibtex.title_index import (TitleIndex, build_title_index, get_title_index, open_title_index,
+                                    trigram_codes)
+
+WORDS = ("quantum learning neural graph spectral dynamics topology market protein stochastic "
+         "networks model analysis robust efficient optimal inference sparse").split()
+
+
+def make_records(n, seed=0):
+    rng = random.Random(seed)
+    return [{'id': f"2101.{i:05d}", 'title': " ".join(rng.choices(WORDS, k=rng.randint(3, 9))).capitalize()}
+            for i in range(n)]
+
+
+def dice(a: str, b: str) -> float:
+    ga, gb = set(trigram_codes(normalize_for_matching(a)).tolist()), set(trigram_codes(normalize_for_matching(b)).tolist())
+    return 2 * len(ga & gb) / (len(ga) + len(gb)) if ga and gb else 0.0
+
+
+def add_noise(title: str, rng: random.Random) -> str:
+    chars = list(title.replace("fi", "ﬁ"))
+    for _ in range(rng.randint(0, 2)):
+        chars[rng.randrange(len(chars))] = rng.choice("abcdefghijklmnopqrstuvwxyz ")
+    return "".join(chars)
+
+
+@pytest.fixture
+def metadata(write_metadata):
+    return write_metadata(make_records(500))
+
+
+def test_search_matches_brute_force_dice(metadata):
+    records = make_records(500)
+    index = open_title_index(metadata)
+    rng = random.Random(1)
+    for record in rng.sample(records, 100):
+        query = add_noise(record['title'], rng)
+        scores = [dice(query, r['title']) for r in records]
+        best_score = max(scores)
+        match = index.best(query, threshold=0.5)
+        if best_score < 0.5:
+            assert match is None
+            continue
+        # Ties go to the first title in file order
+        assert match.arxiv_id == records[scores.index(best_score)]['id']
+        assert match.score == pytest.approx(best_score, abs=1e-4)
+
+
+def test_search_is_ranked_and_thresholded(metadata):
+    index = open_title_index(metadata)
+    matches = index.search(make_records(500)[7]['title'], threshold=0.3, limit=5)
+    assert matches[0].score == 1.0
+    assert [m.score for m in matches] == sorted((m.score for m in matches), reverse=True)
+    assert all(m.score >= 0.3 for m in matches)
+    assert index.best("zzzz qqqq xxxx") is None
+    assert index.search("ab") == []
+
+
+def test_normalization_ignores_case_spacing_and_ligatures(write_metadata):
+    index = open_title_index(write_metadata([{'id': "2101.00001", 'title': "Efficient Inference\n in Sparse Networks"}]))
+    match = index.best("EFFICIENTINFERENCE IN SPARSE NETWORKS".replace("FFI", "ﬃ"))
+    assert match == ("2101.00001", 1.0)
+
+
+def test_stale_index_is_rebuilt(metadata):
+    index = open_title_index(metadata)
+    assert not index.is_stale()
+    with open(metadata, 'a') as f:
+        f.write('{"id": "2201.00001", "title": "A completely new title about zebras"}\n')
+    assert index.is_stale()
+    refreshed = get_title_index(metadata)
+    assert not refreshed.is_stale()
+    assert refreshed.best("A completely new title about zebras").arxiv_id == "2201.00001"
+    assert get_title_index(metadata) is refreshed
+
+
+def test_incomplete_index_is_not_opened(metadata, tmp_path):
+    index_dir = str(tmp_path / "titles")
+    build_title_index(metadata, index_dir)
+    os.remove(os.path.join(index_dir, "meta.json"))
+    # meta.json is written last: without it the directory is rebuilt, not read
+    index = open_title_index(metadata, index_dir)
+    assert isinstance(index, TitleIndex) and len(index) == 500